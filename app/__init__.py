@@ -1,5 +1,5 @@
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
+from app.common.replica import RoutingSQLAlchemy, replica_binds
 from flask_restplus import Api
 from flask_marshmallow import Marshmallow
 from flask_jwt_extended import JWTManager
@@ -7,21 +7,60 @@ from flask_migrate import Migrate
 from datetime import timedelta
 from app.models import *
 from flask_script import Manager
-from os import environ
+from os import cpu_count, environ
 
 
 app1 = Flask(__name__)
 app1.config['SECRET_KEY'] = '\x1f\x19\xc7\x95\xb6\xac\xd9\x1c\xbd\xd8%V\xd8\x1b@\xdf!\x13A\x9eW8\xa7\xc0'
-app1.config['SQLALCHEMY_DATABASE_URI'] = 'mysql+pymysql://{}:{}@{}/{}'.format(environ.get('DATABASE_USERNAME'), environ.get('DATABASE_PASSWORD'), environ.get('DATABASE_HOST'), environ.get('DATABASE_NAME'))
+app1.config['SQLALCHEMY_DATABASE_URI'] = environ.get('DATABASE_URL', 'mysql+pymysql://{}:{}@{}/{}'.format(environ.get('DATABASE_USERNAME'), environ.get('DATABASE_PASSWORD'), environ.get('DATABASE_HOST'), environ.get('DATABASE_NAME')))
+app1.config['SQLALCHEMY_BINDS'] = replica_binds(environ.get('DATABASE_REPLICA_URLS'))
 app1.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app1.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    "pool_size": int(environ.get('DATABASE_POOL_SIZE', 10)),
+    "max_overflow": int(environ.get('DATABASE_MAX_OVERFLOW', 10)),
+    "pool_timeout": float(environ.get('DATABASE_POOL_TIMEOUT', 30)),
+    "pool_recycle": int(environ.get('DATABASE_POOL_RECYCLE', 1800)),
+    "pool_pre_ping": environ.get('DATABASE_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+}
+app1.config['REPLICA_STICKY_SECONDS'] = int(environ.get('REPLICA_STICKY_SECONDS', 5))
+app1.config['ASYNC_DATABASE_URL'] = environ.get('ASYNC_DATABASE_URL')
 app1.config["DEBUG"] = True
 app1.config["JWT_SECRET_KEY"] = '1234567890abcdefghijklmnopqrstuvwxyz'
 app1.config['PROPAGATE_EXCEPTIONS'] = True
+app1.config['PAGINATION_DEFAULT_LIMIT'] = int(environ.get('PAGINATION_DEFAULT_LIMIT', 100))
+app1.config['PAGINATION_MAX_LIMIT'] = int(environ.get('PAGINATION_MAX_LIMIT', 1000))
+app1.config['STREAM_BATCH_SIZE'] = int(environ.get('STREAM_BATCH_SIZE', 1000))
+app1.config['EXPORT_MAX_ACCOUNTS'] = int(environ.get('EXPORT_MAX_ACCOUNTS', 500))
+app1.config['FUND_TRANSFER_BATCH_MAX'] = int(environ.get('FUND_TRANSFER_BATCH_MAX', 50000))
+app1.config['MINI_STATEMENT_SIZE'] = int(environ.get('MINI_STATEMENT_SIZE', 10))
+app1.config['MINI_STATEMENT_TTL'] = float(environ.get('MINI_STATEMENT_TTL', 30))
+app1.config['MINI_STATEMENT_MAX_ACCOUNTS'] = int(environ.get('MINI_STATEMENT_MAX_ACCOUNTS', 100000))
+app1.config['REFERENCE_CACHE_TTL'] = int(environ.get('REFERENCE_CACHE_TTL', 300))
+app1.config['REFERENCE_CACHE_MISS_INTERVAL'] = float(environ.get('REFERENCE_CACHE_MISS_INTERVAL', 1))
+app1.config['ACCOUNT_NUMBER_BLOCK_SIZE'] = int(environ.get('ACCOUNT_NUMBER_BLOCK_SIZE', 100))
 ACCESS_EXPIRES = timedelta(minutes=30)
+app1.config['JWT_ACCESS_TOKEN_EXPIRES'] = ACCESS_EXPIRES
+app1.config['TOKEN_BLOCKLIST_REFRESH_INTERVAL'] = float(environ.get('TOKEN_BLOCKLIST_REFRESH_INTERVAL', 1))
+app1.config['TOKEN_BLOCKLIST_REFRESH_WINDOW'] = float(environ.get('TOKEN_BLOCKLIST_REFRESH_WINDOW', 60))
+app1.config['TOKEN_BLOCKLIST_FULL_RELOAD'] = float(environ.get('TOKEN_BLOCKLIST_FULL_RELOAD', 300))
+app1.config['BCRYPT_LOG_ROUNDS'] = int(environ.get('BCRYPT_LOG_ROUNDS', 12))
+app1.config['PASSWORD_HASH_WORKERS'] = int(environ.get('PASSWORD_HASH_WORKERS', 4))
+app1.config['PASSWORD_HASH_QUEUE'] = int(environ.get('PASSWORD_HASH_QUEUE', 64))
+app1.config['PASSWORD_HASH_TIMEOUT'] = float(environ.get('PASSWORD_HASH_TIMEOUT', 5))
+app1.config['PASSWORD_HASH_BULK_WORKERS'] = int(environ.get('PASSWORD_HASH_BULK_WORKERS', cpu_count() or 4))
+app1.config['USER_BULK_MAX'] = int(environ.get('USER_BULK_MAX', 10000))
+app1.config['IDEMPOTENCY_KEY_TTL'] = int(environ.get('IDEMPOTENCY_KEY_TTL', 86400))
+app1.config['IDEMPOTENCY_CACHE_SIZE'] = int(environ.get('IDEMPOTENCY_CACHE_SIZE', 10000))
+app1.config['SNAPSHOT_SAFETY_LAG'] = int(environ.get('SNAPSHOT_SAFETY_LAG', 300))
+app1.config['ARCHIVE_AFTER_DAYS'] = int(environ.get('ARCHIVE_AFTER_DAYS', 365))
+app1.config['ARCHIVE_BATCH_SIZE'] = int(environ.get('ARCHIVE_BATCH_SIZE', 1000))
+app1.config['ARCHIVE_BATCH_PAUSE'] = float(environ.get('ARCHIVE_BATCH_PAUSE', 0.1))
+app1.config['SAVING_INTEREST_RATE'] = float(environ.get('SAVING_INTEREST_RATE', 3.5))
+app1.config['INTEREST_CHUNK_SIZE'] = int(environ.get('INTEREST_CHUNK_SIZE', 10000))
 
 #  Create a Flask-RESTPlus API
 api = Api(app1)
-db = SQLAlchemy(app1)
+db = RoutingSQLAlchemy(app1)
 ma = Marshmallow(app1)
 jwt = JWTManager(app1)
 migrate = Migrate(app1, db, compare_type=True)
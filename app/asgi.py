@@ -0,0 +1,36 @@
+"""
+    asyncio serving mode
+    The hot endpoints are served by the async views on an AsyncEngine; every
+    other route of app/routes.py is passed to the Flask app, which runs on a
+    worker thread. Start it with
+
+    $ python run_async.py
+    $ uvicorn app.asgi:application --workers 4
+"""
+from contextlib import asynccontextmanager
+from starlette.applications import Starlette
+from starlette.middleware.wsgi import WSGIMiddleware
+from starlette.routing import Mount, Route
+from app import app1
+from app.common.async_db import async_db
+from app.routes import *  # noqa: F401,F403 register the Flask resources
+from app.views import async_views
+
+
+@asynccontextmanager
+async def lifespan(application):
+    yield
+    await async_db.dispose()
+
+
+# a path that matches here with another method (PUT /bankaccount/1) falls
+# through to the Flask app like any other route
+routes = [
+    Route('/login', async_views.login, methods=['POST']),
+    Route('/bankaccount/{bank_account_id:int}', async_views.bank_account, methods=['GET']),
+    Route('/ministatement/{bank_account_id:int}', async_views.mini_statement, methods=['GET']),
+    Route('/fundtransfer', async_views.fund_transfer, methods=['POST']),
+    Mount('', app=WSGIMiddleware(app1)),
+]
+
+application = Starlette(routes=routes, lifespan=lifespan)
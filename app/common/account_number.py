@@ -0,0 +1,108 @@
+from collections import deque
+from threading import Lock
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from app import app1, db
+from app.common.custom_exception import AccountNumbersExhausted
+from app.models.account import AccountNumberSequence, BankAccount, BranchDetails
+
+# account number = 3 digit branch id + 5 digit serial (BankAccount.account_number is String(8))
+BRANCH_DIGITS = 3
+SERIAL_DIGITS = 5
+SERIALS_PER_BRANCH = 10 ** SERIAL_DIGITS
+
+
+def format_account_number(branch_id, serial):
+    return "{}{}".format(str(branch_id).zfill(BRANCH_DIGITS), str(serial).zfill(SERIAL_DIGITS))
+
+
+class AccountNumberAllocator(object):
+    """
+        Hands out account numbers per branch from blocks reserved in AccountNumberSequence
+        A worker reserves ACCOUNT_NUMBER_BLOCK_SIZE serials at a time by
+        advancing the branch's next_value in its own short transaction, so
+        workers never share a serial and only one round trip is made per
+        block. Numbers already taken by accounts created before the sequence
+        existed are skipped when the block is reserved. Serials left in a
+        block when the worker stops are never reused.
+    """
+    def __init__(self):
+        self.free = {}
+        self.lock = Lock()
+
+    def reserve_block(self, branch_id):
+        block_size = app1.config['ACCOUNT_NUMBER_BLOCK_SIZE']
+        sequence = AccountNumberSequence.__table__
+        for attempt in range(2):
+            try:
+                with db.engine.begin() as connection:
+                    # the UPDATE takes the row lock before next_value is read
+                    updated = connection.execute(sequence.update().where(
+                        sequence.c.branch_id == branch_id).values(next_value=sequence.c.next_value + block_size))
+                    if updated.rowcount:
+                        end = connection.execute(select([sequence.c.next_value]).where(
+                            sequence.c.branch_id == branch_id)).scalar()
+                    else:
+                        end = block_size
+                        connection.execute(sequence.insert().values(branch_id=branch_id, next_value=end))
+                    start = end - block_size
+                    if start >= SERIALS_PER_BRANCH:
+                        raise AccountNumbersExhausted("No account numbers left for branch {}".format(branch_id))
+                    end = min(end, SERIALS_PER_BRANCH)
+                    taken = set(number for number, in connection.execute(
+                        select([BankAccount.account_number]).where(BankAccount.account_number.between(
+                            format_account_number(branch_id, start), format_account_number(branch_id, end - 1)))))
+            except IntegrityError:
+                # another worker created the sequence row first, the retry updates it
+                if attempt:
+                    raise
+                continue
+            return deque(number for number in (format_account_number(branch_id, serial) for serial in range(start, end))
+                         if number not in taken)
+
+    def allocate(self, branch_id):
+        """
+            returns:
+                unused account number for branch_id as String
+        """
+        branch_id = int(branch_id)
+        if not 0 < branch_id < 10 ** BRANCH_DIGITS:
+            raise AccountNumbersExhausted("Branch id {} does not fit in an account number".format(branch_id))
+        with self.lock:
+            numbers = self.free.get(branch_id)
+            while not numbers:
+                numbers = self.free[branch_id] = self.reserve_block(branch_id)
+            return numbers.popleft()
+
+    def capacity(self):
+        """
+            Account numbers used and left per branch
+            returns:
+                list of dict
+        """
+        next_values = dict(db.session.query(AccountNumberSequence.branch_id, AccountNumberSequence.next_value))
+        accounts = dict(db.session.query(BankAccount.branch_id, func.count(BankAccount.id)).group_by(
+            BankAccount.branch_id))
+        with self.lock:
+            reserved = {branch_id: len(numbers) for branch_id, numbers in self.free.items()}
+        report = []
+        for branch_id, in db.session.query(BranchDetails.id).order_by(BranchDetails.id):
+            next_value = min(next_values.get(branch_id, 0), SERIALS_PER_BRANCH)
+            taken_ahead = 0
+            if next_value < SERIALS_PER_BRANCH:
+                # accounts numbered ahead of the sequence will be skipped, not handed out
+                taken_ahead = BankAccount.query.filter(BankAccount.account_number.between(
+                    format_account_number(branch_id, next_value),
+                    format_account_number(branch_id, SERIALS_PER_BRANCH - 1))).count()
+            remaining = SERIALS_PER_BRANCH - next_value - taken_ahead
+            report.append({"branch_id": branch_id,
+                           "capacity": SERIALS_PER_BRANCH,
+                           "accounts": accounts.get(branch_id, 0),
+                           "next_serial": next_value,
+                           "reserved_in_worker": reserved.get(branch_id, 0),
+                           "remaining": remaining,
+                           "used_percent": round(100.0 * (SERIALS_PER_BRANCH - remaining) / SERIALS_PER_BRANCH, 2)})
+        return report
+
+
+account_number_allocator = AccountNumberAllocator()
@@ -0,0 +1,73 @@
+import asyncio
+from functools import partial
+from threading import Lock
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from app import app1
+from app.common.pool_metrics import pool_metrics
+from app.common.replica import QUEUE_POOL_OPTIONS
+
+# asyncio driver used in place of the driver of DATABASE_URL
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "mysql": "aiomysql"}
+
+
+def async_database_url(url):
+    """
+        DATABASE_URL with its driver swapped for the asyncio one,
+        e.g. mysql+pymysql://... -> mysql+aiomysql://...
+    """
+    url = make_url(url)
+    return url.set(drivername="{}+{}".format(url.get_backend_name(), ASYNC_DRIVERS[url.get_backend_name()]))
+
+
+class AsyncDatabase(object):
+    """
+        AsyncEngine for the asyncio server, created on first use
+        It points at ASYNC_DATABASE_URL, or at SQLALCHEMY_DATABASE_URI with an
+        asyncio driver, and takes the pool settings of the sync engine. Its
+        pool is reported by GET /poolmetrics like the others.
+    """
+    def __init__(self):
+        self.engine = None
+        self.lock = Lock()
+
+    def get_engine(self):
+        with self.lock:
+            if self.engine is None:
+                url = make_url(app1.config['ASYNC_DATABASE_URL'] or
+                               async_database_url(app1.config['SQLALCHEMY_DATABASE_URI']))
+                options = dict(app1.config['SQLALCHEMY_ENGINE_OPTIONS'])
+                # aiosqlite gets a NullPool, which takes no sizing options
+                if url.get_backend_name() == "sqlite":
+                    options = {key: value for key, value in options.items() if key not in QUEUE_POOL_OPTIONS}
+                self.engine = create_async_engine(url, **options)
+                pool_metrics.register(self.engine.sync_engine, "async {!r}".format(self.engine.url))
+            return self.engine
+
+    def session(self):
+        """
+            returns:
+                AsyncSession whose objects stay readable after commit
+        """
+        return AsyncSession(self.get_engine(), expire_on_commit=False)
+
+    async def dispose(self):
+        if self.engine is not None:
+            await self.engine.dispose()
+            self.engine = None
+
+
+def in_app_context(func, *args):
+    with app1.app_context():
+        return func(*args)
+
+
+async def run_sync(func, *args):
+    """
+        Call blocking code (bcrypt, or a cache that reloads through db.session)
+        on a worker thread inside an app context, so the event loop keeps serving
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, partial(in_app_context, func, *args))
+
+
+async_db = AsyncDatabase()
@@ -0,0 +1,106 @@
+from datetime import timedelta
+from sqlalchemy import case, desc, func
+from app import app1, db
+from app.common.ledger_archive import ledger_model, includes_archive
+from app.common.reference_cache import transaction_type_cache
+from app.models.account import BalanceSnapshot
+from app.models.transaction import AccountTransactionDetails
+
+
+def signed_amount(ledger=AccountTransactionDetails):
+    """
+        transaction_amount as it moves the balance: credit adds, debit subtracts,
+        other transaction types leave it unchanged
+        Only rows with transaction_status "success" moved a balance, the
+        queries summing it filter on that (declined transfers wrote "failed"
+        rows for both sides).
+    """
+    credit = transaction_type_cache.get_by_name("credit")
+    debit = transaction_type_cache.get_by_name("debit")
+    return case([(ledger.transaction_type_id == (credit.id if credit else None), ledger.transaction_amount),
+                 (ledger.transaction_type_id == (debit.id if debit else None), -ledger.transaction_amount)],
+                else_=0)
+
+
+def take_balance_snapshots():
+    """
+        Snapshot the balance of every account with ledger rows since the last run
+        Balances are derived from the previous snapshot plus the ledger rows
+        up to the highest id dated more than SNAPSHOT_SAFETY_LAG seconds ago.
+        Ids are assigned at insert, not at commit, so a transfer still open
+        when the run starts can commit a lower id than the highest visible
+        one; rows older than the lag belong to transactions that have ended,
+        so no row below the cutoff is committed after the snapshot. The lag
+        must be longer than any write transaction on the ledger.
+        returns:
+            number of snapshots written
+    """
+    # database clock, like transaction_date, so every row the snapshot
+    # covers is dated before the snapshot
+    snapshot_at = db.session.query(func.now()).scalar()
+    settled = snapshot_at - timedelta(seconds=app1.config['SNAPSHOT_SAFETY_LAG'])
+    # read back from the highest id, only the rows within the lag are passed over
+    cutoff = db.session.query(AccountTransactionDetails.id).filter(
+        AccountTransactionDetails.transaction_date <= settled).order_by(
+        desc(AccountTransactionDetails.id)).limit(1).scalar() or 0
+    previous_cutoff = db.session.query(func.max(BalanceSnapshot.last_transaction_id)).scalar() or 0
+    if cutoff <= previous_cutoff:
+        return 0
+
+    deltas = db.session.query(AccountTransactionDetails.bank_account_id, func.sum(signed_amount())).filter(
+        AccountTransactionDetails.id > previous_cutoff,
+        AccountTransactionDetails.id <= cutoff,
+        AccountTransactionDetails.transaction_status == "success").group_by(AccountTransactionDetails.bank_account_id).all()
+
+    latest = db.session.query(BalanceSnapshot.bank_account_id,
+                              func.max(BalanceSnapshot.id).label('id')).group_by(
+        BalanceSnapshot.bank_account_id).subquery()
+    balances = dict(db.session.query(BalanceSnapshot.bank_account_id, BalanceSnapshot.account_balance).join(
+        latest, BalanceSnapshot.id == latest.c.id))
+
+    db.session.bulk_insert_mappings(BalanceSnapshot, [
+        {"bank_account_id": bank_account_id,
+         "account_balance": balances.get(bank_account_id, 0) + int(delta or 0),
+         "last_transaction_id": cutoff,
+         "snapshot_at": snapshot_at} for bank_account_id, delta in deltas])
+    db.session.commit()
+    return len(deltas)
+
+
+def balance_as_of(bank_account_id, as_of):
+    """
+        Balance of an account at as_of from the nearest earlier snapshot plus the ledger rows after it
+        The ledger tail is bounded by the next snapshot that covers every row
+        dated up to as_of, i.e. one taken more than SNAPSHOT_SAFETY_LAG
+        seconds after it, so at most one snapshot interval of rows is read
+        however long the history is. The archive is only read when that
+        interval has archived rows.
+        parameters:
+            bank_account_id: Integer
+            as_of: datetime
+        returns:
+            dict
+    """
+    snapshots = BalanceSnapshot.query.filter(BalanceSnapshot.bank_account_id == bank_account_id)
+    before = snapshots.filter(BalanceSnapshot.snapshot_at <= as_of).order_by(desc(BalanceSnapshot.snapshot_at)).first()
+    # a snapshot covers the rows dated SNAPSHOT_SAFETY_LAG seconds before it
+    after = snapshots.filter(
+        BalanceSnapshot.snapshot_at > as_of + timedelta(seconds=app1.config['SNAPSHOT_SAFETY_LAG'])).order_by(
+        BalanceSnapshot.snapshot_at).first()
+
+    ledger = ledger_model(includes_archive([bank_account_id], after=before.last_transaction_id if before else None))
+    tail = db.session.query(func.count(ledger.id), func.sum(signed_amount(ledger))).filter(
+        ledger.bank_account_id == bank_account_id,
+        ledger.transaction_date <= as_of,
+        ledger.transaction_status == "success")
+    if before:
+        tail = tail.filter(ledger.id > before.last_transaction_id)
+    if after:
+        tail = tail.filter(ledger.id <= after.last_transaction_id)
+    tail_transactions, tail_amount = tail.one()
+
+    return {"bank_account_id": bank_account_id,
+            "as_of": as_of.isoformat(),
+            "account_balance": (before.account_balance if before else 0) + int(tail_amount or 0),
+            "snapshot_at": before.snapshot_at.isoformat() if before else None,
+            "tail_transactions": tail_transactions}
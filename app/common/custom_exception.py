@@ -55,3 +55,33 @@ class FundTransferObjectNotFound(ExceptionHandler):
 class MiniStatementObjectNotFound(ExceptionHandler):
     """Raised when Mini Statement Object Not Found"""
     pass
+
+
+class FundTransferDeclined(ExceptionHandler):
+    """Raised when Fund Transfer is Declined"""
+    pass
+
+
+class PasswordHashingBusy(ExceptionHandler):
+    """Raised when Password Hashing capacity is exhausted"""
+    pass
+
+
+class AccountNumbersExhausted(ExceptionHandler):
+    """Raised when Account Numbers of a Branch are Exhausted"""
+    pass
+
+
+class RequestDataInvalid(ExceptionHandler):
+    """Raised when Request Data is Missing or Invalid"""
+    pass
+
+
+class IdempotencyKeyInvalid(ExceptionHandler):
+    """Raised when Idempotency Key is too long or reused with a different Request"""
+    pass
+
+
+class IdempotencyKeyInProgress(ExceptionHandler):
+    """Raised when the first Request with an Idempotency Key has not finished"""
+    pass
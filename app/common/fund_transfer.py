@@ -0,0 +1,310 @@
+import uuid
+from sqlalchemy import select
+from app import db
+from app.common.async_db import async_db
+from app.common.custom_exception import BankAccountObjectNotFound, TransactionTypeObjectNotFound, \
+    FundTransferDeclined, RequestDataInvalid
+from app.common.mini_statement import mini_statement_store
+from app.common.reference_cache import transaction_type_cache
+from app.common.request_parser import load_data
+from app.common.sharded_balance import sharded_accounts, credit_shard, fold_shards, credit_shard_async, \
+    fold_shards_async
+from app.models.account import BankAccount
+from app.models.transaction import AccountTransactionDetails, FundTransfer
+from app.schemas.transaction import accounts_transaction_details_schema, fund_transfer_schema
+
+MINIMUM_BALANCE = 1000
+
+# account numbers per IN (...) lookup, below the bind parameter limit of every backend
+ACCOUNT_LOOKUP_CHUNK = 500
+
+
+def transfer_funds(from_account, to_account, transaction_amount, idempotency_key=None):
+    """
+        Move funds between two bank accounts in a single unit of work
+        Both accounts are read with one query, the transaction types come from
+        the reference data cache, and the fund transfer is flushed together
+        with its two ledger rows and committed once. Nothing is written when
+        the transfer is rejected.
+        parameters:
+            from_account: String
+            to_account: String
+            transaction_amount: Integer
+            idempotency_key: IdempotencyKey committed with the transfer, optional
+        returns:
+            FundTransfer
+    """
+    try:
+        # a sharded receiver is credited through one of its shards and its
+        # account row is not locked
+        to_sharded_account = sharded_accounts.get(to_account) if to_account != from_account else None
+
+        # lock both accounts in one round trip
+        bank_accounts = BankAccount.query.filter(BankAccount.account_number.in_(
+            [from_account] if to_sharded_account else [from_account, to_account])).with_for_update().all()
+        bank_accounts = {bank_account.account_number: bank_account for bank_account in bank_accounts}
+
+        from_bank_account = bank_accounts.get(from_account)
+        if not from_bank_account:
+            raise BankAccountObjectNotFound("From bank account details does not exist")
+
+        to_bank_account = bank_accounts.get(to_account)
+        if not to_bank_account and not to_sharded_account:
+            raise BankAccountObjectNotFound("To bank account details does not exist")
+
+        transaction_type_debit = transaction_type_cache.get_by_name("debit")
+        transaction_type_credit = transaction_type_cache.get_by_name("credit")
+        if not transaction_type_debit or not transaction_type_credit:
+            raise TransactionTypeObjectNotFound("Transaction type does not exist")
+
+        if sharded_accounts.get(from_account):
+            from_bank_account.account_balance += fold_shards(from_bank_account.id)
+
+        if from_bank_account.account_balance - MINIMUM_BALANCE - transaction_amount <= 0:
+            raise FundTransferDeclined("Fund transfer declined, Please maintain minimum balance in account")
+
+        from_bank_account.account_balance -= transaction_amount
+        if to_bank_account:
+            to_bank_account.account_balance += transaction_amount
+
+        fund_transfer_data = FundTransfer(from_account=from_account, to_account=to_account)
+
+        # ledger rows reference the fund transfer through the relationship,
+        # so its id is assigned in the same flush
+        fund_transfer_data.account_transaction_details = [
+            AccountTransactionDetails(
+                transaction_amount=transaction_amount,
+                transaction_status="success",
+                bank_account_id=from_bank_account.id,
+                transaction_type_id=transaction_type_debit.id,
+                fund_transfer_id=None,
+                fund_transfer_info="Funds Transfer"
+            ),
+            AccountTransactionDetails(
+                transaction_amount=transaction_amount,
+                transaction_status="success",
+                bank_account_id=to_bank_account.id if to_bank_account else to_sharded_account.bank_account_id,
+                transaction_type_id=transaction_type_credit.id,
+                fund_transfer_id=None,
+                fund_transfer_info="Funds Received"
+            )
+        ]
+
+        db.session.add(fund_transfer_data)
+        if idempotency_key is not None:
+            idempotency_key.fund_transfer = fund_transfer_data
+            db.session.add(idempotency_key)
+        db.session.flush()
+        # after the ledger rows, so the shard lock is held for the shortest time
+        if not to_bank_account:
+            credit_shard(to_sharded_account, transaction_amount)
+        ledger = accounts_transaction_details_schema.dump(fund_transfer_data.account_transaction_details)
+        db.session.commit()
+        mini_statement_store.record(ledger)
+        return fund_transfer_data
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+async def transfer_funds_async(from_account, to_account, transaction_amount, idempotency_key=None):
+    """
+        transfer_funds() for the asyncio server, on an AsyncSession
+        The cached lookups (sharded accounts, transaction types) are resolved
+        before the transaction starts, so the account rows are locked only
+        for the statements of the transfer itself.
+        parameters:
+            from_account: String
+            to_account: String
+            transaction_amount: Integer
+            idempotency_key: IdempotencyKey committed with the transfer, optional
+        returns:
+            FundTransfer
+    """
+    sharded = await sharded_accounts.accounts_async()
+    to_sharded_account = sharded.get(to_account) if to_account != from_account else None
+    transaction_type_debit = await transaction_type_cache.get_by_name_async("debit")
+    transaction_type_credit = await transaction_type_cache.get_by_name_async("credit")
+    if not transaction_type_debit or not transaction_type_credit:
+        raise TransactionTypeObjectNotFound("Transaction type does not exist")
+
+    async with async_db.session() as session:
+        async with session.begin():
+            bank_accounts = (await session.execute(select(BankAccount).where(BankAccount.account_number.in_(
+                [from_account] if to_sharded_account else [from_account, to_account])).with_for_update())).scalars()
+            bank_accounts = {bank_account.account_number: bank_account for bank_account in bank_accounts}
+
+            from_bank_account = bank_accounts.get(from_account)
+            if not from_bank_account:
+                raise BankAccountObjectNotFound("From bank account details does not exist")
+
+            to_bank_account = bank_accounts.get(to_account)
+            if not to_bank_account and not to_sharded_account:
+                raise BankAccountObjectNotFound("To bank account details does not exist")
+
+            if sharded.get(from_account):
+                from_bank_account.account_balance += await fold_shards_async(session, from_bank_account.id)
+
+            if from_bank_account.account_balance - MINIMUM_BALANCE - transaction_amount <= 0:
+                raise FundTransferDeclined("Fund transfer declined, Please maintain minimum balance in account")
+
+            from_bank_account.account_balance -= transaction_amount
+            if to_bank_account:
+                to_bank_account.account_balance += transaction_amount
+
+            fund_transfer_data = FundTransfer(from_account=from_account, to_account=to_account)
+            fund_transfer_data.account_transaction_details = [
+                AccountTransactionDetails(
+                    transaction_amount=transaction_amount,
+                    transaction_status="success",
+                    bank_account_id=from_bank_account.id,
+                    transaction_type_id=transaction_type_debit.id,
+                    fund_transfer_id=None,
+                    fund_transfer_info="Funds Transfer"
+                ),
+                AccountTransactionDetails(
+                    transaction_amount=transaction_amount,
+                    transaction_status="success",
+                    bank_account_id=to_bank_account.id if to_bank_account else to_sharded_account.bank_account_id,
+                    transaction_type_id=transaction_type_credit.id,
+                    fund_transfer_id=None,
+                    fund_transfer_info="Funds Received"
+                )
+            ]
+
+            session.add(fund_transfer_data)
+            if idempotency_key is not None:
+                idempotency_key.fund_transfer = fund_transfer_data
+                session.add(idempotency_key)
+            await session.flush()
+            if not to_bank_account:
+                await credit_shard_async(session, to_sharded_account, transaction_amount)
+            ledger = accounts_transaction_details_schema.dump(fund_transfer_data.account_transaction_details)
+
+    mini_statement_store.record(ledger)
+    return fund_transfer_data
+
+
+def transfer_result(index, transfer, success, message, fund_transfer_id=None):
+    return {"index": index,
+            "from_account": transfer.get('from_account') if isinstance(transfer, dict) else None,
+            "to_account": transfer.get('to_account') if isinstance(transfer, dict) else None,
+            "transaction_amount": transfer.get('transaction_amount') if isinstance(transfer, dict) else None,
+            "fund_transfer_id": fund_transfer_id,
+            "success": success,
+            "message": message}
+
+
+def transfer_funds_batch(transfers):
+    """
+        Apply a list of fund transfers in order in a single unit of work
+        All account numbers are resolved and locked up front, the minimum
+        balance rule is applied per transfer against the running balances,
+        and the accepted transfers are written with bulk inserts and one
+        commit. Rejected transfers write nothing.
+        parameters:
+            transfers: list of {from_account, to_account, transaction_amount}
+        returns:
+            list with one result per transfer
+    """
+    try:
+        transaction_type_debit = transaction_type_cache.get_by_name("debit")
+        transaction_type_credit = transaction_type_cache.get_by_name("credit")
+        if not transaction_type_debit or not transaction_type_credit:
+            raise TransactionTypeObjectNotFound("Transaction type does not exist")
+
+        account_numbers = set()
+        for transfer in transfers:
+            if isinstance(transfer, dict):
+                account_numbers.update(transfer[key] for key in ('from_account', 'to_account')
+                                       if isinstance(transfer.get(key), str))
+
+        # lock in a stable order so concurrent batches cannot deadlock each other
+        account_numbers = sorted(account_numbers)
+        bank_accounts = {}
+        for start in range(0, len(account_numbers), ACCOUNT_LOOKUP_CHUNK):
+            rows = db.session.query(BankAccount.id, BankAccount.account_number, BankAccount.account_balance).filter(
+                BankAccount.account_number.in_(account_numbers[start:start + ACCOUNT_LOOKUP_CHUNK])).order_by(
+                BankAccount.account_number).with_for_update()
+            for row in rows:
+                bank_accounts[row.account_number] = {"id": row.id, "account_balance": row.account_balance}
+
+        # the batch holds the account rows, so sharded accounts are folded and
+        # credited directly
+        for account_number, bank_account in bank_accounts.items():
+            if sharded_accounts.get(account_number):
+                folded = fold_shards(bank_account['id'])
+                if folded:
+                    bank_account['account_balance'] += folded
+                    bank_account['changed'] = True
+
+        results = []
+        accepted = []
+        for index, transfer in enumerate(transfers):
+            try:
+                data = load_data(fund_transfer_schema, transfer,
+                                 required=("from_account", "to_account", "transaction_amount"))
+            except RequestDataInvalid as err:
+                results.append(transfer_result(index, transfer, False, err.message))
+                continue
+
+            from_bank_account = bank_accounts.get(data['from_account'])
+            if not from_bank_account:
+                results.append(transfer_result(index, transfer, False, "From bank account details does not exist"))
+                continue
+            to_bank_account = bank_accounts.get(data['to_account'])
+            if not to_bank_account:
+                results.append(transfer_result(index, transfer, False, "To bank account details does not exist"))
+                continue
+
+            if from_bank_account['account_balance'] - MINIMUM_BALANCE - data['transaction_amount'] <= 0:
+                results.append(transfer_result(
+                    index, transfer, False, "Fund transfer declined, Please maintain minimum balance in account"))
+                continue
+
+            from_bank_account['account_balance'] -= data['transaction_amount']
+            to_bank_account['account_balance'] += data['transaction_amount']
+            from_bank_account['changed'] = to_bank_account['changed'] = True
+            results.append(transfer_result(index, data, True, "Fund transferred successfully"))
+            accepted.append((results[-1], from_bank_account, to_bank_account))
+
+        if not accepted:
+            db.session.rollback()
+            return results
+
+        # return_defaults would insert row by row; the ids of one executemany
+        # are read back by batch_id instead, in insert (id) order
+        batch_id = uuid.uuid4().hex
+        db.session.bulk_insert_mappings(FundTransfer, [
+            {"from_account": result['from_account'], "to_account": result['to_account'], "batch_id": batch_id}
+            for result, _, _ in accepted])
+        fund_transfer_ids = [fund_transfer_id for fund_transfer_id, in db.session.query(FundTransfer.id).filter(
+            FundTransfer.batch_id == batch_id).order_by(FundTransfer.id)]
+
+        ledger = []
+        for (result, from_bank_account, to_bank_account), fund_transfer_id in zip(accepted, fund_transfer_ids):
+            result['fund_transfer_id'] = fund_transfer_id
+            ledger.append({"transaction_amount": result['transaction_amount'],
+                           "transaction_status": "success",
+                           "bank_account_id": from_bank_account['id'],
+                           "transaction_type_id": transaction_type_debit.id,
+                           "fund_transfer_id": fund_transfer_id,
+                           "fund_transfer_info": "Funds Transfer"})
+            ledger.append({"transaction_amount": result['transaction_amount'],
+                           "transaction_status": "success",
+                           "bank_account_id": to_bank_account['id'],
+                           "transaction_type_id": transaction_type_credit.id,
+                           "fund_transfer_id": fund_transfer_id,
+                           "fund_transfer_info": "Funds Received"})
+        db.session.bulk_insert_mappings(AccountTransactionDetails, ledger)
+
+        changed = [{"id": bank_account['id'], "account_balance": bank_account['account_balance']}
+                   for bank_account in bank_accounts.values() if bank_account.get('changed')]
+        db.session.bulk_update_mappings(BankAccount, changed)
+        db.session.commit()
+
+        mini_statement_store.invalidate(*[bank_account['id'] for bank_account in changed])
+        return results
+    except Exception:
+        db.session.rollback()
+        raise
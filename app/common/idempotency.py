@@ -0,0 +1,240 @@
+import hashlib
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+from functools import wraps
+from http import HTTPStatus
+from threading import Lock
+from flask import g, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import inspect
+from app import app1, db
+from app.common.custom_exception import IdempotencyKeyInvalid, IdempotencyKeyInProgress
+from app.common.log import logger
+from app.common.response_genarator import ResponseGenerator
+from app.models.idempotencykey import IdempotencyKey
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+# set on a response that was replayed, not produced by this request
+REPLAYED_HEADER = "Idempotent-Replayed"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+# status and body are None when the response of the first request cannot be rebuilt
+StoredResponse = namedtuple("StoredResponse", ["request_hash", "status", "body", "expires_at"])
+
+# request path: function(FundTransfer) returning the (status, body) of the
+# response its first request gave, see replays()
+replayers = {}
+
+
+def request_hash(body):
+    return hashlib.sha256(body).hexdigest()
+
+
+def idempotency_scope(email_id, request_path, idempotency_key):
+    """
+        A key is only looked up for the user and the endpoint it was sent to
+        returns:
+            (email_id, request_path, idempotency_key)
+    """
+    if len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise IdempotencyKeyInvalid("Idempotency-Key is longer than {} characters".format(IDEMPOTENCY_KEY_MAX_LENGTH))
+    return email_id, request_path, idempotency_key
+
+
+def replays(request_path):
+    """
+        Register how the response of a first request to request_path is
+        rebuilt from the FundTransfer committed with its IdempotencyKey row,
+        for retries that are not answered from memory
+    """
+    def register(replayer):
+        replayers[request_path] = replayer
+        return replayer
+    return register
+
+
+def check_stored(stored, body_hash):
+    """
+        returns:
+            stored, when it can be replayed for a request whose body hashes to body_hash
+    """
+    if stored.request_hash != body_hash:
+        raise IdempotencyKeyInvalid("Idempotency-Key was already used with a different request")
+    if stored.status is None:
+        raise IdempotencyKeyInProgress("A request with this Idempotency-Key is in progress, Please retry later")
+    return stored
+
+
+class IdempotencyStore(object):
+    """
+        Responses of the requests sent with an Idempotency-Key header
+        The IdempotencyKey row of a request is committed together with the
+        money it moves and points at its FundTransfer, so a retry either finds
+        it or runs as a first request; a retry racing the first request fails
+        on the unique key and nothing of it is written. Responses are served
+        from a least recently used map of IDEMPOTENCY_CACHE_SIZE entries and
+        otherwise rebuilt from the FundTransfer of the row, so no response is
+        written after the commit. Rows expire after IDEMPOTENCY_KEY_TTL seconds.
+    """
+    def __init__(self):
+        self.responses = OrderedDict()
+        self.lock = Lock()
+
+    def cached(self, scope):
+        with self.lock:
+            stored = self.responses.get(scope)
+            if stored is None:
+                return None
+            if stored.expires_at <= datetime.utcnow():
+                del self.responses[scope]
+                return None
+            self.responses.move_to_end(scope)
+            return stored
+
+    def remember(self, scope, stored):
+        with self.lock:
+            self.responses[scope] = stored
+            self.responses.move_to_end(scope)
+            while len(self.responses) > app1.config['IDEMPOTENCY_CACHE_SIZE']:
+                self.responses.popitem(last=False)
+
+    def find(self, scope):
+        """
+            parameters:
+                scope: (email_id, request_path, idempotency_key)
+            returns:
+                StoredResponse, or None when the key is not in use
+        """
+        stored = self.cached(scope)
+        if stored is not None:
+            return stored
+
+        email_id, request_path, idempotency_key = scope
+        row = IdempotencyKey.query.filter(IdempotencyKey.email_id == email_id,
+                                          IdempotencyKey.request_path == request_path,
+                                          IdempotencyKey.idempotency_key == idempotency_key).first()
+        if row is None:
+            return None
+        if row.expires_at <= datetime.utcnow():
+            # free the key for the request that reuses it
+            db.session.delete(row)
+            db.session.commit()
+            return None
+
+        stored = StoredResponse(row.request_hash, None, None, row.expires_at)
+        replayer = replayers.get(request_path)
+        if row.fund_transfer is not None and replayer is not None:
+            status, body = replayer(row.fund_transfer)
+            stored = stored._replace(status=status, body=body)
+            self.remember(scope, stored)
+        return stored
+
+    def claim(self, scope, body_hash):
+        """
+            returns:
+                (IdempotencyKey, StoredResponse) for a first request, the write
+                path adds the row to its transaction and sets its fund_transfer
+        """
+        email_id, request_path, idempotency_key = scope
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=app1.config['IDEMPOTENCY_KEY_TTL'])
+        record = IdempotencyKey(email_id=email_id, request_path=request_path, idempotency_key=idempotency_key,
+                                request_hash=body_hash, created_at=now, expires_at=expires_at)
+        return record, StoredResponse(body_hash, None, None, expires_at)
+
+    def complete(self, scope, stored):
+        """
+            Keep the response of a first request whose writes are committed,
+            retries sent to this worker are replayed from memory
+        """
+        self.remember(scope, stored)
+
+
+def committed_id(record):
+    """
+        returns:
+            id of the IdempotencyKey row if it was committed, otherwise None
+    """
+    state = inspect(record)
+    return state.identity[0] if state.has_identity else None
+
+
+def replay_response(stored):
+    response = app1.response_class(stored.body, status=stored.status, mimetype='application/json')
+    response.headers[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def idempotent(view):
+    """
+        Answer a request retried with the same Idempotency-Key header with the
+        stored response of the first one instead of running view again
+        Requests without the header are passed through untouched. Use below
+        @jwt_required(), keys are kept per user. The IdempotencyKey row of a
+        first request is handed to the view as g.idempotency_key to be added
+        to its transaction.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        idempotency_key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        if not idempotency_key:
+            return view(*args, **kwargs)
+        try:
+            scope = idempotency_scope(get_jwt_identity()["email_id"], request.path, idempotency_key)
+            body_hash = request_hash(request.get_data())
+            stored = idempotency_store.find(scope)
+            if stored is not None:
+                logger.info("Replaying response for Idempotency-Key %s", idempotency_key)
+                return replay_response(check_stored(stored, body_hash))
+
+            record, pending = idempotency_store.claim(scope, body_hash)
+            g.idempotency_key = record
+            response = view(*args, **kwargs)
+            if response.status_code >= HTTPStatus.BAD_REQUEST:
+                # drops the key with anything else the failed request did not commit
+                db.session.rollback()
+
+            record_id = committed_id(record)
+            if record_id is not None:
+                idempotency_store.complete(scope, pending._replace(
+                    status=response.status_code, body=response.get_data(as_text=True)))
+                return response
+
+            # nothing was committed, unless a retry running at the same time
+            # took the key first
+            stored = idempotency_store.find(scope)
+            if stored is not None:
+                logger.info("Replaying response for Idempotency-Key %s", idempotency_key)
+                return replay_response(check_stored(stored, body_hash))
+            return response
+
+        except IdempotencyKeyInvalid as err:
+            logger.warning(err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.UNPROCESSABLE_ENTITY)
+        except IdempotencyKeyInProgress as err:
+            logger.warning(err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.CONFLICT)
+        return response.error_response()
+
+    return wrapper
+
+
+def purge_expired_idempotency_keys():
+    """
+        Delete IdempotencyKey rows that have expired
+        returns:
+            number of deleted rows
+    """
+    deleted = IdempotencyKey.query.filter(
+        IdempotencyKey.expires_at < datetime.utcnow()).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,116 @@
+import numpy as np
+from sqlalchemy import bindparam, func, or_, update
+from app import app1, db
+from app.common.custom_exception import TransactionTypeObjectNotFound
+from app.common.log import logger
+from app.common.reference_cache import transaction_type_cache
+from app.models.account import AccountType, BalanceShard, BankAccount
+from app.models.transaction import AccountTransactionDetails, FundTransfer
+
+SAVING_ACCOUNT_TYPE = "Saving"
+# from_account of the FundTransfer that groups the interest credits of a chunk
+INTEREST_ACCOUNT = "INTEREST"
+DAYS_PER_YEAR = 365
+
+
+def accrue(balances, accrued, days, annual_rate):
+    """
+        Daily simple interest over days for every account at once
+        parameters:
+            balances: int64 array, a negative balance earns nothing
+            accrued: float64 array of interest accrued but not yet posted
+            days: int64 array of days to accrue
+            annual_rate: Float, percent per year
+        returns:
+            (posted, accrued) whole units to credit now and the remainder carried to the next run
+    """
+    total = accrued + np.maximum(balances, 0) * days * (annual_rate / 100 / DAYS_PER_YEAR)
+    posted = np.floor(total)
+    return posted.astype(np.int64), total - posted
+
+
+def accrue_interest(as_of, chunk_size=None):
+    """
+        Accrue interest on every Saving account up to as_of and post the whole units
+        Accounts are read in chunks of chunk_size (INTEREST_CHUNK_SIZE) by id
+        into NumPy arrays, the accrual of the chunk is computed in one pass and
+        posted with one insert of credit rows and one executemany update of
+        the balances, in one transaction per chunk. An account accrues for the
+        days since interest_accrued_on on its balance at the time of the run,
+        so a second run for the same day posts nothing. An account never
+        accrued before starts from as_of.
+        parameters:
+            as_of: date
+            chunk_size: Integer, optional
+        returns:
+            (accounts, credits, interest) accrued accounts, credit rows posted
+            and the total amount posted
+    """
+    chunk_size = chunk_size or app1.config['INTEREST_CHUNK_SIZE']
+    annual_rate = app1.config['SAVING_INTEREST_RATE']
+    transaction_type_credit = transaction_type_cache.get_by_name("credit")
+    if not transaction_type_credit:
+        raise TransactionTypeObjectNotFound("Transaction type does not exist")
+    saving = AccountType.query.filter(AccountType.account_type == SAVING_ACCOUNT_TYPE).first()
+    if not saving:
+        return 0, 0, 0
+
+    # a sharded account's balance is the account row plus its shards
+    shards = db.session.query(BalanceShard.bank_account_id,
+                              func.sum(BalanceShard.account_balance).label('account_balance')).group_by(
+        BalanceShard.bank_account_id).subquery()
+    # the balance is incremented, not overwritten, so transfers committed meanwhile are kept
+    bank_account = BankAccount.__table__
+    post_balance = update(bank_account).where(bank_account.c.id == bindparam('bank_account_id')).values(
+        account_balance=bank_account.c.account_balance + bindparam('interest'),
+        accrued_interest=bindparam('carried'),
+        interest_accrued_on=bindparam('accrued_on'))
+
+    accounts = credits = interest = 0
+    last_id = 0
+    while True:
+        rows = db.session.query(BankAccount.id,
+                                BankAccount.account_balance + func.coalesce(shards.c.account_balance, 0),
+                                BankAccount.accrued_interest,
+                                BankAccount.interest_accrued_on).outerjoin(
+            shards, shards.c.bank_account_id == BankAccount.id).filter(
+            BankAccount.is_deleted == 0,
+            BankAccount.id > last_id,
+            BankAccount.account_type_id == saving.id,
+            or_(BankAccount.interest_accrued_on.is_(None), BankAccount.interest_accrued_on < as_of)).order_by(
+            BankAccount.id).limit(chunk_size).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        ids, balances, accrued, accrued_on = zip(*rows)
+        accrued_on = np.array(accrued_on, dtype='datetime64[D]')
+        days = np.where(np.isnat(accrued_on), 0, (np.datetime64(as_of, 'D') - accrued_on).astype(np.int64))
+        posted, carried = accrue(np.array(balances, dtype=np.int64), np.array(accrued, dtype=np.float64),
+                                 days, annual_rate)
+
+        credited = np.flatnonzero(posted)
+        if credited.size:
+            fund_transfer = FundTransfer(from_account=INTEREST_ACCOUNT, to_account=None)
+            db.session.add(fund_transfer)
+            db.session.flush()
+            db.session.bulk_insert_mappings(AccountTransactionDetails, [
+                {"transaction_amount": amount,
+                 "transaction_status": "success",
+                 "bank_account_id": bank_account_id,
+                 "transaction_type_id": transaction_type_credit.id,
+                 "fund_transfer_id": fund_transfer.id,
+                 "fund_transfer_info": "Interest Credit"}
+                for bank_account_id, amount in zip(np.array(ids)[credited].tolist(), posted[credited].tolist())])
+        db.session.execute(post_balance, [
+            {"bank_account_id": bank_account_id, "interest": amount, "carried": carry, "accrued_on": as_of}
+            for bank_account_id, amount, carry in zip(ids, posted.tolist(), carried.tolist())])
+        db.session.commit()
+
+        accounts += len(ids)
+        credits += int(credited.size)
+        interest += int(posted.sum())
+        logger.info("Accrued interest on %s saving account(s), up to id %s", accounts, last_id)
+        if len(rows) < chunk_size:
+            break
+    return accounts, credits, interest
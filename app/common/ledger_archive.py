@@ -0,0 +1,113 @@
+import time
+from sqlalchemy import func, select, union_all
+from sqlalchemy.orm import aliased
+from app import app1, db
+from app.common.log import logger
+from app.models.account import BalanceSnapshot
+from app.models.transaction import AccountTransactionDetails, AccountTransactionDetailsArchive
+
+LEDGER_COLUMNS = [column.name for column in AccountTransactionDetails.__table__.columns]
+
+_ledger_with_archive = None
+
+
+def ledger_model(include_archive):
+    """
+        AccountTransactionDetails, or with include_archive an alias of it over
+        the hot and the archived rows (UNION ALL) that takes the same filters
+        and order_by, which the database pushes into the indexes of both tables
+    """
+    global _ledger_with_archive
+    if not include_archive:
+        return AccountTransactionDetails
+    if _ledger_with_archive is None:
+        rows = union_all(select(*[AccountTransactionDetails.__table__.c[name] for name in LEDGER_COLUMNS]),
+                         select(*[AccountTransactionDetailsArchive.__table__.c[name] for name in LEDGER_COLUMNS]))
+        _ledger_with_archive = aliased(AccountTransactionDetails, rows.subquery('ledger'))
+    return _ledger_with_archive
+
+
+def archive_horizon_statement(bank_account_ids=None):
+    """
+        SELECT of the highest id and transaction_date archived for the bank
+        accounts (every account when None), each read from the end of an index
+    """
+    def newest(column):
+        query = select(func.max(column))
+        if bank_account_ids is not None:
+            query = query.where(AccountTransactionDetailsArchive.bank_account_id.in_(bank_account_ids))
+        return query.scalar_subquery()
+
+    return select(newest(AccountTransactionDetailsArchive.id), newest(AccountTransactionDetailsArchive.transaction_date))
+
+
+def needs_archive(horizon, from_date=None, after=None):
+    """
+        Whether rows from from_date on, or with an id above after, may be archived
+        parameters:
+            horizon: (max id, max transaction_date) of archive_horizon_statement()
+            from_date: datetime, optional
+            after: Integer, optional
+    """
+    max_id, max_date = horizon
+    if max_id is None:
+        return False
+    if from_date is not None and from_date > max_date:
+        return False
+    if after is not None and after >= max_id:
+        return False
+    return True
+
+
+def includes_archive(bank_account_ids=None, from_date=None, after=None):
+    """
+        needs_archive() for the bank accounts (every account when None)
+    """
+    return needs_archive(db.session.execute(archive_horizon_statement(bank_account_ids)).one(), from_date, after)
+
+
+def archive_transactions(before, batch_size=None, pause=None):
+    """
+        Move the ledger rows dated before `before` into AccountTransactionDetailsArchive
+        Only rows already counted by a balance snapshot are moved, so
+        snapshot_balances never reads the archive. Rows move oldest id first,
+        batch_size (ARCHIVE_BATCH_SIZE) per transaction with a pause
+        (ARCHIVE_BATCH_PAUSE seconds) between batches, so transfers are not
+        kept waiting on the locks of one long delete. The row with the highest
+        id always stays: ids are a plain INTEGER PRIMARY KEY, which SQLite
+        (and MySQL before 8 after a restart) would hand out again once the
+        highest one is gone, giving new rows the ids of archived ones.
+        parameters:
+            before: datetime
+            batch_size: Integer, optional
+            pause: Float, optional
+        returns:
+            number of rows moved
+    """
+    batch_size = batch_size or app1.config['ARCHIVE_BATCH_SIZE']
+    pause = app1.config['ARCHIVE_BATCH_PAUSE'] if pause is None else pause
+    snapshot_cutoff = db.session.query(func.max(BalanceSnapshot.last_transaction_id)).scalar() or 0
+    highest_id = db.session.query(func.max(AccountTransactionDetails.id)).scalar() or 0
+    hot = AccountTransactionDetails.__table__
+    moved = 0
+    last_id = 0
+    while True:
+        ids = [row_id for row_id, in db.session.query(AccountTransactionDetails.id).filter(
+            AccountTransactionDetails.id > last_id,
+            AccountTransactionDetails.id <= snapshot_cutoff,
+            AccountTransactionDetails.id < highest_id,
+            AccountTransactionDetails.transaction_date < before).order_by(
+            AccountTransactionDetails.id).limit(batch_size)]
+        if not ids:
+            break
+        db.session.execute(AccountTransactionDetailsArchive.__table__.insert().from_select(
+            LEDGER_COLUMNS, select(*[hot.c[name] for name in LEDGER_COLUMNS]).where(hot.c.id.in_(ids))))
+        db.session.execute(hot.delete().where(hot.c.id.in_(ids)))
+        db.session.commit()
+        moved += len(ids)
+        last_id = ids[-1]
+        logger.info("Archived %s account transaction(s), up to id %s", moved, last_id)
+        if len(ids) < batch_size:
+            break
+        time.sleep(pause)
+    return moved
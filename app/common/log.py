@@ -1,15 +1,69 @@
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from os import environ
+
+# default level per APP_ENV, LOG_LEVEL overrides it
+LOG_LEVELS = {"production": "INFO", "development": "DEBUG", "testing": "WARNING"}
+
+log_level = environ.get('LOG_LEVEL', LOG_LEVELS.get(environ.get('APP_ENV', 'development'), 'DEBUG'))
+log_file = environ.get('LOG_FILE', 'record.log')
+log_max_bytes = int(environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024))
+log_backup_count = int(environ.get('LOG_BACKUP_COUNT', 5))
+log_queue_size = int(environ.get('LOG_QUEUE_SIZE', 10000))
+payload_max_items = int(environ.get('LOG_PAYLOAD_MAX_ITEMS', 3))
+payload_max_chars = int(environ.get('LOG_PAYLOAD_MAX_CHARS', 2000))
+
+
+def summarize(arg):
+    # large result sets are logged as their first few rows and a count
+    if isinstance(arg, (list, tuple)) and len(arg) > payload_max_items:
+        return "{!r} ... ({} items)".format(list(arg[:payload_max_items]), len(arg))
+    return arg
+
+
+class PayloadTruncatingQueueHandler(QueueHandler):
+    """
+        Hands records to the background writer thread
+        The message is built on the request thread from summarized arguments
+        and cut at LOG_PAYLOAD_MAX_CHARS. Records are dropped, not waited
+        for, when the queue is full.
+    """
+    dropped = 0
+
+    def prepare(self, record):
+        if isinstance(record.args, tuple):
+            record.args = tuple(summarize(arg) for arg in record.args)
+        message = record.getMessage()
+        if len(message) > payload_max_chars:
+            message = "{} ... (truncated {} chars)".format(message[:payload_max_chars],
+                                                          len(message) - payload_max_chars)
+        record.msg = message
+        record.args = None
+        return super().prepare(record)
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            PayloadTruncatingQueueHandler.dropped += 1
+
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
+logger.setLevel(log_level)
 
 log_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(threadName)s - %(message)s')
 
-file = logging.FileHandler('record.log')
+file = RotatingFileHandler(log_file, maxBytes=log_max_bytes, backupCount=log_backup_count)
 file.setFormatter(log_format)
 
 console = logging.StreamHandler()
 console.setFormatter(log_format)
 
-logger.addHandler(file)
-logger.addHandler(console)
+log_queue = queue.Queue(log_queue_size)
+logger.addHandler(PayloadTruncatingQueueHandler(log_queue))
+
+listener = QueueListener(log_queue, file, console, respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)
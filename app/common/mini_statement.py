@@ -0,0 +1,102 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from app import app1
+
+# how long rows committed for an account that is not held are kept for a
+# reader that read the ledger table before they committed
+RECORDED_ROWS_SECONDS = 5
+
+
+class MiniStatementStore(object):
+    """
+        Last MINI_STATEMENT_SIZE ledger rows per bank account, newest (highest id) first
+        Write paths add the rows they commit to accounts that are already
+        held, reads fall back to the ledger table for accounts that are not.
+        Rows committed for an account that is not held are kept for a few
+        seconds and merged by id into the next load(), so a reader whose
+        table read raced the commit does not cache a statement without them.
+        At most MINI_STATEMENT_MAX_ACCOUNTS accounts are held (least recently
+        used are dropped) and every account is reloaded after
+        MINI_STATEMENT_TTL seconds to pick up writes made by other workers.
+    """
+    def __init__(self):
+        self.statements = OrderedDict()
+        self.recorded = OrderedDict()
+        self.lock = Lock()
+
+    @staticmethod
+    def newest(rows):
+        """
+            The MINI_STATEMENT_SIZE rows with the highest ids, the first row of an id wins
+        """
+        by_id = {}
+        for row in rows:
+            by_id.setdefault(row['id'], row)
+        return sorted(by_id.values(), key=lambda row: row['id'], reverse=True)[:app1.config['MINI_STATEMENT_SIZE']]
+
+    def get(self, bank_account_id):
+        with self.lock:
+            statement = self.statements.get(bank_account_id)
+            if statement is None:
+                return None
+            rows, loaded_at = statement
+            if time.monotonic() - loaded_at > app1.config['MINI_STATEMENT_TTL']:
+                del self.statements[bank_account_id]
+                return None
+            self.statements.move_to_end(bank_account_id)
+            return list(rows)
+
+    def load(self, bank_account_id, rows):
+        """
+            Hold rows read from the ledger table, merged with rows recorded since
+            returns:
+                the statement as held
+        """
+        with self.lock:
+            now = time.monotonic()
+            merged = list(rows)
+            recorded = self.recorded.pop(bank_account_id, None)
+            if recorded is not None and now - recorded[1] <= RECORDED_ROWS_SECONDS:
+                merged += recorded[0]
+            statement = self.statements.get(bank_account_id)
+            if statement is not None:
+                merged += statement[0]
+            # rows read from the table come first, so they win over older copies
+            merged = self.newest(merged)
+            self.statements[bank_account_id] = (merged, now)
+            self.statements.move_to_end(bank_account_id)
+            while len(self.statements) > app1.config['MINI_STATEMENT_MAX_ACCOUNTS']:
+                self.statements.popitem(last=False)
+            return list(merged)
+
+    def record(self, rows):
+        """
+            Add serialized AccountTransactionDetails rows after they are committed
+        """
+        with self.lock:
+            now = time.monotonic()
+            for row in rows:
+                bank_account_id = row['bank_account_id']
+                statement = self.statements.get(bank_account_id)
+                if statement is not None:
+                    self.statements[bank_account_id] = (self.newest([row] + statement[0]), statement[1])
+                    continue
+                recorded = self.recorded.pop(bank_account_id, None)
+                if recorded is not None and now - recorded[1] <= RECORDED_ROWS_SECONDS:
+                    self.recorded[bank_account_id] = (self.newest([row] + recorded[0]), now)
+                else:
+                    self.recorded[bank_account_id] = ([row], now)
+            # oldest first, so the expired ones are at the front
+            while self.recorded and (len(self.recorded) > app1.config['MINI_STATEMENT_MAX_ACCOUNTS'] or
+                                     now - next(iter(self.recorded.values()))[1] > RECORDED_ROWS_SECONDS):
+                self.recorded.popitem(last=False)
+
+    def invalidate(self, *bank_account_ids):
+        with self.lock:
+            for bank_account_id in bank_account_ids:
+                self.statements.pop(bank_account_id, None)
+                self.recorded.pop(bank_account_id, None)
+
+
+mini_statement_store = MiniStatementStore()
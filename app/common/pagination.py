@@ -0,0 +1,72 @@
+from flask import request
+from sqlalchemy import or_
+from app import app1, db
+
+
+def after_cursor(query, id_column, order_column=None):
+    """
+        Rows after ?after=<id>, ordered by id or, with order_column, by
+        (order_column, id) so that an index on (..., order_column) serves both
+        the filter and the order. The cursor stays the id of the last row, its
+        order_column value is read by primary key.
+        parameters:
+            query: Query
+            id_column: Column
+            order_column: Column, optional
+        returns:
+            Query
+    """
+    after = request.args.get('after', type=int)
+    if order_column is None:
+        if after is not None:
+            query = query.filter(id_column > after)
+        return query.order_by(id_column)
+
+    if after is not None:
+        after_value = db.session.query(order_column).filter(id_column == after).scalar()
+        if after_value is None:
+            query = query.filter(id_column > after)
+        else:
+            query = query.filter(order_column >= after_value, or_(order_column > after_value, id_column > after))
+    return query.order_by(order_column, id_column)
+
+
+def paginate(query, id_column, order_column=None):
+    """
+        Keyset pagination over an integer primary key
+        Reads ?after=<id>&limit=N from the request and returns one page
+        ordered by id (see after_cursor) together with the cursor of the next
+        page, or None on the last page. One extra row is fetched instead of a
+        count().
+        parameters:
+            query: Query
+            id_column: Column
+            order_column: Column, optional
+        returns:
+            (rows, next_cursor)
+    """
+    limit = request.args.get('limit', app1.config['PAGINATION_DEFAULT_LIMIT'], type=int)
+    limit = max(1, min(limit, app1.config['PAGINATION_MAX_LIMIT']))
+
+    rows = after_cursor(query, id_column, order_column).limit(limit + 1).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1].id
+    return rows, None
+
+
+def stream(query, id_column, order_column=None):
+    """
+        Every row after ?after=<id> ordered by id (see after_cursor), fetched
+        in batches of STREAM_BATCH_SIZE through a server-side cursor where the
+        driver supports one
+        parameters:
+            query: Query
+            id_column: Column
+            order_column: Column, optional
+        returns:
+            Query
+    """
+    return after_cursor(query, id_column, order_column).execution_options(stream_results=True).yield_per(
+        app1.config['STREAM_BATCH_SIZE'])
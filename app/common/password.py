@@ -0,0 +1,74 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock
+import bcrypt
+from app import app1
+from app.common.custom_exception import PasswordHashingBusy
+
+
+class PasswordHasher(object):
+    """
+        Runs bcrypt on a small thread pool instead of the request thread
+        bcrypt releases the GIL, so PASSWORD_HASH_WORKERS hashes run in
+        parallel while request threads only wait on the result. At most
+        PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE calls are admitted at once,
+        the rest give up with PasswordHashingBusy after PASSWORD_HASH_TIMEOUT
+        seconds so a login storm cannot tie up every worker thread of the server.
+    """
+    def __init__(self):
+        self.executor = None
+        self.bulk_executor = None
+        self.slots = None
+        self.lock = Lock()
+
+    def start(self):
+        # sized from the config on first use so it can be changed before the app serves
+        with self.lock:
+            if self.executor is None:
+                self.slots = BoundedSemaphore(app1.config['PASSWORD_HASH_WORKERS'] +
+                                              app1.config['PASSWORD_HASH_QUEUE'])
+                self.executor = ThreadPoolExecutor(max_workers=app1.config['PASSWORD_HASH_WORKERS'],
+                                                   thread_name_prefix="bcrypt")
+
+    def submit(self, func, *args):
+        if self.executor is None:
+            self.start()
+        if not self.slots.acquire(timeout=app1.config['PASSWORD_HASH_TIMEOUT']):
+            raise PasswordHashingBusy("Too many login requests, please try again")
+        try:
+            return self.executor.submit(func, *args).result()
+        finally:
+            self.slots.release()
+
+    def hash(self, password):
+        """
+            returns:
+                bcrypt hash of password with BCRYPT_LOG_ROUNDS as String
+        """
+        salt = bcrypt.gensalt(app1.config['BCRYPT_LOG_ROUNDS'])
+        return self.submit(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+    def hash_many(self, passwords):
+        """
+            Hash a bulk upload on its own PASSWORD_HASH_BULK_WORKERS pool so an
+            import does not queue logins behind thousands of hashes
+            returns:
+                list of bcrypt hashes in the order of passwords
+        """
+        with self.lock:
+            if self.bulk_executor is None:
+                self.bulk_executor = ThreadPoolExecutor(max_workers=app1.config['PASSWORD_HASH_BULK_WORKERS'],
+                                                        thread_name_prefix="bcrypt-bulk")
+        rounds = app1.config['BCRYPT_LOG_ROUNDS']
+        return [hashed.decode('utf-8') for hashed in self.bulk_executor.map(
+            lambda password: bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)), passwords)]
+
+    def verify(self, password, hashed):
+        return self.submit(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    @staticmethod
+    def needs_rehash(hashed):
+        # "$2b$12$..." -> 12
+        return int(hashed.split('$')[2]) != app1.config['BCRYPT_LOG_ROUNDS']
+
+
+password_hasher = PasswordHasher()
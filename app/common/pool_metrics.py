@@ -0,0 +1,133 @@
+import time
+from bisect import bisect_left
+from threading import Lock
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import QueuePool
+
+# upper bounds in milliseconds of the checkout wait histogram, the last bucket is open ended
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolStats(object):
+    def __init__(self, name, engine):
+        self.name = name
+        self.engine = engine
+        self.lock = Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.overflow_connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+
+    def record_wait(self, wait_ms, timed_out=False):
+        with self.lock:
+            self.wait_buckets[bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self):
+        # read through the engine, dispose() replaces the pool object
+        pool = self.engine.pool
+        waits = sum(self.wait_buckets)
+        stats = {"pool": self.name,
+                 "class": type(pool).__name__,
+                 "checkouts": self.checkouts,
+                 "checkins": self.checkins,
+                 "connects": self.connects,
+                 "overflow_connects": self.overflow_connects,
+                 "invalidations": self.invalidations,
+                 "timeouts": self.timeouts,
+                 "wait_ms": {"count": waits,
+                             "avg": round(self.wait_total_ms / waits, 3) if waits else 0,
+                             "max": round(self.wait_max_ms, 3),
+                             "histogram": {"le_{}".format(bound): count for bound, count in
+                                           zip(WAIT_BUCKETS_MS + ("inf",), self.wait_buckets)}}}
+        if isinstance(pool, QueuePool):
+            stats.update({"size": pool.size(),
+                          "checked_out": pool.checkedout(),
+                          "checked_in": pool.checkedin(),
+                          "overflow": pool.overflow()})
+        else:
+            stats["checked_out"] = self.checkouts - self.checkins
+        return stats
+
+
+class PoolMetrics(object):
+    """
+        Counters for every engine pool, fed by SQLAlchemy pool events
+        connect, checkout, checkin and invalidate events are counted per
+        engine; a connect while the QueuePool is past pool_size is an
+        overflow. Checkout waits are timed by InstrumentedQueuePool since the
+        pool has no event for the start of a checkout. Listeners are kept when
+        dispose() recreates the pool.
+    """
+    def __init__(self):
+        self.pools = {}
+        self.lock = Lock()
+
+    def register(self, engine, name):
+        stats = PoolStats(name, engine)
+        with self.lock:
+            self.pools[name] = stats
+
+        @event.listens_for(engine.pool, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            pool = engine.pool
+            with stats.lock:
+                stats.connects += 1
+                if isinstance(pool, QueuePool) and pool.overflow() > 0:
+                    stats.overflow_connects += 1
+
+        @event.listens_for(engine.pool, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            with stats.lock:
+                stats.checkouts += 1
+
+        @event.listens_for(engine.pool, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            with stats.lock:
+                stats.checkins += 1
+
+        @event.listens_for(engine.pool, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            with stats.lock:
+                stats.invalidations += 1
+
+    def get(self, pool):
+        with self.lock:
+            pools = list(self.pools.values())
+        for stats in pools:
+            if stats.engine.pool is pool:
+                return stats
+        return None
+
+    def snapshot(self):
+        with self.lock:
+            pools = list(self.pools.values())
+        return [stats.snapshot() for stats in pools]
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited for a connection"""
+    def _do_get(self):
+        stats = pool_metrics.get(self)
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except TimeoutError:
+            if stats:
+                stats.record_wait((time.perf_counter() - start) * 1000, timed_out=True)
+            raise
+        if stats:
+            stats.record_wait((time.perf_counter() - start) * 1000)
+        return connection
+
+
+pool_metrics = PoolMetrics()
@@ -0,0 +1,92 @@
+import re
+from sqlalchemy import desc
+from app import db
+from app.common.ledger_archive import ledger_model, archive_horizon_statement
+from app.common.statement_export import export_query
+from app.models.account import BalanceSnapshot, BankAccount
+from app.models.idempotencykey import IdempotencyKey
+from app.models.tokenblocklist import TokenBlockList
+from app.models.transaction import AccountTransactionDetails, FundTransfer
+from app.models.user import User
+
+# SQLite reports a full table scan as "SCAN <table>" ("SCAN TABLE <table>"
+# before 3.36) and a sort that no index provides as "USE TEMP B-TREE"
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?\S+( AS \S+)?$|USE TEMP B-TREE')
+
+
+def hot_queries():
+    """
+        Queries issued by app/views/*.py on every request of the busiest endpoints
+        returns:
+            dict of name: Query or Select
+    """
+    ledger = ledger_model(True)
+    return {
+        "mini statement": AccountTransactionDetails.query.filter(
+            AccountTransactionDetails.bank_account_id == 1).order_by(
+            desc(AccountTransactionDetails.id)).limit(10),
+        "transactions by bank account": AccountTransactionDetails.query.filter(
+            AccountTransactionDetails.bank_account_id == 1, AccountTransactionDetails.id > 0).order_by(
+            AccountTransactionDetails.id).limit(101),
+        "transactions by bank account and date": AccountTransactionDetails.query.filter(
+            AccountTransactionDetails.bank_account_id == 1,
+            AccountTransactionDetails.transaction_date >= "2021-01-01",
+            AccountTransactionDetails.transaction_date <= "2021-01-31 23:59:59",
+            AccountTransactionDetails.transaction_type_id == 1).order_by(
+            AccountTransactionDetails.transaction_date, AccountTransactionDetails.id).limit(101),
+        "transactions list": AccountTransactionDetails.query.filter(
+            AccountTransactionDetails.id > 0).order_by(AccountTransactionDetails.id).limit(101),
+        "bank accounts by account number": BankAccount.query.filter(
+            BankAccount.account_number.in_(["00100001", "00100002"])),
+        "bank account by id": BankAccount.query.filter(BankAccount.id == 1, BankAccount.is_deleted == 0),
+        "bank account list": BankAccount.query.filter(BankAccount.is_deleted == 0, BankAccount.id > 0).order_by(
+            BankAccount.id).limit(101),
+        "user by email id": User.query.filter(User.email_id == "user@bank.com"),
+        "user by mobile number": User.query.filter(User.mobile_number == "9000000000"),
+        "user list": User.query.filter(User.is_deleted == 0, User.id > 0).order_by(User.id).limit(101),
+        "fund transfer list": FundTransfer.query.filter(FundTransfer.id > 0).order_by(FundTransfer.id).limit(101),
+        "fund transfers from account": FundTransfer.query.filter(FundTransfer.from_account == "00100001"),
+        "fund transfers to account": FundTransfer.query.filter(FundTransfer.to_account == "00100001"),
+        "nearest balance snapshot": BalanceSnapshot.query.filter(
+            BalanceSnapshot.bank_account_id == 1, BalanceSnapshot.snapshot_at <= "2021-01-01").order_by(
+            desc(BalanceSnapshot.snapshot_at)).limit(1),
+        "token blocklist by jti": db.session.query(TokenBlockList.id).filter(TokenBlockList.jti == "jti"),
+        "token blocklist refresh": db.session.query(TokenBlockList.jti, TokenBlockList.created_at).filter(
+            TokenBlockList.created_at > "2021-01-01"),
+        "transaction export": export_query([1, 2], "2021-01-01", "2021-02-01"),
+        "transaction export without dates": export_query([1, 2]),
+        "transaction export with archive": export_query([1, 2], "2021-01-01", "2021-02-01", include_archive=True),
+        "archive horizon": archive_horizon_statement([1]),
+        "mini statement with archive": db.session.query(ledger).filter(ledger.bank_account_id == 1).order_by(
+            desc(ledger.id)).limit(10),
+        "transactions by bank account with archive": db.session.query(ledger).filter(
+            ledger.bank_account_id == 1, ledger.id > 0).order_by(ledger.id).limit(101),
+        "transactions by bank account and date with archive": db.session.query(ledger).filter(
+            ledger.bank_account_id == 1,
+            ledger.transaction_date >= "2020-01-01",
+            ledger.transaction_date <= "2020-01-31 23:59:59").order_by(ledger.transaction_date, ledger.id).limit(101),
+        "idempotency key": IdempotencyKey.query.filter(IdempotencyKey.email_id == "user@bank.com",
+                                                       IdempotencyKey.request_path == "/fundtransfer",
+                                                       IdempotencyKey.idempotency_key == "key"),
+    }
+
+
+def explain(query):
+    sql = getattr(query, 'statement', query).compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True})
+    return [row[-1] for row in db.session.execute("EXPLAIN QUERY PLAN {}".format(sql))]
+
+
+def check_query_plans():
+    """
+        Run EXPLAIN QUERY PLAN (SQLite) for every hot query
+        returns:
+            (plans, failures) where failures lists the names of the queries
+            that scan a whole table or sort without an index
+    """
+    plans = {}
+    failures = []
+    for name, query in hot_queries().items():
+        plans[name] = explain(query)
+        if any(FULL_SCAN.search(step) for step in plans[name]):
+            failures.append(name)
+    return plans, failures
@@ -0,0 +1,116 @@
+import time
+from collections import namedtuple
+from threading import RLock
+from app import app1, db
+from app.common.async_db import run_sync
+from app.common.replica import using_primary
+from app.models.account import AccountType, BranchDetails
+from app.models.transaction import TransactionType
+from app.models.user import UserType
+
+
+class ReferenceDataCache(object):
+    """
+        In-process copy of a small lookup table served by id or by name
+        Rows are kept as read-only records so they can be shared across
+        requests without being bound to a session. The table is reloaded
+        after invalidate(), when REFERENCE_CACHE_TTL expires or when a key
+        is not found in memory, at most once per REFERENCE_CACHE_MISS_INTERVAL
+        seconds so requests with unknown keys cannot reload it on every call.
+    """
+    def __init__(self, model, name_column):
+        self.model = model
+        self.name_column = name_column
+        self.columns = model.__table__.columns.keys()
+        self.record = namedtuple("{}Record".format(model.__name__), self.columns)
+        self.lock = RLock()
+        self.by_id = None
+        self.by_name = None
+        self.loaded_at = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    def load(self):
+        with using_primary():
+            rows = db.session.query(*[getattr(self.model, column) for column in self.columns]).all()
+        by_id = {}
+        by_name = {}
+        for row in sorted(rows, key=lambda row: row.id):
+            record = self.record(*row)
+            by_id[record.id] = record
+            by_name.setdefault(getattr(record, self.name_column).lower(), record)
+        with self.lock:
+            self.by_id = by_id
+            self.by_name = by_name
+            self.loaded_at = time.monotonic()
+            self.loads += 1
+
+    def invalidate(self):
+        with self.lock:
+            self.by_id = None
+            self.by_name = None
+
+    def is_stale(self):
+        return self.by_id is None or time.monotonic() - self.loaded_at > app1.config['REFERENCE_CACHE_TTL']
+
+    def lookup(self, index, key):
+        with self.lock:
+            if not self.is_stale():
+                record = getattr(self, index).get(key)
+                if record is not None:
+                    self.hits += 1
+                    return record
+                # a miss right after a load is not found in the table either
+                if time.monotonic() - self.loaded_at < app1.config['REFERENCE_CACHE_MISS_INTERVAL']:
+                    self.misses += 1
+                    return None
+            self.misses += 1
+            self.load()
+            return getattr(self, index).get(key)
+
+    def peek(self, index, key):
+        """
+            The record when it is in memory and fresh, None instead of reading
+            the table, for callers that must not block (the asyncio server)
+        """
+        records = getattr(self, index)
+        if records is None or self.is_stale():
+            return None
+        record = records.get(key)
+        if record is not None:
+            self.hits += 1
+        return record
+
+    def get(self, record_id):
+        return self.lookup('by_id', record_id)
+
+    def get_by_name(self, name):
+        return self.lookup('by_name', name.lower())
+
+    async def get_by_name_async(self, name):
+        """
+            get_by_name() that reloads the table on a worker thread, not on the event loop
+        """
+        return self.peek('by_name', name.lower()) or await run_sync(self.get_by_name, name)
+
+    def stats(self):
+        return {"table": self.model.__tablename__,
+                "rows": len(self.by_id) if self.by_id is not None else 0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "loads": self.loads}
+
+
+transaction_type_cache = ReferenceDataCache(TransactionType, 'transaction_type')
+account_type_cache = ReferenceDataCache(AccountType, 'account_type')
+user_type_cache = ReferenceDataCache(UserType, 'user_type')
+branch_details_cache = ReferenceDataCache(BranchDetails, 'branch_name')
+
+reference_caches = [transaction_type_cache, account_type_cache, user_type_cache, branch_details_cache]
+
+
+@app1.before_first_request
+def load_reference_data():
+    for cache in reference_caches:
+        cache.load()
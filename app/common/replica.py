@@ -0,0 +1,104 @@
+import random
+import time
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import create_engine, orm
+from sqlalchemy.pool import QueuePool
+from app.common.pool_metrics import InstrumentedQueuePool, pool_metrics
+
+REPLICA_BIND_PREFIX = "replica"
+PRIMARY_COOKIE = "read_primary_until"
+READ_METHODS = ("GET", "HEAD")
+# engine options only a QueuePool accepts
+QUEUE_POOL_OPTIONS = ("pool_size", "max_overflow", "pool_timeout")
+
+
+def replica_binds(replica_urls):
+    """
+        SQLALCHEMY_BINDS entries for a comma separated list of replica URLs
+        returns:
+            dict of bind name: URL
+    """
+    urls = [url.strip() for url in (replica_urls or "").split(",") if url.strip()]
+    return {"{}{}".format(REPLICA_BIND_PREFIX, index): url for index, url in enumerate(urls)}
+
+
+class RoutingSession(SignallingSession):
+    """
+        Sends the statements of a read request to the replica chosen for it
+        Anything flushed goes to the primary whatever the request is.
+    """
+    def __init__(self, db, **options):
+        self.db = db
+        super().__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None):
+        if has_request_context() and not self._flushing:
+            read_bind = g.get('read_bind')
+            if read_bind:
+                return self.db.get_engine(self.app, bind=read_bind)
+        return super().get_bind(mapper, clause)
+
+
+@contextmanager
+def using_primary():
+    """
+        Send the reads inside to the primary whatever the request is
+        For reads that fill the process-wide caches, which then answer every
+        client, including the ones kept on the primary to read their writes.
+    """
+    if not has_request_context():
+        yield
+        return
+    read_bind = g.get('read_bind')
+    g.read_bind = None
+    try:
+        yield
+    finally:
+        g.read_bind = read_bind
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """
+        SQLAlchemy that routes GET and HEAD requests to a replica bind
+        A client that has just written is kept on the primary for
+        REPLICA_STICKY_SECONDS through a cookie so it reads its own writes.
+    """
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def create_engine(self, sa_url, engine_opts):
+        # SQLite files get a NullPool from Flask-SQLAlchemy, which takes no
+        # sizing options; every other engine gets an instrumented QueuePool
+        poolclass = engine_opts.setdefault('poolclass', InstrumentedQueuePool)
+        if not issubclass(poolclass, QueuePool):
+            engine_opts = {key: value for key, value in engine_opts.items() if key not in QUEUE_POOL_OPTIONS}
+        engine = create_engine(sa_url, **engine_opts)
+        pool_metrics.register(engine, repr(engine.url))
+        return engine
+
+    def init_app(self, app):
+        super().init_app(app)
+        app.before_request(self.choose_read_bind)
+        app.after_request(self.stick_to_primary)
+
+    @staticmethod
+    def choose_read_bind():
+        g.read_bind = None
+        binds = [bind for bind in current_app.config.get('SQLALCHEMY_BINDS') or {}
+                 if bind.startswith(REPLICA_BIND_PREFIX)]
+        if not binds or request.method not in READ_METHODS:
+            return
+        if request.cookies.get(PRIMARY_COOKIE, 0, type=float) > time.time():
+            return
+        g.read_bind = random.choice(binds)
+
+    @staticmethod
+    def stick_to_primary(response):
+        sticky_seconds = current_app.config['REPLICA_STICKY_SECONDS']
+        if request.method not in READ_METHODS and response.status_code < 400 and sticky_seconds \
+                and current_app.config.get('SQLALCHEMY_BINDS'):
+            response.set_cookie(PRIMARY_COOKIE, str(time.time() + sticky_seconds), max_age=sticky_seconds,
+                                httponly=True)
+        return response
@@ -0,0 +1,60 @@
+from datetime import datetime, time
+from flask import request
+from marshmallow import ValidationError
+from app.common.custom_exception import RequestDataInvalid
+
+
+def load_request(schema, required=()):
+    """
+        Deserialize and validate the JSON body in one pass
+        Every field is optional (a PUT sends only what changes) except the
+        ones named in required, which a POST needs to create the row. All
+        missing and invalid fields are reported together.
+        parameters:
+            schema: Schema
+            required: tuple of field names
+        returns:
+            dict of typed, validated values
+        raises:
+            RequestDataInvalid with marshmallow's {field: [messages]} as message
+    """
+    return load_data(schema, request.get_json(silent=True), required)
+
+
+def load_data(schema, data, required=()):
+    """
+        load_request() for data that did not come from the request body,
+        e.g. one row of a bulk upload
+    """
+    try:
+        loaded = schema.load(data, partial=True)
+        errors = {}
+    except ValidationError as err:
+        loaded, errors = err.valid_data, err.messages
+
+    if isinstance(data, dict):
+        for field_name in required:
+            if field_name not in data:
+                errors.setdefault(field_name, [schema.fields[field_name].error_messages['required']])
+
+    if errors:
+        raise RequestDataInvalid(errors)
+    return loaded
+
+
+def parse_transaction_date(value, name, end_of_day=False):
+    """
+        ISO date or date time, a date means the start of that day or with
+        end_of_day the end of it, so a date range includes both days
+        returns:
+            datetime, or None for an empty value
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise RequestDataInvalid({name: ["Invalid date, expected YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS."]})
+    if end_of_day and len(value) == 10:
+        parsed = datetime.combine(parsed.date(), time.max)
+    return parsed
@@ -1,19 +1,40 @@
 from flask_restful import Resource
-from flask import jsonify, make_response
+from flask import jsonify, make_response, json, request, Response, stream_with_context
+
+NOT_PAGINATED = object()
+
+# rows encoded per chunk written to the client
+STREAM_CHUNK_ROWS = 100
+
+
+def requested_stream_format():
+    """
+        'ndjson' for ?format=ndjson or an Accept: application/x-ndjson header,
+        'json' for ?format=stream, None for a regular response
+    """
+    requested = request.args.get('format')
+    if requested == 'ndjson' or 'application/x-ndjson' in request.headers.get('Accept', ''):
+        return 'ndjson'
+    if requested == 'stream':
+        return 'json'
+    return None
 
 
 class ResponseGenerator(Resource):
-    def __init__(self, data, message, success, status):
+    def __init__(self, data, message, success, status, next_cursor=NOT_PAGINATED):
         self.data = data
         self.message = message
         self.success = success
         self.status = status
+        self.next_cursor = next_cursor
 
     def success_response(self):
         response = {"data": self.data,
                     "message": self.message,
                     "success": self.success,
                     "status": self.status}
+        if self.next_cursor is not NOT_PAGINATED:
+            response["next_cursor"] = self.next_cursor
         return make_response(jsonify(response), self.status)
 
     def error_response(self):
@@ -22,3 +43,60 @@ class ResponseGenerator(Resource):
                     "success": self.success,
                     "status": self.status}
         return make_response(jsonify(response), self.status)
+
+    def asgi_response(self):
+        """
+            The same body as success_response()/error_response() for a view of the asyncio server
+        """
+        # imported here, the Flask app and the db.py commands run without starlette
+        from starlette.responses import JSONResponse
+        response = {"data": self.data,
+                    "message": self.message,
+                    "success": self.success,
+                    "status": int(self.status)}
+        if self.next_cursor is not NOT_PAGINATED:
+            response["next_cursor"] = self.next_cursor
+        return JSONResponse(response, status_code=int(self.status))
+
+    def encoded_rows(self, schema):
+        chunk = []
+        for row in self.data:
+            chunk.append(json.dumps(schema.dump(row)))
+            if len(chunk) == STREAM_CHUNK_ROWS:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def stream_response(self, schema, stream_format='json'):
+        """
+            Encode self.data (an iterable of rows, e.g. a yield_per query)
+            incrementally with schema instead of building the whole response
+            'json' keeps the data/message/success/status envelope,
+            'ndjson' writes one row per line for bulk consumers
+        """
+        if stream_format == 'ndjson':
+            def generate():
+                for chunk in self.encoded_rows(schema):
+                    yield "\n".join(chunk) + "\n"
+
+            return Response(stream_with_context(generate()), status=self.status, mimetype='application/x-ndjson')
+
+        def generate():
+            yield '{"data": ['
+            separator = ""
+            for chunk in self.encoded_rows(schema):
+                yield separator + ",".join(chunk)
+                separator = ","
+            yield '], "message": {}, "status": {}, "success": {}}}\n'.format(
+                json.dumps(self.message), int(self.status), json.dumps(self.success))
+
+        return Response(stream_with_context(generate()), status=self.status, mimetype='application/json')
+
+    def csv_response(self, filename):
+        """
+            Stream self.data (an iterable of CSV text chunks) as a file download
+        """
+        response = Response(stream_with_context(self.data), status=self.status, mimetype='text/csv')
+        response.headers['Content-Disposition'] = 'attachment; filename="{}"'.format(filename)
+        return response
@@ -0,0 +1,224 @@
+import random
+import time
+from collections import namedtuple
+from threading import Lock
+from datetime import timedelta
+from sqlalchemy import case, func, select
+from app import app1, db
+from app.common.async_db import run_sync
+from app.common.replica import using_primary
+from app.models.account import BalanceShard, BankAccount
+
+ShardedAccount = namedtuple("ShardedAccount", ["bank_account_id", "shards"])
+
+
+class ShardedAccountRegistry(object):
+    """
+        Account numbers that have BalanceShard rows, reloaded every REFERENCE_CACHE_TTL seconds
+        The balance of a sharded account is BankAccount.account_balance plus
+        the sum of its shards. Credits go to one random shard so concurrent
+        credits lock different rows; debits fold every shard back into the
+        account row first. A worker that has not yet seen an account become
+        sharded credits the account row directly, which keeps the sum right.
+        shards counts the active shards only, an account whose shards are all
+        retired is kept with 0 so that debits still fold them.
+    """
+    def __init__(self):
+        self.accounts = None
+        self.loaded_at = 0
+        self.lock = Lock()
+
+    def load(self):
+        with using_primary():
+            rows = db.session.query(BankAccount.account_number, BankAccount.id,
+                                    func.sum(case([(BalanceShard.retired_at.is_(None), 1)], else_=0))).join(
+                BalanceShard, BalanceShard.bank_account_id == BankAccount.id).group_by(
+                BankAccount.account_number, BankAccount.id).all()
+        accounts = {account_number: ShardedAccount(bank_account_id, int(shards))
+                    for account_number, bank_account_id, shards in rows}
+        with self.lock:
+            self.accounts = accounts
+            self.loaded_at = time.monotonic()
+
+    def is_stale(self):
+        return self.accounts is None or time.monotonic() - self.loaded_at > app1.config['REFERENCE_CACHE_TTL']
+
+    def get(self, account_number):
+        if self.is_stale():
+            self.load()
+        return self.accounts.get(account_number)
+
+    def bank_account_ids(self):
+        if self.is_stale():
+            self.load()
+        return set(account.bank_account_id for account in self.accounts.values())
+
+    async def accounts_async(self):
+        """
+            The account number: ShardedAccount map, reloaded on a worker thread
+            instead of the event loop when stale
+        """
+        accounts = None if self.is_stale() else self.accounts
+        if accounts is None:
+            await run_sync(self.load)
+            accounts = self.accounts
+        return accounts
+
+    def invalidate(self):
+        with self.lock:
+            self.accounts = None
+
+
+def credit_account_statement(bank_account_id, transaction_amount):
+    bank_account = BankAccount.__table__
+    return bank_account.update().where(bank_account.c.id == bank_account_id).values(
+        account_balance=bank_account.c.account_balance + transaction_amount)
+
+
+def credit_shard_statement(sharded_account, transaction_amount):
+    shard = BalanceShard.__table__
+    return shard.update().where(
+        shard.c.bank_account_id == sharded_account.bank_account_id).where(
+        shard.c.shard == random.randrange(sharded_account.shards)).values(
+        account_balance=shard.c.account_balance + transaction_amount)
+
+
+def fold_shards_statements(bank_account_id):
+    shard = BalanceShard.__table__
+    lock = select(shard.c.account_balance).where(
+        shard.c.bank_account_id == bank_account_id).order_by(shard.c.shard).with_for_update()
+    empty = shard.update().where(shard.c.bank_account_id == bank_account_id).values(account_balance=0)
+    return lock, empty
+
+
+def credit_shard(sharded_account, transaction_amount):
+    """
+        Add transaction_amount to one shard, locking only that shard row
+        The account row is credited instead when sharding is turned off, or
+        when the shard was dropped after the registry was loaded and the
+        update matches no row.
+    """
+    if not sharded_account.shards or \
+            db.session.execute(credit_shard_statement(sharded_account, transaction_amount)).rowcount != 1:
+        db.session.execute(credit_account_statement(sharded_account.bank_account_id, transaction_amount))
+
+
+def fold_shards(bank_account_id):
+    """
+        Lock the shards of an account and empty them
+        The caller must hold the BankAccount row lock and add the returned
+        amount to BankAccount.account_balance in the same transaction.
+        returns:
+            sum of the shard balances
+    """
+    lock, empty = fold_shards_statements(bank_account_id)
+    total = sum(balance for balance, in db.session.execute(lock))
+    if total:
+        db.session.execute(empty)
+    return total
+
+
+async def credit_shard_async(session, sharded_account, transaction_amount):
+    """
+        credit_shard() on an AsyncSession
+    """
+    if not sharded_account.shards or \
+            (await session.execute(credit_shard_statement(sharded_account, transaction_amount))).rowcount != 1:
+        await session.execute(credit_account_statement(sharded_account.bank_account_id, transaction_amount))
+
+
+async def fold_shards_async(session, bank_account_id):
+    """
+        fold_shards() on an AsyncSession
+    """
+    lock, empty = fold_shards_statements(bank_account_id)
+    total = sum(balance for balance, in await session.execute(lock))
+    if total:
+        await session.execute(empty)
+    return total
+
+
+def shard_balances(bank_account_ids):
+    """
+        returns:
+            dict of bank_account_id: sum of its shard balances, for the sharded ones
+    """
+    return dict(db.session.execute(shard_balances_statement(bank_account_ids)).all())
+
+
+def shard_balances_statement(bank_account_ids):
+    return select(BalanceShard.bank_account_id, func.sum(BalanceShard.account_balance)).where(
+        BalanceShard.bank_account_id.in_(bank_account_ids)).group_by(BalanceShard.bank_account_id)
+
+
+def add_shard_balances(results):
+    """
+        Add the unfolded shard balances to dumped BankAccountSchema rows
+    """
+    sharded = sharded_accounts.bank_account_ids()
+    bank_account_ids = [result['id'] for result in results if result['id'] in sharded]
+    if bank_account_ids:
+        balances = shard_balances(bank_account_ids)
+        for result in results:
+            result['account_balance'] += int(balances.get(result['id']) or 0)
+    return results
+
+
+def set_balance_shards(account_number, shards):
+    """
+        Fold the current shards of an account into BankAccount.account_balance
+        and give it `shards` empty shards, 0 turns sharding off
+        Shards beyond the new count are emptied and retired, not deleted,
+        because other workers credit them until their registry is reloaded;
+        fold_all_shards drops them once REFERENCE_CACHE_TTL has passed.
+        returns:
+            BankAccount or None when the account number does not exist
+    """
+    try:
+        bank_account = BankAccount.query.filter(BankAccount.account_number == account_number).with_for_update().first()
+        if not bank_account:
+            return None
+        bank_account.account_balance += fold_shards(bank_account.id)
+        current = {balance_shard.shard: balance_shard for balance_shard in
+                   BalanceShard.query.filter(BalanceShard.bank_account_id == bank_account.id)}
+        for shard, balance_shard in current.items():
+            if shard < shards:
+                balance_shard.retired_at = None
+            elif balance_shard.retired_at is None:
+                balance_shard.retired_at = func.now()
+        db.session.add_all([BalanceShard(bank_account_id=bank_account.id, shard=shard, account_balance=0)
+                            for shard in range(shards) if shard not in current])
+        db.session.commit()
+        sharded_accounts.invalidate()
+        return bank_account
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def fold_all_shards():
+    """
+        Fold every sharded account, one short transaction per account
+        Shards retired more than REFERENCE_CACHE_TTL seconds ago, when no
+        registry can still point at them, are dropped after the fold.
+        returns:
+            number of accounts folded
+    """
+    bank_account_ids = [bank_account_id for bank_account_id, in
+                        db.session.query(BalanceShard.bank_account_id).distinct()]
+    for bank_account_id in bank_account_ids:
+        try:
+            bank_account = BankAccount.query.filter(BankAccount.id == bank_account_id).with_for_update().one()
+            bank_account.account_balance += fold_shards(bank_account_id)
+            retired_before = db.session.query(func.now()).scalar() - timedelta(
+                seconds=app1.config['REFERENCE_CACHE_TTL'])
+            BalanceShard.query.filter(BalanceShard.bank_account_id == bank_account_id,
+                                      BalanceShard.retired_at < retired_before).delete(synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    return len(bank_account_ids)
+
+
+sharded_accounts = ShardedAccountRegistry()
@@ -0,0 +1,96 @@
+import csv
+import io
+from app import app1, db
+from app.common.custom_exception import BankAccountObjectNotFound, RequestDataInvalid
+from app.common.ledger_archive import ledger_model, includes_archive
+from app.models.account import BankAccount
+from app.models.transaction import TransactionType
+
+EXPORT_COLUMNS = ("id", "bank_account_id", "transaction_date", "transaction_type", "transaction_amount",
+                  "transaction_status", "fund_transfer_id", "fund_transfer_info")
+
+# rows encoded per chunk written to the client or file
+EXPORT_CHUNK_ROWS = 1000
+
+
+def parse_bank_account_ids(value):
+    """
+        "1,2,3" -> [1, 2, 3], at most EXPORT_MAX_ACCOUNTS ids
+    """
+    parts = [part.strip() for part in (value or "").split(",") if part.strip()]
+    if not parts or not all(part.isdigit() for part in parts):
+        raise RequestDataInvalid({"bank_account_id": ["Expected one or more comma separated bank account ids."]})
+    if len(parts) > app1.config['EXPORT_MAX_ACCOUNTS']:
+        raise RequestDataInvalid({"bank_account_id": ["At most {} bank accounts per export.".format(
+            app1.config['EXPORT_MAX_ACCOUNTS'])]})
+    return sorted(set(int(part) for part in parts))
+
+
+def export_query(bank_account_ids, date_from=None, date_to=None, include_archive=False):
+    """
+        Ledger rows of the bank accounts with from <= transaction_date <= to,
+        ordered by account, transaction date and id, as tuples of EXPORT_COLUMNS
+        parameters:
+            bank_account_ids: list of Integer
+            date_from: datetime, optional
+            date_to: datetime, optional
+            include_archive: Boolean, read the archived rows as well
+        returns:
+            Query
+    """
+    ledger = ledger_model(include_archive)
+    query = db.session.query(ledger.id,
+                             ledger.bank_account_id,
+                             ledger.transaction_date,
+                             TransactionType.transaction_type,
+                             ledger.transaction_amount,
+                             ledger.transaction_status,
+                             ledger.fund_transfer_id,
+                             ledger.fund_transfer_info).join(
+        TransactionType, TransactionType.id == ledger.transaction_type_id).filter(
+        ledger.bank_account_id.in_(bank_account_ids))
+    if date_from is not None:
+        query = query.filter(ledger.transaction_date >= date_from)
+    if date_to is not None:
+        query = query.filter(ledger.transaction_date <= date_to)
+    return query.order_by(ledger.bank_account_id, ledger.transaction_date, ledger.id)
+
+
+def export_rows(bank_account_ids, date_from=None, date_to=None):
+    """
+        export_query() for bank accounts that are checked up front
+        The rows are fetched in batches of STREAM_BATCH_SIZE through a
+        server-side cursor where the driver supports one and are not kept by
+        the session, so memory stays flat whatever the number of rows.
+        returns:
+            Query
+    """
+    existing = {bank_account_id for bank_account_id, in db.session.query(BankAccount.id).filter(
+        BankAccount.id.in_(bank_account_ids))}
+    missing = [bank_account_id for bank_account_id in bank_account_ids if bank_account_id not in existing]
+    if missing:
+        raise BankAccountObjectNotFound("Bank account {} does not exist".format(
+            ", ".join(str(bank_account_id) for bank_account_id in missing)))
+
+    include_archive = includes_archive(bank_account_ids, date_from)
+    return export_query(bank_account_ids, date_from, date_to, include_archive).execution_options(
+        stream_results=True).yield_per(app1.config['STREAM_BATCH_SIZE'])
+
+
+def csv_chunks(rows):
+    """
+        rows as CSV text, a header line first and EXPORT_CHUNK_ROWS rows per chunk
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count == EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    yield buffer.getvalue()
@@ -0,0 +1,101 @@
+import time
+from datetime import datetime, timedelta
+from threading import Lock
+from app import app1, db, ACCESS_EXPIRES
+from app.common.async_db import run_sync
+from app.common.replica import using_primary
+from app.models.tokenblocklist import TokenBlockList
+
+
+
+class RevocationStore(object):
+    """
+        Answers "is this jti revoked" from memory
+        Every jti is kept until the token it belongs to can no longer be
+        used (created_at + ACCESS_EXPIRES). New TokenBlockList rows written by
+        other workers are picked up at most every TOKEN_BLOCKLIST_REFRESH_INTERVAL
+        seconds by created_at. created_at is set before the row commits, so
+        every refresh reads TOKEN_BLOCKLIST_REFRESH_WINDOW seconds back from
+        the previous one, and the whole table is reloaded every
+        TOKEN_BLOCKLIST_FULL_RELOAD seconds for rows that commit even later.
+    """
+    def __init__(self):
+        self.revoked = {}
+        self.read_until = None
+        self.refreshed_at = None
+        self.reloaded_at = None
+        self.lock = Lock()
+
+    def remember(self, jti, created_at):
+        self.revoked[jti] = created_at.replace(tzinfo=None) + ACCESS_EXPIRES
+
+    def evict_expired(self, now):
+        for jti in [jti for jti, expires_at in list(self.revoked.items()) if expires_at <= now]:
+            del self.revoked[jti]
+
+    def refresh(self):
+        # only one thread reads the table, the others answer from memory
+        # unless nothing has been loaded yet
+        if not self.lock.acquire(blocking=self.refreshed_at is None):
+            return
+        try:
+            now = datetime.utcnow()
+            full_reload = self.reloaded_at is None or \
+                time.monotonic() - self.reloaded_at > app1.config['TOKEN_BLOCKLIST_FULL_RELOAD']
+            if full_reload:
+                since = now - ACCESS_EXPIRES
+            else:
+                since = self.read_until - timedelta(seconds=app1.config['TOKEN_BLOCKLIST_REFRESH_WINDOW'])
+            with using_primary():
+                rows = db.session.query(TokenBlockList.jti, TokenBlockList.created_at).filter(
+                    TokenBlockList.created_at > since).all()
+            # a revocation is never withdrawn, so rows are only ever added
+            for jti, created_at in rows:
+                self.remember(jti, created_at)
+            if full_reload:
+                self.reloaded_at = time.monotonic()
+            self.evict_expired(now)
+            self.read_until = now
+            self.refreshed_at = time.monotonic()
+        finally:
+            self.lock.release()
+
+    def is_stale(self):
+        return self.refreshed_at is None or \
+            time.monotonic() - self.refreshed_at > app1.config['TOKEN_BLOCKLIST_REFRESH_INTERVAL']
+
+    def is_revoked(self, jti):
+        if self.is_stale():
+            self.refresh()
+        return self.is_listed(jti)
+
+    async def is_revoked_async(self, jti):
+        # the table is read on a worker thread, not on the event loop
+        if self.is_stale():
+            await run_sync(self.refresh)
+        return self.is_listed(jti)
+
+    def is_listed(self, jti):
+        expires_at = self.revoked.get(jti)
+        return expires_at is not None and expires_at > datetime.utcnow()
+
+    def revoke(self, jti):
+        now = datetime.utcnow()
+        db.session.add(TokenBlockList(jti=jti, created_at=now))
+        db.session.commit()
+        self.remember(jti, now)
+
+
+def purge_expired_tokens():
+    """
+        Delete TokenBlockList rows whose tokens have already expired
+        returns:
+            number of deleted rows
+    """
+    deleted = TokenBlockList.query.filter(
+        TokenBlockList.created_at < datetime.utcnow() - ACCESS_EXPIRES).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+revocation_store = RevocationStore()
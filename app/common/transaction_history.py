@@ -0,0 +1,57 @@
+from app.common.custom_exception import RequestDataInvalid
+from app.common.request_parser import load_data, parse_transaction_date
+from app.models.transaction import AccountTransactionDetails
+from app.schemas.transaction import transaction_history_filter_schema
+
+
+def history_filters(args):
+    """
+        Filters of a transaction history from the query string: from_date,
+        to_date (a date includes the whole day), transaction_type_id,
+        transaction_status, min_amount and max_amount
+        parameters:
+            args: request.args
+        returns:
+            dict of the given filters
+        raises:
+            RequestDataInvalid with every invalid parameter
+    """
+    errors = {}
+    try:
+        filters = load_data(transaction_history_filter_schema, args.to_dict())
+    except RequestDataInvalid as err:
+        filters, errors = {}, dict(err.message)
+    for name, end_of_day in (("from_date", False), ("to_date", True)):
+        try:
+            filters[name] = parse_transaction_date(args.get(name), name, end_of_day)
+        except RequestDataInvalid as err:
+            errors.update(err.message)
+    if errors:
+        raise RequestDataInvalid(errors)
+    return filters
+
+
+def filter_history(query, filters, ledger=AccountTransactionDetails):
+    """
+        Apply history_filters() to a query of ledger (ledger_model())
+        returns:
+            (query, order_column) where order_column is transaction_date when a
+            date range is given, so that the page is read in order from the
+            (bank_account_id, transaction_date) index, otherwise None (id order)
+    """
+    if filters.get('from_date') is not None:
+        query = query.filter(ledger.transaction_date >= filters['from_date'])
+    if filters.get('to_date') is not None:
+        query = query.filter(ledger.transaction_date <= filters['to_date'])
+    if filters.get('transaction_type_id') is not None:
+        query = query.filter(ledger.transaction_type_id == filters['transaction_type_id'])
+    if filters.get('transaction_status') is not None:
+        query = query.filter(ledger.transaction_status == filters['transaction_status'])
+    if filters.get('min_amount') is not None:
+        query = query.filter(ledger.transaction_amount >= filters['min_amount'])
+    if filters.get('max_amount') is not None:
+        query = query.filter(ledger.transaction_amount <= filters['max_amount'])
+
+    if filters.get('from_date') is not None or filters.get('to_date') is not None:
+        return query, ledger.transaction_date
+    return query, None
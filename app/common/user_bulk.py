@@ -0,0 +1,107 @@
+from app import db
+from app.common.custom_exception import RequestDataInvalid
+from app.common.password import password_hasher
+from app.common.reference_cache import user_type_cache
+from app.common.request_parser import load_data
+from app.models.user import User
+from app.schemas.user import user_schema, required_fields
+
+# values per IN (...) lookup, below the bind parameter limit of every backend
+USER_LOOKUP_CHUNK = 500
+
+
+def existing_values(column, values):
+    """
+        The values of column that are already taken, one IN query per chunk
+        returns:
+            set
+    """
+    values = sorted(values)
+    taken = set()
+    for start in range(0, len(values), USER_LOOKUP_CHUNK):
+        taken.update(value for value, in db.session.query(column).filter(
+            column.in_(values[start:start + USER_LOOKUP_CHUNK])))
+    return taken
+
+
+def user_result(index, user, success, message, user_id=None):
+    return {"index": index,
+            "email_id": user.get('email_id') if isinstance(user, dict) else None,
+            "mobile_number": user.get('mobile_number') if isinstance(user, dict) else None,
+            "user_id": user_id,
+            "success": success,
+            "message": message}
+
+
+def create_users_bulk(users):
+    """
+        Create many users in a single unit of work
+        Every row is validated like POST /user. Duplicate email ids and mobile
+        numbers are found within the batch and against the User table with one
+        IN query per key, the passwords of the accepted rows are hashed in
+        parallel, and the rows are written with one bulk insert and one commit.
+        Rejected rows write nothing.
+        parameters:
+            users: list of {first_name, last_name, address, mobile_number, email_id, password, user_type_id}
+        returns:
+            list with one result per user
+        raises:
+            IntegrityError when another request created one of the users meanwhile
+    """
+    try:
+        results = []
+        loaded = []
+        for index, user in enumerate(users):
+            try:
+                data = load_data(user_schema, user, required_fields)
+            except RequestDataInvalid as err:
+                results.append(user_result(index, user, False, err.message))
+                continue
+            results.append(user_result(index, user, True, "Users record inserted successfully"))
+            loaded.append((results[-1], data))
+
+        taken_email_ids = existing_values(User.email_id, {data['email_id'] for _, data in loaded})
+        taken_mobile_numbers = existing_values(User.mobile_number, {data['mobile_number'] for _, data in loaded})
+
+        accepted = []
+        for result, data in loaded:
+            if data['email_id'] in taken_email_ids:
+                result.update(success=False, message="Duplicate email id")
+            elif data['mobile_number'] in taken_mobile_numbers:
+                result.update(success=False, message="Duplicate mobile number")
+            elif not user_type_cache.get(data['user_type_id']):
+                result.update(success=False, message="Invalid user Type id")
+            else:
+                # later rows of the batch with the same keys are duplicates of this one
+                taken_email_ids.add(data['email_id'])
+                taken_mobile_numbers.add(data['mobile_number'])
+                accepted.append((result, data))
+
+        if not accepted:
+            return results
+
+        hashes = password_hasher.hash_many([data['password'] for _, data in accepted])
+        db.session.bulk_insert_mappings(User, [
+            {"first_name": data['first_name'],
+             "last_name": data['last_name'],
+             "address": data['address'],
+             "mobile_number": data['mobile_number'],
+             "email_id": data['email_id'],
+             "password": hashed,
+             "is_deleted": 0,
+             "user_type_id": data['user_type_id']} for (_, data), hashed in zip(accepted, hashes)])
+
+        # ids are read back by email id so the insert stays a single executemany
+        user_ids = {}
+        email_ids = sorted(data['email_id'] for _, data in accepted)
+        for start in range(0, len(email_ids), USER_LOOKUP_CHUNK):
+            user_ids.update(db.session.query(User.email_id, User.id).filter(
+                User.email_id.in_(email_ids[start:start + USER_LOOKUP_CHUNK])))
+        db.session.commit()
+
+        for result, data in accepted:
+            result['user_id'] = user_ids.get(data['email_id'])
+        return results
+    except Exception:
+        db.session.rollback()
+        raise
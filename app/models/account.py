@@ -3,11 +3,18 @@ from app import db
 
 class BankAccount(db.Model):
     __tablename__ = 'BankAccount'
+    __table_args__ = (
+        # active account list: is_deleted = 0 AND id > ? ORDER BY id
+        db.Index('ix_BankAccount_is_deleted_id', 'is_deleted', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     account_number = db.Column(db.String(8), unique=True)
     is_active = db.Column(db.Integer)
     is_deleted = db.Column(db.Integer)
     account_balance = db.Column(db.Integer)
+    # interest accrued but not yet posted (below one unit) and the day it was accrued up to
+    accrued_interest = db.Column(db.Float, nullable=False, default=0, server_default='0')
+    interest_accrued_on = db.Column(db.Date)
 
     user_id = db.Column(db.Integer, db.ForeignKey('User.id'), nullable=False)
     branch_id = db.Column(db.Integer, db.ForeignKey('BranchDetails.id'), nullable=False)
@@ -47,3 +54,47 @@ class BranchDetails(db.Model):
     def __init__(self, branch_name, branch_address):
         self.branch_name = branch_name
         self.branch_address = branch_address
+
+
+class AccountNumberSequence(db.Model):
+    __tablename__ = 'AccountNumberSequence'
+    branch_id = db.Column(db.Integer, db.ForeignKey('BranchDetails.id'), primary_key=True, autoincrement=False)
+    next_value = db.Column(db.Integer, nullable=False)
+
+    def __init__(self, branch_id, next_value):
+        self.branch_id = branch_id
+        self.next_value = next_value
+
+
+class BalanceSnapshot(db.Model):
+    __tablename__ = 'BalanceSnapshot'
+    __table_args__ = (
+        # nearest snapshot: bank_account_id = ? AND snapshot_at <= ? ORDER BY snapshot_at DESC
+        db.Index('ix_BalanceSnapshot_bank_account_id_snapshot_at', 'bank_account_id', 'snapshot_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    bank_account_id = db.Column(db.Integer, db.ForeignKey('BankAccount.id'), nullable=False)
+    account_balance = db.Column(db.Integer, nullable=False)
+    last_transaction_id = db.Column(db.Integer, nullable=False)
+    snapshot_at = db.Column(db.DateTime, nullable=False)
+
+    def __init__(self, bank_account_id, account_balance, last_transaction_id, snapshot_at):
+        self.bank_account_id = bank_account_id
+        self.account_balance = account_balance
+        self.last_transaction_id = last_transaction_id
+        self.snapshot_at = snapshot_at
+
+
+class BalanceShard(db.Model):
+    __tablename__ = 'BalanceShard'
+    bank_account_id = db.Column(db.Integer, db.ForeignKey('BankAccount.id'), primary_key=True, autoincrement=False)
+    shard = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    account_balance = db.Column(db.Integer, nullable=False)
+    # set when set_balance_shards shrinks the account below this shard, the
+    # row keeps taking credits from stale registries until fold_all_shards drops it
+    retired_at = db.Column(db.DateTime, nullable=True)
+
+    def __init__(self, bank_account_id, shard, account_balance):
+        self.bank_account_id = bank_account_id
+        self.shard = shard
+        self.account_balance = account_balance
@@ -0,0 +1,20 @@
+from app import db
+
+
+class IdempotencyKey(db.Model):
+    __tablename__ = "IdempotencyKey"
+    __table_args__ = (
+        # one key per user and endpoint, also the lookup of a retried request
+        db.UniqueConstraint('email_id', 'request_path', 'idempotency_key',
+                            name='uq_IdempotencyKey_email_id_request_path_idempotency_key'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    email_id = db.Column(db.String(120), nullable=False)
+    request_path = db.Column(db.String(100), nullable=False)
+    idempotency_key = db.Column(db.String(255), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    # committed with the key, the response of the first request is rebuilt from it
+    fund_transfer_id = db.Column(db.Integer, db.ForeignKey('FundTransfer.id'), nullable=True)
+    fund_transfer = db.relationship('FundTransfer')
+    created_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
@@ -3,6 +3,13 @@ from app import db
 
 class AccountTransactionDetails(db.Model):
     __tablename__ = 'AccountTransactionDetails'
+    __table_args__ = (
+        # mini statement and per account history: bank_account_id = ? ORDER BY id
+        db.Index('ix_AccountTransactionDetails_bank_account_id_id', 'bank_account_id', 'id'),
+        # filtered history and balance as of: bank_account_id = ? AND transaction_date BETWEEN ? AND ?
+        db.Index('ix_AccountTransactionDetails_bank_account_id_transaction_date', 'bank_account_id',
+                 'transaction_date'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     transaction_amount = db.Column(db.Integer, nullable=False)
     transaction_date = db.Column(db.DateTime, server_default=db.func.now())
@@ -22,6 +29,27 @@ class AccountTransactionDetails(db.Model):
         self.fund_transfer_info = fund_transfer_info
 
 
+class AccountTransactionDetailsArchive(db.Model):
+    """
+        AccountTransactionDetails rows moved out of the hot table by the
+        archive_transactions command, with their ids kept
+    """
+    __tablename__ = 'AccountTransactionDetailsArchive'
+    __table_args__ = (
+        db.Index('ix_AccountTransactionDetailsArchive_bank_account_id_id', 'bank_account_id', 'id'),
+        db.Index('ix_AccountTransactionDetailsArchive_bank_account_id_transaction_date', 'bank_account_id',
+                 'transaction_date'),
+    )
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    transaction_amount = db.Column(db.Integer, nullable=False)
+    transaction_date = db.Column(db.DateTime)
+    transaction_status = db.Column(db.String(50))
+    bank_account_id = db.Column(db.Integer, db.ForeignKey('BankAccount.id'), nullable=False)
+    transaction_type_id = db.Column(db.Integer, db.ForeignKey('TransactionType.id'), nullable=False)
+    fund_transfer_id = db.Column(db.Integer, db.ForeignKey('FundTransfer.id'), nullable=False)
+    fund_transfer_info = db.Column(db.String(50))
+
+
 class TransactionType(db.Model):
     __tablename__ = 'TransactionType'
     id = db.Column(db.Integer, primary_key=True)
@@ -36,8 +64,10 @@ class TransactionType(db.Model):
 class FundTransfer(db.Model):
     __tablename__ = 'FundTransfer'
     id = db.Column(db.Integer, primary_key=True)
-    from_account = db.Column(db.String(8), nullable=False)
-    to_account = db.Column(db.String(8), nullable=True)
+    from_account = db.Column(db.String(8), nullable=False, index=True)
+    to_account = db.Column(db.String(8), nullable=True, index=True)
+    # set by transfer_funds_batch to read back the ids of one bulk insert
+    batch_id = db.Column(db.String(32), nullable=True, index=True)
 
     account_transaction_details = db.relationship('AccountTransactionDetails', backref='FundTransfer', lazy=True)
 
@@ -3,6 +3,10 @@ from app import db
 
 class User(db.Model):
     __tablename__ = 'User'
+    __table_args__ = (
+        # active user list: is_deleted = 0 AND id > ? ORDER BY id
+        db.Index('ix_User_is_deleted_id', 'is_deleted', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(50), unique=False, nullable=False)
     last_name = db.Column(db.String(50), unique=False, nullable=False)
@@ -1,11 +1,12 @@
 from marshmallow import fields
 from app import ma
+from app.common.fast_serializer import FastDumpMixin
 from marshmallow.validate import Length, Regexp
 
 string_pattern = "^[a-zA-Z ]*$"
 
 
-class BankAccountSchema(ma.Schema):
+class BankAccountSchema(FastDumpMixin, ma.Schema):
     id = fields.Integer(required=True, strict=True)
     account_number = fields.String(required=True, validate=Length(equal=8))
     is_active = fields.Integer()
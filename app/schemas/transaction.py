@@ -1,11 +1,12 @@
-from marshmallow import fields
+from marshmallow import fields, EXCLUDE
 from app import ma
-from marshmallow.validate import Length, Regexp
+from app.common.fast_serializer import FastDumpMixin
+from marshmallow.validate import Length, Regexp, Range
 
 string_pattern = "^[a-zA-Z ]*$"
 
 
-class AccountTransactionDetailsSchema(ma.Schema):
+class AccountTransactionDetailsSchema(FastDumpMixin, ma.Schema):
     id = fields.Integer(required=True, strict=True)
     transaction_amount = fields.Integer(required=True, strict=True)
     transaction_status = fields.String(required=True)
@@ -37,11 +38,12 @@ transaction_type_schema = TransactionTypeSchema()
 transactions_type_schema = TransactionTypeSchema(many=True)
 
 
-class FundTransferSchema(ma.Schema):
+class FundTransferSchema(FastDumpMixin, ma.Schema):
     id = fields.Integer(required=True, strict=True)
     from_account = fields.String(required=True, validate=Length(equal=8))
     to_account = fields.String(required=True, validate=Length(equal=8))
-    transaction_amount = fields.Integer()
+    # a negative amount would move funds from to_account without its minimum balance check
+    transaction_amount = fields.Integer(validate=Range(min=1))
 
     class Meta:
         fields = ("id", "from_account", "to_account", "transaction_amount")
@@ -49,3 +51,17 @@ class FundTransferSchema(ma.Schema):
 
 fund_transfer_schema = FundTransferSchema()
 funds_transfer_schema = FundTransferSchema(many=True)
+
+
+class TransactionHistoryFilterSchema(ma.Schema):
+    # query string parameters, so numbers arrive as strings
+    transaction_type_id = fields.Integer()
+    transaction_status = fields.String(validate=Length(max=50))
+    min_amount = fields.Integer(validate=Range(min=0))
+    max_amount = fields.Integer(validate=Range(min=0))
+
+    class Meta:
+        unknown = EXCLUDE
+
+
+transaction_history_filter_schema = TransactionHistoryFilterSchema()
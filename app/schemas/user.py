@@ -1,5 +1,6 @@
 from marshmallow import fields
 from app import ma
+from app.common.fast_serializer import FastDumpMixin
 from marshmallow.validate import Length, Range, Regexp
 
 
@@ -10,7 +11,7 @@ string_pattern = "^[a-zA-Z]*$"
 
 
 # Define schema for user
-class UserSchema(ma.Schema):
+class UserSchema(FastDumpMixin, ma.Schema):
     id = fields.Integer(required=True, strict=True)
     first_name = fields.String(required=True, validate=(Length(min=4, max=250), Regexp(string_pattern)))
     last_name = fields.String(required=True, validate=(Length(min=4, max=250), Regexp(string_pattern)))
@@ -26,6 +27,8 @@ class UserSchema(ma.Schema):
 
 
 load_only = ["password", "is_deleted", "user_type_id"]
+# fields a new user must be created with
+required_fields = ("first_name", "last_name", "address", "mobile_number", "email_id", "password", "user_type_id")
 user_schema = UserSchema(load_only=load_only)
 users_schema = UserSchema(load_only=load_only, many=True)
 
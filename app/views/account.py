@@ -1,15 +1,22 @@
 from app import db
+from app.common.account_number import account_number_allocator
+from app.common.balance_snapshot import balance_as_of
 from app.common.log import logger
+from app.common.mini_statement import mini_statement_store
+from app.common.pagination import paginate, stream
+from app.common.reference_cache import account_type_cache, branch_details_cache, transaction_type_cache
+from app.common.request_parser import load_request
+from app.common.sharded_balance import add_shard_balances
 from app.models.account import BankAccount, BranchDetails, AccountType
 from flask import request
 from flask_restplus import Resource
 from app.schemas.account import bank_account_schema, bank_accounts_schema, account_type_schema, accounts_type_schema, branch_details_schema, branches_details_schema
 from app.schemas.transaction import fund_transfer_schema
-from app.common.response_genarator import ResponseGenerator
+from app.common.response_genarator import ResponseGenerator, requested_stream_format
 from http import HTTPStatus
-import random
-from app.common.custom_exception import BankAccountObjectNotFound, AccountTypeObjectNotFound, BranchDetailsObjectNotFound, TransactionTypeObjectNotFound, UserObjectNotFound
-from app.views.transaction import AccountTransactionDetails, FundTransfer, TransactionType
+from datetime import datetime, time
+from app.common.custom_exception import BankAccountObjectNotFound, AccountTypeObjectNotFound, AccountNumbersExhausted, BranchDetailsObjectNotFound, TransactionTypeObjectNotFound, UserObjectNotFound, RequestDataInvalid
+from app.views.transaction import AccountTransactionDetails, FundTransfer
 from app.schemas.transaction import account_transaction_details_schema
 from app.views.user import User
 from flask_jwt_extended import jwt_required
@@ -38,15 +45,8 @@ class BankAccountResource(Resource):
          """
         # retrieve body data from input JSON
         try:
-            data = request.get_json()
-            errors = bank_account_schema.validate(data, partial=True)
-            if errors:
-                logger.error("Missing or sending incorrect data {}".format(errors))
-                response = ResponseGenerator(data={},
-                                             message=errors,
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.error_response()
+            data = load_request(bank_account_schema,
+                                required=("account_balance", "user_id", "account_type_id", "branch_id"))
 
             # get user details
             user = User.query.filter(User.id == data['user_id']).first()
@@ -54,31 +54,25 @@ class BankAccountResource(Resource):
                 raise UserObjectNotFound("Invalid user id")
 
             # get account type details
-            account_type = AccountType.query.filter(AccountType.id == data['account_type_id']).first()
+            account_type = account_type_cache.get(data['account_type_id'])
             if not account_type:
                 raise AccountTypeObjectNotFound("Invalid account Type id")
 
+            # get branch details
             branch_id = data['branch_id']
-            zero_filled_number = str(branch_id)
-            branch_id = zero_filled_number.zfill(3)
-            code = random.randint(10000, 99999)
-            account_number = f'{branch_id}{code}'
-
-            try:
-                bank_account_data = BankAccount(
-                    account_number=account_number,
-                    is_active=1,
-                    is_deleted=0,
-                    account_balance=data['account_balance'],
-                    user_id=data['user_id'],
-                    account_type_id=data['account_type_id'],
-                    branch_id=branch_id)
-            except KeyError as err:
-                response = ResponseGenerator(data={},
-                                             message="Column '{}' cannot be null".format(err.args[0]),
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.success_response()
+            if not branch_details_cache.get(branch_id):
+                raise BranchDetailsObjectNotFound("Invalid branch id")
+
+            account_number = account_number_allocator.allocate(branch_id)
+
+            bank_account_data = BankAccount(
+                account_number=account_number,
+                is_active=1,
+                is_deleted=0,
+                account_balance=data['account_balance'],
+                user_id=data['user_id'],
+                account_type_id=data['account_type_id'],
+                branch_id=branch_id)
 
             if bank_account_data.account_balance <= 1000:
                 raise BankAccountObjectNotFound("Minimum balances required while creating account")
@@ -95,7 +89,7 @@ class BankAccountResource(Resource):
             db.session.commit()
             result = fund_transfer_schema.dump(fund_transfer_data)
 
-            transaction_type = TransactionType.query.filter(TransactionType.transaction_type == "credit").first()
+            transaction_type = transaction_type_cache.get_by_name("credit")
             if not transaction_type:
                 raise TransactionTypeObjectNotFound("Transaction type does not exist")
 
@@ -110,16 +104,24 @@ class BankAccountResource(Resource):
             )
 
             db.session.add(bank_account_transaction)
+            db.session.flush()
+            ledger = account_transaction_details_schema.dump(bank_account_transaction)
             db.session.commit()
-            account_transaction_details_schema.dump(bank_account_transaction)
+            mini_statement_store.record([ledger])
 
             result = bank_account_schema.dump(bank_account_data)
-            logger.info("Response for get request for bank account list {}".format(result))
+            logger.info("Response for get request for bank account list %s", result)
             response = ResponseGenerator(data=result,
                                          message="Bank account list return successfully",
                                          success=True,
                                          status=HTTPStatus.OK)
             return response.success_response()
+        except RequestDataInvalid as err:
+            logger.error("Missing or sending incorrect data %s", err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
         except BankAccountObjectNotFound as err:
             logger.exception(err.message)
             response = ResponseGenerator(data={},
@@ -138,6 +140,18 @@ class BankAccountResource(Resource):
                                          message=err.message,
                                          success=False,
                                          status=HTTPStatus.NOT_FOUND)
+        except BranchDetailsObjectNotFound as err:
+            logger.exception(err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.NOT_FOUND)
+        except AccountNumbersExhausted as err:
+            logger.exception(err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.CONFLICT)
         except Exception as err:
             logger.exception(err)
             response = ResponseGenerator(data={},
@@ -152,6 +166,9 @@ class BankAccountResource(Resource):
         """
              This is GET API
              parameters:
+                 after: Integer
+                 limit: Integer
+                 format: String
                  account_number: Integer
                  is_active: Integer
                  is_deleted: Integer
@@ -167,17 +184,29 @@ class BankAccountResource(Resource):
                          BankAccountSchema
          """
         try:
-            bank_account_data = BankAccount.query.filter(BankAccount.is_deleted == 0)
-            if bank_account_data.count() == 0:
+            stream_format = requested_stream_format()
+            if stream_format:
+                logger.info("Streaming response for get request for bank account list")
+                rows = stream(BankAccount.query.filter(BankAccount.is_deleted == 0), BankAccount.id)
+                response = ResponseGenerator(data=rows,
+                                             message="Bank account list return successfully",
+                                             success=True,
+                                             status=HTTPStatus.OK)
+                return response.stream_response(bank_account_schema, stream_format)
+
+            bank_account_data, next_cursor = paginate(BankAccount.query.filter(BankAccount.is_deleted == 0),
+                                                      BankAccount.id)
+            if not bank_account_data:
                 raise BankAccountObjectNotFound("Bank account does not exist")
 
-            result = bank_accounts_schema.dump(bank_account_data)
+            result = add_shard_balances(bank_accounts_schema.dump(bank_account_data))
 
-            logger.info("Response for get request for bank account list {}".format(result))
+            logger.info("Response for get request for bank account list %s", result)
             response = ResponseGenerator(data=result,
                                          message="Bank account list return successfully",
                                          success=True,
-                                         status=HTTPStatus.OK)
+                                         status=HTTPStatus.OK,
+                                         next_cursor=next_cursor)
             return response.success_response()
         except BankAccountObjectNotFound as err:
             logger.exception(err.message)
@@ -222,8 +251,8 @@ class BankAccountResourceId(Resource):
             if not bank_account_data:
                 raise BankAccountObjectNotFound("Bank account does not exist")
 
-            result = bank_account_schema.dump(bank_account_data)
-            logger.info("Response for get request for bank account list {}".format(result))
+            result = add_shard_balances([bank_account_schema.dump(bank_account_data)])[0]
+            logger.info("Response for get request for bank account list %s", result)
             response = ResponseGenerator(data=result,
                                          message="Bank account list return successfully",
                                          success=True,
@@ -266,15 +295,7 @@ class BankAccountResourceId(Resource):
          """
         try:
             # retrieve body data from input JSON
-            data = request.get_json()
-            errors = bank_account_schema.validate(data, partial=True)
-            if errors:
-                logger.error("Missing or sending incorrect data {}".format(errors))
-                response = ResponseGenerator(data={},
-                                             message=errors,
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.error_response()
+            data = load_request(bank_account_schema)
 
             bank_account_data = BankAccount.query.filter(BankAccount.id == bank_account_id,
                                                          BankAccount.is_deleted == 0).first()
@@ -288,13 +309,19 @@ class BankAccountResourceId(Resource):
             db.session.commit()
             result = bank_account_schema.dump(bank_account_data)
 
-            logger.info("Response for put with id request for user type {}".format(result))
+            logger.info("Response for put with id request for user type %s", result)
             response = ResponseGenerator(data=result,
                                          message="Bank account with this id updated successfully",
                                          success=True,
                                          status=HTTPStatus.OK)
             return response.success_response()
 
+        except RequestDataInvalid as err:
+            logger.error("Missing or sending incorrect data %s", err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
         except BankAccountObjectNotFound as err:
             logger.exception(err.message)
             response = ResponseGenerator(data={},
@@ -358,6 +385,70 @@ class BankAccountResourceId(Resource):
         return response.error_response()
 
 
+class BankAccountBalanceResource(Resource):
+    @jwt_required()
+    def get(self, bank_account_id):
+        """
+             This is GET API
+             Call this api passing a bank account id
+             parameters:
+                 as_of: String, ISO date or date time, a date means the end of that day
+             responses:
+                 404:
+                     description: Bank account with this id does not exist
+                 400:
+                     description: Invalid as_of
+                 200:
+                     description: Bank account balance return successfully
+         """
+        try:
+            bank_account_data = BankAccount.query.filter(BankAccount.id == bank_account_id,
+                                                         BankAccount.is_deleted == 0).first()
+            if not bank_account_data:
+                raise BankAccountObjectNotFound("Bank account with this id does not exist")
+
+            as_of = request.args.get('as_of')
+            if not as_of:
+                current = add_shard_balances([bank_account_schema.dump(bank_account_data)])[0]
+                result = {"bank_account_id": bank_account_id,
+                          "as_of": None,
+                          "account_balance": current['account_balance']}
+            else:
+                try:
+                    as_of_date = datetime.fromisoformat(as_of)
+                except ValueError:
+                    logger.warning("Invalid as_of %s", as_of)
+                    response = ResponseGenerator(data={},
+                                                 message="Invalid as_of, expected YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS",
+                                                 success=False,
+                                                 status=HTTPStatus.BAD_REQUEST)
+                    return response.error_response()
+                if len(as_of) == 10:
+                    as_of_date = datetime.combine(as_of_date.date(), time.max)
+                result = balance_as_of(bank_account_id, as_of_date)
+
+            logger.info("Response for get request for bank account balance %s", result)
+            response = ResponseGenerator(data=result,
+                                         message="Bank account balance return successfully",
+                                         success=True,
+                                         status=HTTPStatus.OK)
+            return response.success_response()
+        except BankAccountObjectNotFound as err:
+            logger.exception(err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.NOT_FOUND)
+        except Exception as err:
+            logger.exception(err)
+            response = ResponseGenerator(data={},
+                                         message=err,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
+
+        return response.error_response()
+
+
 class AccountTypeResource(Resource):
     @jwt_required()
     def post(self):
@@ -374,37 +465,30 @@ class AccountTypeResource(Resource):
                          AccountTypeSchema
          """
         try:
-            data = request.get_json()
-            errors = account_type_schema.validate(data, partial=True)
-            if errors:
-                logger.error("Missing or sending incorrect data {}".format(errors))
-                response = ResponseGenerator(data={},
-                                             message=errors,
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.error_response()
-            try:
-                account_type_data = AccountType(
-                    account_type=data['account_type'])
-            except KeyError as err:
-                response = ResponseGenerator(data={},
-                                             message="Column '{}' cannot be null".format(err.args[0]),
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.success_response()
+            data = load_request(account_type_schema, required=("account_type",))
+
+            account_type_data = AccountType(
+                account_type=data['account_type'])
 
             if account_type_data.account_type.lower() not in ["saving", "current"]:
                 raise AccountTypeObjectNotFound
 
             db.session.add(account_type_data)
             db.session.commit()
+            account_type_cache.invalidate()
             result = account_type_schema.dump(account_type_data)
-            logger.info("Response for post request for account type {}".format(result))
+            logger.info("Response for post request for account type %s", result)
             response = ResponseGenerator(data=result,
                                          message="Account type list inserted successfully",
                                          success=True,
                                          status=HTTPStatus.OK)
             return response.success_response()
+        except RequestDataInvalid as err:
+            logger.error("Missing or sending incorrect data %s", err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
         except AccountTypeObjectNotFound:
             logger.exception("Account type does not exist")
             response = ResponseGenerator(data={},
@@ -441,7 +525,7 @@ class AccountTypeResource(Resource):
 
             result = accounts_type_schema.dump(account_type_data)
 
-            logger.info("Response for get request for account type list {}".format(result))
+            logger.info("Response for get request for account type list %s", result)
             response = ResponseGenerator(data=result,
                                          message="Account type list return successfully",
                                          success=True,
@@ -486,7 +570,7 @@ class AccountTypeResourceId(Resource):
 
             result = account_type_schema.dump(account_type_data)
 
-            logger.info("Response for get with id request for account type list {}".format(result))
+            logger.info("Response for get with id request for account type list %s", result)
             response = ResponseGenerator(data=result,
                                          message="account type with this  id return successfully",
                                          success=True,
@@ -524,15 +608,7 @@ class AccountTypeResourceId(Resource):
          """
         try:
             # retrieve body data from input JSON
-            data = request.get_json()
-            errors = account_type_schema.validate(data, partial=True)
-            if errors:
-                logger.error("Missing or sending incorrect data {}".format(errors))
-                response = ResponseGenerator(data={},
-                                             message=errors,
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.error_response()
+            data = load_request(account_type_schema)
 
             account_type_data = AccountType.query.filter(AccountType.id == account_type_id).first()
             if not account_type_data:
@@ -540,14 +616,21 @@ class AccountTypeResourceId(Resource):
 
             account_type_data.account_type = data.get('account_type', account_type_data.account_type)
             db.session.commit()
+            account_type_cache.invalidate()
             result = account_type_schema.dump(account_type_data)
 
-            logger.info("Response for put with id request for account type {}".format(result))
+            logger.info("Response for put with id request for account type %s", result)
             response = ResponseGenerator(data=result,
                                          message="Account type with this id updated successfully",
                                          success=True,
                                          status=HTTPStatus.OK)
             return response.success_response()
+        except RequestDataInvalid as err:
+            logger.error("Missing or sending incorrect data %s", err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
         except AccountTypeObjectNotFound as err:
             logger.exception(err.message)
             response = ResponseGenerator(data={},
@@ -581,35 +664,27 @@ class BranchDetailsResource(Resource):
                          BranchDetailsSchema
          """
         try:
-            data = request.get_json()
-            errors = branch_details_schema.validate(data, partial=True)
-            if errors:
-                logger.error("Missing or sending incorrect data {}".format(errors))
-                response = ResponseGenerator(data={},
-                                             message=errors,
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.error_response()
-            try:
-                branch_details_data = BranchDetails(
-                    branch_name=data['branch_name'],
-                    branch_address=data['branch_address'])
-            except KeyError as err:
-                response = ResponseGenerator(data={},
-                                             message="Column '{}' cannot be null".format(err.args[0]),
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.success_response()
+            data = load_request(branch_details_schema, required=("branch_name", "branch_address"))
+            branch_details_data = BranchDetails(
+                branch_name=data['branch_name'],
+                branch_address=data['branch_address'])
 
             db.session.add(branch_details_data)
             db.session.commit()
+            branch_details_cache.invalidate()
             result = branch_details_schema.dump(branch_details_data)
-            logger.info("Response for post request for branch details {}".format(result))
+            logger.info("Response for post request for branch details %s", result)
             response = ResponseGenerator(data=result,
                                          message="Branch details record inserted successfully",
                                          success=True,
                                          status=HTTPStatus.OK)
             return response.success_response()
+        except RequestDataInvalid as err:
+            logger.error("Missing or sending incorrect data %s", err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
         except BranchDetailsObjectNotFound:
             logger.exception("Branch details does not exist")
             response = ResponseGenerator(data={},
@@ -647,7 +722,7 @@ class BranchDetailsResource(Resource):
 
             result = branches_details_schema.dump(branch_details_data)
 
-            logger.info("Response for get request for branch details list {}".format(result))
+            logger.info("Response for get request for branch details list %s", result)
             response = ResponseGenerator(data=result,
                                          message="Branch details list return successfully",
                                          success=True,
@@ -693,7 +768,7 @@ class BranchDetailsResourceId(Resource):
 
             result = branch_details_schema.dump(branch_details_data)
 
-            logger.info("Response for get with id request for branch details {}".format(result))
+            logger.info("Response for get with id request for branch details %s", result)
             response = ResponseGenerator(data=result,
                                          message="Branch details with this id return successfully",
                                          success=True,
@@ -732,31 +807,30 @@ class BranchDetailsResourceId(Resource):
          """
         try:
             # retrieve body data from input JSON
-            data = request.get_json()
-            errors = branch_details_schema.validate(data, partial=True)
-            if errors:
-                logger.error("Missing or sending incorrect data {}".format(errors))
-                response = ResponseGenerator(data={},
-                                             message=errors,
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.error_response()
+            data = load_request(branch_details_schema)
 
             branch_details_data = BranchDetails.query.filter(BranchDetails.id == branch_details_id).first()
             if not branch_details_data:
                 raise BranchDetailsObjectNotFound("Branch details with this id does not exist")
 
-            branch_details_data.branch_name = data.get('branch_name', branch_details_data.name)
+            branch_details_data.branch_name = data.get('branch_name', branch_details_data.branch_name)
             branch_details_data.branch_address = data.get('branch_address', branch_details_data.branch_address)
             db.session.commit()
+            branch_details_cache.invalidate()
             result = branch_details_schema.dump(branch_details_data)
 
-            logger.info("Response for put with id request for user type {}".format(result))
+            logger.info("Response for put with id request for user type %s", result)
             response = ResponseGenerator(data=result,
                                          message="Branch details with this id updated successfully",
                                          success=True,
                                          status=HTTPStatus.OK)
             return response.success_response()
+        except RequestDataInvalid as err:
+            logger.error("Missing or sending incorrect data %s", err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
         except BranchDetailsObjectNotFound as err:
             logger.exception(err.message)
             response = ResponseGenerator(data={},
@@ -795,6 +869,7 @@ class BranchDetailsResourceId(Resource):
 
             db.session.delete(branch_details_data)
             db.session.commit()
+            branch_details_cache.invalidate()
 
             logger.info("Response for delete request for branch details:"
                         "Branch details with this id deleted successfully")
@@ -0,0 +1,359 @@
+from functools import wraps
+from http import HTTPStatus
+from flask_jwt_extended import create_access_token, decode_token
+from jwt import ExpiredSignatureError
+from sqlalchemy import desc, select, update
+from starlette.responses import Response
+from app import app1
+from app.common.async_db import async_db, run_sync
+from app.common.custom_exception import UserObjectNotFound, PasswordWrong, PasswordHashingBusy, \
+    BankAccountObjectNotFound, TransactionTypeObjectNotFound, MiniStatementObjectNotFound, FundTransferDeclined, \
+    RequestDataInvalid, IdempotencyKeyInvalid, IdempotencyKeyInProgress
+from app.common.fund_transfer import transfer_funds_async
+from app.common.idempotency import idempotency_store, idempotency_scope, request_hash, check_stored, \
+    committed_id, IDEMPOTENCY_KEY_HEADER, REPLAYED_HEADER
+from app.common.ledger_archive import ledger_model, archive_horizon_statement, needs_archive
+from app.common.log import logger
+from app.common.mini_statement import mini_statement_store
+from app.common.password import password_hasher
+from app.common.request_parser import load_data
+from app.common.response_genarator import ResponseGenerator
+from app.common.sharded_balance import sharded_accounts, shard_balances_statement
+from app.common.token_blocklist import revocation_store
+from app.models.account import BankAccount
+from app.models.transaction import AccountTransactionDetails
+from app.models.user import User
+from app.schemas.account import bank_account_schema
+from app.schemas.transaction import accounts_transaction_details_schema, fund_transfer_schema
+
+
+def unauthorized(message):
+    response = ResponseGenerator(data={},
+                                 message=message,
+                                 success=False,
+                                 status=HTTPStatus.UNAUTHORIZED)
+    return response.asgi_response()
+
+
+def jwt_required_async(view):
+    """
+        @jwt_required() for the views of the asyncio server
+        Answers like the expired/invalid/revoked token loaders of the Flask app.
+    """
+    @wraps(view)
+    async def wrapper(request):
+        authorization = request.headers.get('Authorization', '')
+        if not authorization.startswith('Bearer '):
+            return unauthorized("Missing Authorization Header")
+        try:
+            with app1.app_context():
+                decoded_token = decode_token(authorization[len('Bearer '):])
+        except ExpiredSignatureError:
+            return unauthorized("Token expired")
+        except Exception:
+            return unauthorized("Invalid Token")
+        if await revocation_store.is_revoked_async(decoded_token['jti']):
+            return unauthorized("Revoked token, logged out ")
+        request.state.identity = decoded_token[app1.config['JWT_IDENTITY_CLAIM']]
+        return await view(request)
+
+    return wrapper
+
+
+def replay_response(stored):
+    return Response(stored.body, status_code=stored.status, media_type='application/json',
+                    headers={REPLAYED_HEADER: 'true'})
+
+
+def idempotent_async(view):
+    """
+        @idempotent for the views of the asyncio server, use below @jwt_required_async
+        The IdempotencyKey row of a first request is handed to the view as
+        request.state.idempotency_key to be added to its transaction.
+    """
+    @wraps(view)
+    async def wrapper(request):
+        request.state.idempotency_key = None
+        idempotency_key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        if not idempotency_key:
+            return await view(request)
+        try:
+            scope = idempotency_scope(request.state.identity["email_id"], request.url.path, idempotency_key)
+            body_hash = request_hash(await request.body())
+            # a cached response is replayed without leaving the event loop
+            stored = idempotency_store.cached(scope) or await run_sync(idempotency_store.find, scope)
+            if stored is not None:
+                logger.info("Replaying response for Idempotency-Key %s", idempotency_key)
+                return replay_response(check_stored(stored, body_hash))
+
+            record, pending = idempotency_store.claim(scope, body_hash)
+            request.state.idempotency_key = record
+            response = await view(request)
+
+            record_id = committed_id(record)
+            if record_id is not None:
+                idempotency_store.complete(scope, pending._replace(
+                    status=response.status_code, body=response.body.decode('utf-8')))
+                return response
+
+            stored = await run_sync(idempotency_store.find, scope)
+            if stored is not None:
+                logger.info("Replaying response for Idempotency-Key %s", idempotency_key)
+                return replay_response(check_stored(stored, body_hash))
+            return response
+
+        except IdempotencyKeyInvalid as err:
+            logger.warning(err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.UNPROCESSABLE_ENTITY)
+        except IdempotencyKeyInProgress as err:
+            logger.warning(err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.CONFLICT)
+        return response.asgi_response()
+
+    return wrapper
+
+
+async def login(request):
+    """
+        This is POST API
+        POST /login of the asyncio server, see Login.post
+        parameters:
+            email_id: String
+            password: String
+        responses:
+            404:
+                description: User email_id and password not exist
+            201:
+                description: Successfully logged in
+            400:
+                description: Bad request
+    """
+    try:
+        data = await request.json()
+        email_id = data.get("email_id")
+        password = data.get("password")
+        if not email_id:
+            logger.warning("Missing email id")
+            response = ResponseGenerator(data={},
+                                         message="Missing email id, Please enter email id",
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
+            return response.asgi_response()
+        if not password:
+            logger.warning("Missing password")
+            response = ResponseGenerator(data={},
+                                         message="Missing password, Please enter password",
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
+            return response.asgi_response()
+
+        async with async_db.session() as session:
+            user_data = (await session.execute(
+                select(User.id, User.password).where(User.email_id == email_id))).first()
+            if not user_data:
+                raise UserObjectNotFound("User not found")
+
+            # bcrypt runs on the password hashing pool, the event loop only waits for it
+            if not await run_sync(password_hasher.verify, password, user_data.password):
+                raise PasswordWrong("Password is wrong")
+
+            if password_hasher.needs_rehash(user_data.password):
+                hashed = await run_sync(password_hasher.hash, password)
+                await session.execute(update(User).where(User.id == user_data.id).values(password=hashed))
+                await session.commit()
+                logger.info("Password rehashed for user %s", user_data.id)
+
+        with app1.app_context():
+            access_token = create_access_token(identity={"email_id": email_id, "password": password})
+        logger.info("Successfully logged in")
+        response = ResponseGenerator(data={"access_token": access_token},
+                                     message="Successfully logged in",
+                                     success=True,
+                                     status=HTTPStatus.CREATED)
+    except (UserObjectNotFound, PasswordWrong) as err:
+        logger.info(err.message)
+        response = ResponseGenerator(data={},
+                                     message=err.message,
+                                     success=True,
+                                     status=HTTPStatus.NOT_FOUND)
+    except PasswordHashingBusy as err:
+        logger.warning(err.message)
+        response = ResponseGenerator(data={},
+                                     message=err.message,
+                                     success=False,
+                                     status=HTTPStatus.SERVICE_UNAVAILABLE)
+    except Exception as err:
+        logger.info(err)
+        response = ResponseGenerator(data={},
+                                     message=str(err),
+                                     success=True,
+                                     status=HTTPStatus.BAD_REQUEST)
+    return response.asgi_response()
+
+
+@jwt_required_async
+async def bank_account(request):
+    """
+        This is GET API
+        GET /bankaccount/<bank_account_id> of the asyncio server, see BankAccountResourceId.get
+        responses:
+            404:
+                description: Bank account with this id does not exist
+            200:
+                description: Bank account with this id return successfully
+                schema:
+                    BankAccountSchema
+    """
+    bank_account_id = request.path_params['bank_account_id']
+    try:
+        async with async_db.session() as session:
+            bank_account_data = (await session.execute(select(BankAccount).where(
+                BankAccount.id == bank_account_id, BankAccount.is_deleted == 0))).scalars().first()
+            if not bank_account_data:
+                raise BankAccountObjectNotFound("Bank account does not exist")
+
+            result = bank_account_schema.dump(bank_account_data)
+            if (await sharded_accounts.accounts_async()).get(bank_account_data.account_number):
+                balances = dict((await session.execute(shard_balances_statement([bank_account_data.id]))).all())
+                result['account_balance'] += int(balances.get(bank_account_data.id) or 0)
+
+        logger.info("Response for get request for bank account list %s", result)
+        response = ResponseGenerator(data=result,
+                                     message="Bank account list return successfully",
+                                     success=True,
+                                     status=HTTPStatus.OK)
+    except BankAccountObjectNotFound as err:
+        logger.exception(err.message)
+        response = ResponseGenerator(data={},
+                                     message=err.message,
+                                     success=False,
+                                     status=HTTPStatus.NOT_FOUND)
+    except Exception as err:
+        logger.exception(err)
+        response = ResponseGenerator(data={},
+                                     message=str(err),
+                                     success=False,
+                                     status=HTTPStatus.BAD_REQUEST)
+    return response.asgi_response()
+
+
+@jwt_required_async
+async def mini_statement(request):
+    """
+        This is GET API
+        GET /ministatement/<bank_account_id> of the asyncio server, see MiniStatementResources.get
+        responses:
+            404:
+                description: Bank account does not exist
+            200:
+                description: Account transaction details list of records return successfully
+    """
+    bank_account_id = request.path_params['bank_account_id']
+    try:
+        result = mini_statement_store.get(bank_account_id)
+        if result is None:
+            async with async_db.session() as session:
+                if not (await session.execute(select(BankAccount.id).where(
+                        BankAccount.id == bank_account_id))).first():
+                    raise MiniStatementObjectNotFound("Bank account does not exist")
+
+                mini_statement_data = (await session.execute(select(AccountTransactionDetails).where(
+                    AccountTransactionDetails.bank_account_id == bank_account_id).order_by(
+                    desc(AccountTransactionDetails.id)).limit(app1.config['MINI_STATEMENT_SIZE']))).scalars().all()
+                # fewer hot rows than a statement: the rest may be archived
+                if len(mini_statement_data) < app1.config['MINI_STATEMENT_SIZE'] and needs_archive(
+                        (await session.execute(archive_horizon_statement([bank_account_id]))).one()):
+                    ledger = ledger_model(True)
+                    mini_statement_data = (await session.execute(select(ledger).where(
+                        ledger.bank_account_id == bank_account_id).order_by(
+                        desc(ledger.id)).limit(app1.config['MINI_STATEMENT_SIZE']))).scalars().all()
+                result = accounts_transaction_details_schema.dump(mini_statement_data)
+            result = mini_statement_store.load(bank_account_id, result)
+
+        logger.info("Response for get request for account transaction details list of records %s", result)
+        response = ResponseGenerator(data=result,
+                                     message="Account transaction details list of records return successfully",
+                                     success=True,
+                                     status=HTTPStatus.OK)
+    except MiniStatementObjectNotFound as err:
+        logger.exception(err.message)
+        response = ResponseGenerator(data={},
+                                     message=err.message,
+                                     success=False,
+                                     status=HTTPStatus.NOT_FOUND)
+    except Exception as err:
+        logger.exception(err)
+        response = ResponseGenerator(data={},
+                                     message=str(err),
+                                     success=False,
+                                     status=HTTPStatus.BAD_REQUEST)
+    return response.asgi_response()
+
+
+@jwt_required_async
+@idempotent_async
+async def fund_transfer(request):
+    """
+        This is POST API
+        POST /fundtransfer of the asyncio server, see FundTransferResource.post
+        parameters:
+            from_account: String
+            to_account: String
+            transaction_amount: Integer
+        responses:
+            404:
+                description: Fund transfer does not exist
+            200:
+                description: Fund transfer record inserted successfully
+                schema:
+                    FundTransferSchema
+    """
+    try:
+        try:
+            body = await request.json()
+        except ValueError:
+            body = None
+        data = load_data(fund_transfer_schema, body, required=("from_account", "to_account", "transaction_amount"))
+
+        fund_transfer_data = await transfer_funds_async(from_account=data['from_account'],
+                                                        to_account=data['to_account'],
+                                                        transaction_amount=data['transaction_amount'],
+                                                        idempotency_key=request.state.idempotency_key)
+
+        result = fund_transfer_schema.dump(fund_transfer_data)
+        logger.info("Response for post request for fund transfer %s", result)
+        response = ResponseGenerator(data=result,
+                                     message="Fund transferred successfully",
+                                     success=True,
+                                     status=HTTPStatus.OK)
+    except RequestDataInvalid as err:
+        logger.error("Missing or sending incorrect data %s", err.message)
+        response = ResponseGenerator(data={},
+                                     message=err.message,
+                                     success=False,
+                                     status=HTTPStatus.BAD_REQUEST)
+    except (BankAccountObjectNotFound, TransactionTypeObjectNotFound) as err:
+        logger.exception(err.message)
+        response = ResponseGenerator(data={},
+                                     message=err.message,
+                                     success=False,
+                                     status=HTTPStatus.NOT_FOUND)
+    except FundTransferDeclined as err:
+        logger.exception(err.message)
+        response = ResponseGenerator(data={},
+                                     message=err.message,
+                                     success=False,
+                                     status=HTTPStatus.BAD_REQUEST)
+    except Exception as err:
+        logger.exception(err)
+        response = ResponseGenerator(data={},
+                                     message=str(err),
+                                     success=False,
+                                     status=HTTPStatus.BAD_REQUEST)
+    return response.asgi_response()
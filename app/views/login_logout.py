@@ -3,14 +3,12 @@ from flask import request
 from app.views.user import User
 from app.common.response_genarator import ResponseGenerator
 from app.common.log import logger
-from app import db
-from app import jwt
+from app import jwt, db
 from http import HTTPStatus
-from app.common.custom_exception import UserObjectNotFound, PasswordWrong
-from app.models.tokenblocklist import TokenBlockList
+from app.common.custom_exception import UserObjectNotFound, PasswordWrong, PasswordHashingBusy
+from app.common.password import password_hasher
+from app.common.token_blocklist import revocation_store
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt
-from datetime import datetime, timezone
-import bcrypt
 error_string = "Invalid Token"
 
 
@@ -75,9 +73,14 @@ class Login(Resource):
             if not user_data:
                 raise UserObjectNotFound("User not found")
 
-            if not bcrypt.checkpw(password.encode('utf-8'), user_data.password.encode('utf-8')):
+            if not password_hasher.verify(password, user_data.password):
                 raise PasswordWrong("Password is wrong")
 
+            if password_hasher.needs_rehash(user_data.password):
+                user_data.password = password_hasher.hash(password)
+                db.session.commit()
+                logger.info("Password rehashed for user %s", user_data.id)
+
             access_token = create_access_token(identity={"email_id": email_id, "password": password})
             logger.info("Successfully logged in")
             response = ResponseGenerator(data={"access_token": access_token},
@@ -97,6 +100,13 @@ class Login(Resource):
                                          message=err.message,
                                          success=True,
                                          status=HTTPStatus.NOT_FOUND)
+        except PasswordHashingBusy as err:
+            logger.warning(err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.SERVICE_UNAVAILABLE)
+            return response.error_response()
         except Exception as err:
             logger.info(err)
             response = ResponseGenerator(data={},
@@ -109,17 +119,12 @@ class Login(Resource):
 class Logout(Resource):
     @jwt.token_in_blocklist_loader
     def check_if_token_required(jwt_header, jwt_payload):
-        jti = jwt_payload['jti']
-        token = db.session.query(TokenBlockList.id).filter_by(jti=jti).scalar()
-        return token is not None
+        return revocation_store.is_revoked(jwt_payload['jti'])
 
     @jwt_required()
     def delete(self):
         try:
-            jti = get_jwt()["jti"]
-            now = datetime.now(timezone.utc)
-            db.session.add(TokenBlockList(jti=jti, created_at=now))
-            db.session.commit()
+            revocation_store.revoke(get_jwt()["jti"])
             logger.info("Logged out")
             response = ResponseGenerator(data={},
                                          message="logged out",
@@ -0,0 +1,92 @@
+from http import HTTPStatus
+from flask_restplus import Resource
+from app.common.account_number import account_number_allocator
+from app.common.log import logger
+from app.common.pool_metrics import pool_metrics
+from app.common.reference_cache import reference_caches
+from app.common.response_genarator import ResponseGenerator
+from flask_jwt_extended import jwt_required
+
+
+class ReferenceCacheResource(Resource):
+    @jwt_required()
+    def get(self):
+        """
+             This is GET API
+             Hit and miss counters of the reference data caches
+             responses:
+                 200:
+                     description: Reference cache statistics return successfully
+         """
+        try:
+            result = [cache.stats() for cache in reference_caches]
+            logger.info("Response for get request for reference cache statistics %s", result)
+            response = ResponseGenerator(data=result,
+                                         message="Reference cache statistics return successfully",
+                                         success=True,
+                                         status=HTTPStatus.OK)
+            return response.success_response()
+        except Exception as err:
+            logger.exception(err)
+            response = ResponseGenerator(data={},
+                                         message=err,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
+
+        return response.error_response()
+
+
+class AccountNumberCapacityResource(Resource):
+    @jwt_required()
+    def get(self):
+        """
+             This is GET API
+             Account numbers used and left per branch
+             responses:
+                 200:
+                     description: Account number capacity return successfully
+         """
+        try:
+            result = account_number_allocator.capacity()
+            logger.info("Response for get request for account number capacity %s", result)
+            response = ResponseGenerator(data=result,
+                                         message="Account number capacity return successfully",
+                                         success=True,
+                                         status=HTTPStatus.OK)
+            return response.success_response()
+        except Exception as err:
+            logger.exception(err)
+            response = ResponseGenerator(data={},
+                                         message=err,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
+
+        return response.error_response()
+
+
+class PoolMetricsResource(Resource):
+    @jwt_required()
+    def get(self):
+        """
+             This is GET API
+             Connection pool state and checkout wait histogram per database engine
+             responses:
+                 200:
+                     description: Pool metrics return successfully
+         """
+        try:
+            result = pool_metrics.snapshot()
+            logger.info("Response for get request for pool metrics %s", result)
+            response = ResponseGenerator(data=result,
+                                         message="Pool metrics return successfully",
+                                         success=True,
+                                         status=HTTPStatus.OK)
+            return response.success_response()
+        except Exception as err:
+            logger.exception(err)
+            response = ResponseGenerator(data={},
+                                         message=err,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
+
+        return response.error_response()
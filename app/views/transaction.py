@@ -1,12 +1,24 @@
 from http import HTTPStatus
-from flask import request
+from flask import g, request
 from flask_restplus import Resource
 from sqlalchemy import desc
-from app import db
+from app import app1, db
 from app.common.custom_exception import BankAccountObjectNotFound, TransactionTypeObjectNotFound, \
-    AccountTransactionDetailsObjectNotFound, FundTransferObjectNotFound, MiniStatementObjectNotFound
+    AccountTransactionDetailsObjectNotFound, FundTransferObjectNotFound, MiniStatementObjectNotFound, \
+    FundTransferDeclined, RequestDataInvalid
+from app.common.fund_transfer import transfer_funds, transfer_funds_batch
+from app.common.idempotency import idempotent, replays
+from app.common.ledger_archive import ledger_model, includes_archive
 from app.common.log import logger
-from app.common.response_genarator import ResponseGenerator
+from app.common.mini_statement import mini_statement_store
+from app.common.pagination import paginate, stream
+from app.common.reference_cache import transaction_type_cache
+from app.common.replica import using_primary
+from app.common.request_parser import load_request, parse_transaction_date
+from app.common.response_genarator import ResponseGenerator, requested_stream_format
+from app.common.sharded_balance import sharded_accounts, fold_shards
+from app.common.statement_export import parse_bank_account_ids, export_rows, csv_chunks
+from app.common.transaction_history import history_filters, filter_history
 from app.models.account import BankAccount
 from app.models.transaction import AccountTransactionDetails, TransactionType, FundTransfer
 from app.schemas.transaction import account_transaction_details_schema, accounts_transaction_details_schema, \
@@ -14,8 +26,34 @@ from app.schemas.transaction import account_transaction_details_schema, accounts
 from flask_jwt_extended import jwt_required
 
 
+@replays('/accounttransactiondetails')
+def replay_account_transaction_details(fund_transfer):
+    """
+        The response AccountTransactionDetailsResource.post gave for the transaction of fund_transfer
+    """
+    result = account_transaction_details_schema.dump(fund_transfer.account_transaction_details[0])
+    response = ResponseGenerator(data=result,
+                                 message="Account transaction details added successfully",
+                                 success=True,
+                                 status=HTTPStatus.OK).success_response()
+    return response.status_code, response.get_data(as_text=True)
+
+
+@replays('/fundtransfer')
+def replay_fund_transfer(fund_transfer):
+    """
+        The response FundTransferResource.post gave for fund_transfer
+    """
+    response = ResponseGenerator(data=fund_transfer_schema.dump(fund_transfer),
+                                 message="Fund transferred successfully",
+                                 success=True,
+                                 status=HTTPStatus.OK).success_response()
+    return response.status_code, response.get_data(as_text=True)
+
+
 class AccountTransactionDetailsResource(Resource):
     @jwt_required()
+    @idempotent
     def post(self):
         """
               This is POST API
@@ -34,26 +72,21 @@ class AccountTransactionDetailsResource(Resource):
                      schema:
                          AccountTransactionDetailsSchema
          """
-        # retrieve body data from input JSON
-
-        data = request.get_json()
-        errors = account_transaction_details_schema.validate(data, partial=True)
-        if errors:
-            logger.error("Missing or sending incorrect data {}".format(errors))
-            response = ResponseGenerator(data={},
-                                         message=errors,
-                                         success=False,
-                                         status=HTTPStatus.BAD_REQUEST)
-            return response.error_response()
-
         try:
-            # get bank account details
-            bank_account = BankAccount.query.filter(BankAccount.id == data['bank_account_id']).first()
+            # retrieve body data from input JSON
+            data = load_request(account_transaction_details_schema,
+                                required=("transaction_amount", "bank_account_id", "transaction_type_id",
+                                          "fund_transfer_info"))
+
+            # get bank account details, locked: the balance is written back and
+            # fold_shards() needs the row lock
+            bank_account = BankAccount.query.filter(
+                BankAccount.id == data['bank_account_id']).with_for_update().first()
             if not bank_account:
                 raise BankAccountObjectNotFound("Invalid Bank Account")
 
             # get transaction type details
-            transactions_type = TransactionType.query.filter(TransactionType.id == data['transaction_type_id']).first()
+            transactions_type = transaction_type_cache.get(data['transaction_type_id'])
             if not transactions_type:
                 raise TransactionTypeObjectNotFound("Invalid Transaction Type")
 
@@ -65,6 +98,8 @@ class AccountTransactionDetailsResource(Resource):
 
             # for debit
             elif transactions_type.transaction_type.lower() == 'debit':
+                if sharded_accounts.get(bank_account.account_number):
+                    bank_account.account_balance += fold_shards(bank_account.id)
                 if bank_account.account_balance - 1000 - data['transaction_amount'] > 0:
                     bank_account.account_balance -= data['transaction_amount']
                     db.session.add(bank_account)
@@ -79,36 +114,42 @@ class AccountTransactionDetailsResource(Resource):
             )
 
             db.session.add(fund_transfer_data)
-            db.session.commit()
+            idempotency_key = g.get('idempotency_key')
+            if idempotency_key is not None:
+                idempotency_key.fund_transfer = fund_transfer_data
+                db.session.add(idempotency_key)
+            # flushed, not committed, so the key, the balance and both rows commit together
+            db.session.flush()
             fund_transfer = fund_transfer_schema.dump(fund_transfer_data)
 
-            try:
-                # create account transaction
-                bank_account_data = AccountTransactionDetails(
-                    transaction_amount=data['transaction_amount'],
-                    transaction_status=transaction_status,
-                    bank_account_id=data['bank_account_id'],
-                    transaction_type_id=data['transaction_type_id'],
-                    fund_transfer_id=fund_transfer.get('id'),
-                    fund_transfer_info=data['fund_transfer_info']
-                )
-            except KeyError as err:
-                response = ResponseGenerator(data={},
-                                             message="Column '{}' cannot be null".format(err.args[0]),
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.success_response()
+            # create account transaction
+            bank_account_data = AccountTransactionDetails(
+                transaction_amount=data['transaction_amount'],
+                transaction_status=transaction_status,
+                bank_account_id=data['bank_account_id'],
+                transaction_type_id=data['transaction_type_id'],
+                fund_transfer_id=fund_transfer.get('id'),
+                fund_transfer_info=data['fund_transfer_info']
+            )
 
             db.session.add(bank_account_data)
-            db.session.commit()
+            db.session.flush()
             result = account_transaction_details_schema.dump(bank_account_data)
-            logger.info("Response for get request for account transaction details list {}".format(result))
+            db.session.commit()
+            mini_statement_store.record([result])
+            logger.info("Response for get request for account transaction details list %s", result)
             response = ResponseGenerator(data=result,
                                          message="Account transaction details added successfully",
                                          success=True,
                                          status=HTTPStatus.OK)
             return response.success_response()
 
+        except RequestDataInvalid as err:
+            logger.error("Missing or sending incorrect data %s", err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
         except BankAccountObjectNotFound as err:
             logger.exception(err.message)
             response = ResponseGenerator(data={},
@@ -130,7 +171,7 @@ class AccountTransactionDetailsResource(Resource):
         except Exception as err:
             logger.exception(err)
             response = ResponseGenerator(data={},
-                                         message=err,
+                                         message=str(err),
                                          success=False,
                                          status=HTTPStatus.BAD_REQUEST)
 
@@ -141,6 +182,9 @@ class AccountTransactionDetailsResource(Resource):
         """
              This is GET API
              parameters:
+                 after: Integer
+                 limit: Integer
+                 format: String
                  transaction_amount: Integer
                  transaction_date: DateTime
                  bank_account_id: Integer
@@ -155,18 +199,29 @@ class AccountTransactionDetailsResource(Resource):
                          AccountTransactionDetailsSchema
          """
         try:
-            account_transaction_details_data = AccountTransactionDetails.query.order_by(
-                AccountTransactionDetails.bank_account_id)
+            ledger = ledger_model(includes_archive(after=request.args.get('after', type=int)))
+            stream_format = requested_stream_format()
+            if stream_format:
+                logger.info("Streaming response for get request for account transaction details list")
+                rows = stream(db.session.query(ledger), ledger.id)
+                response = ResponseGenerator(data=rows,
+                                             message="Account transaction details list return successfully",
+                                             success=True,
+                                             status=HTTPStatus.OK)
+                return response.stream_response(account_transaction_details_schema, stream_format)
+
+            account_transaction_details_data, next_cursor = paginate(db.session.query(ledger), ledger.id)
             if not account_transaction_details_data:
                 raise AccountTransactionDetailsObjectNotFound("Account transaction details does not exist")
 
             result = accounts_transaction_details_schema.dump(account_transaction_details_data)
 
-            logger.info("Response for get request for account transaction details list {}".format(result))
+            logger.info("Response for get request for account transaction details list %s", result)
             response = ResponseGenerator(data=result,
                                          message="Account transaction details list return successfully",
                                          success=True,
-                                         status=HTTPStatus.OK)
+                                         status=HTTPStatus.OK,
+                                         next_cursor=next_cursor)
             return response.success_response()
         except AccountTransactionDetailsObjectNotFound as err:
             logger.exception(err.message)
@@ -191,12 +246,19 @@ class AccountTransactionDetailsResourceBankId(Resource):
              This is GET API
              call this api passing account transaction details id
              parameters:
-                 transaction_amount: Integer
-                 transaction_date: DateTime
+                 after: Integer
+                 limit: Integer
+                 format: String
                  bank_account_id: Integer
-                 transaction_type_id: Integer
-                 fund_transfer_id: Integer
+                 from_date: String, ISO date or date time, optional
+                 to_date: String, ISO date or date time, a date means the end of that day, optional
+                 transaction_type_id: Integer, optional
+                 transaction_status: String, optional
+                 min_amount: Integer, optional
+                 max_amount: Integer, optional
              responses:
+                 400:
+                     description: Invalid filter
                  404:
                      description: Account transaction details with this id does not exist
                  200:
@@ -209,19 +271,44 @@ class AccountTransactionDetailsResourceBankId(Resource):
             if not bank_account_id:
                 raise BankAccountObjectNotFound("Please provide valid bank account id")
 
-            bank_account_data = AccountTransactionDetails.query.filter(
-                AccountTransactionDetails.bank_account_id == bank_account_id).all()
+            filters = history_filters(request.args)
+            # archived rows are read only when the range reaches back to them
+            date_range = filters.get('from_date') is not None or filters.get('to_date') is not None
+            ledger = ledger_model(includes_archive([bank_account_id], filters.get('from_date'),
+                                                   None if date_range else request.args.get('after', type=int)))
+            # a date range is read in (transaction_date, id) order from its index
+            query, order_column = filter_history(db.session.query(ledger).filter(
+                ledger.bank_account_id == bank_account_id), filters, ledger)
+
+            stream_format = requested_stream_format()
+            if stream_format:
+                logger.info("Streaming response for get request for account transaction details list")
+                rows = stream(query, ledger.id, order_column)
+                response = ResponseGenerator(data=rows,
+                                             message="Account transaction details list return successfully",
+                                             success=True,
+                                             status=HTTPStatus.OK)
+                return response.stream_response(account_transaction_details_schema, stream_format)
+
+            bank_account_data, next_cursor = paginate(query, ledger.id, order_column)
             if not bank_account_data:
                 raise AccountTransactionDetailsObjectNotFound("Transaction with this bank account not found")
 
             result = accounts_transaction_details_schema.dump(bank_account_data)
 
-            logger.info("Response for get request for account transaction details list {}".format(result))
+            logger.info("Response for get request for account transaction details list %s", result)
             response = ResponseGenerator(data=result,
                                          message="Account transaction details list return successfully",
                                          success=True,
-                                         status=HTTPStatus.OK)
+                                         status=HTTPStatus.OK,
+                                         next_cursor=next_cursor)
             return response.success_response()
+        except RequestDataInvalid as err:
+            logger.error("Missing or sending incorrect data %s", err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
         except BankAccountObjectNotFound as err:
             logger.exception(err.message)
             response = ResponseGenerator(data={},
@@ -244,6 +331,58 @@ class AccountTransactionDetailsResourceBankId(Resource):
         return response.error_response()
 
 
+class AccountTransactionDetailsExportResource(Resource):
+    @jwt_required()
+    def get(self):
+        """
+             This is GET API
+             Download the ledger rows of one or more bank accounts as CSV
+             parameters:
+                 bank_account_id: String, comma separated bank account ids
+                 from_date: String, ISO date or date time, optional
+                 to_date: String, ISO date or date time, a date means the end of that day, optional
+             responses:
+                 404:
+                     description: Bank account does not exist
+                 400:
+                     description: Invalid bank account ids or dates
+                 200:
+                     description: text/csv, one line per account transaction ordered by account, transaction date and id
+         """
+        try:
+            bank_account_ids = parse_bank_account_ids(request.args.get("bank_account_id"))
+            date_from = parse_transaction_date(request.args.get("from_date"), "from_date")
+            date_to = parse_transaction_date(request.args.get("to_date"), "to_date", end_of_day=True)
+
+            rows = export_rows(bank_account_ids, date_from, date_to)
+            logger.info("Streaming CSV export of account transactions for bank accounts %s", bank_account_ids)
+            response = ResponseGenerator(data=csv_chunks(rows),
+                                         message="Account transaction details exported successfully",
+                                         success=True,
+                                         status=HTTPStatus.OK)
+            return response.csv_response("transactions.csv")
+        except RequestDataInvalid as err:
+            logger.error("Missing or sending incorrect data %s", err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
+        except BankAccountObjectNotFound as err:
+            logger.exception(err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.NOT_FOUND)
+        except Exception as err:
+            logger.exception(err)
+            response = ResponseGenerator(data={},
+                                         message=str(err),
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
+
+        return response.error_response()
+
+
 class AccountTransactionDetailsResourceId(Resource):
     @jwt_required()
     def put(self, account_transaction_details_id):
@@ -266,21 +405,14 @@ class AccountTransactionDetailsResourceId(Resource):
          """
         try:
             # retrieve body data from input JSON
-            data = request.get_json()
-            errors = account_transaction_details_schema.validate(data, partial=True)
-            if errors:
-                logger.error("Missing or sending incorrect data {}".format(errors))
-                response = ResponseGenerator(data={},
-                                             message=errors,
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.error_response()
+            data = load_request(account_transaction_details_schema)
 
             account_transaction_details_data = AccountTransactionDetails.query.filter(
                 AccountTransactionDetails.id == account_transaction_details_id).first()
             if not account_transaction_details_data:
                 raise AccountTransactionDetailsObjectNotFound("Account transaction details with this id does not exist")
 
+            bank_account_id = account_transaction_details_data.bank_account_id
             account_transaction_details_data.transaction_amount = data.get('transaction_amount',
                                                                            account_transaction_details_data.transaction_amount)
             account_transaction_details_data.bank_account_id = data.get('bank_account_id',
@@ -294,14 +426,21 @@ class AccountTransactionDetailsResourceId(Resource):
 
             db.session.commit()
             result = account_transaction_details_schema.dump(account_transaction_details_data)
+            mini_statement_store.invalidate(bank_account_id, result['bank_account_id'])
 
-            logger.info("Response for put with id request for account transaction details {}".format(result))
+            logger.info("Response for put with id request for account transaction details %s", result)
             response = ResponseGenerator(data=result,
                                          message="Account transaction details with this id updated successfully",
                                          success=True,
                                          status=HTTPStatus.OK)
             return response.success_response()
 
+        except RequestDataInvalid as err:
+            logger.error("Missing or sending incorrect data %s", err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
         except AccountTransactionDetailsObjectNotFound as err:
             logger.exception(err.message)
             response = ResponseGenerator(data={},
@@ -334,38 +473,30 @@ class TransactionTypeResource(Resource):
                          TransactionTypeSchema
          """
         try:
-            data = request.get_json()
-            errors = transaction_type_schema.validate(data, partial=True)
-            if errors:
-                logger.error("Missing or sending incorrect data {}".format(errors))
-                response = ResponseGenerator(data={},
-                                             message=errors,
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.error_response()
-
-            try:
-                transaction_type_data = TransactionType(
-                    transaction_type=data['transaction_type'])
-            except KeyError as err:
-                response = ResponseGenerator(data={},
-                                             message="Column '{}' cannot be null".format(err.args[0]),
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.success_response()
+            data = load_request(transaction_type_schema, required=("transaction_type",))
+
+            transaction_type_data = TransactionType(
+                transaction_type=data['transaction_type'])
 
             if transaction_type_data.transaction_type.lower() not in ["credit", "debit"]:
                 raise TransactionTypeObjectNotFound("Transaction type does not exist")
 
             db.session.add(transaction_type_data)
             db.session.commit()
+            transaction_type_cache.invalidate()
             result = transaction_type_schema.dump(transaction_type_data)
-            logger.info("Response for post request for transaction type {}".format(result))
+            logger.info("Response for post request for transaction type %s", result)
             response = ResponseGenerator(data=result,
                                          message="Transaction type list inserted successfully",
                                          success=True,
                                          status=HTTPStatus.OK)
             return response.success_response()
+        except RequestDataInvalid as err:
+            logger.error("Missing or sending incorrect data %s", err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
         except TransactionTypeObjectNotFound as err:
             logger.exception(err.message)
             response = ResponseGenerator(data={},
@@ -401,7 +532,7 @@ class TransactionTypeResource(Resource):
                 raise TransactionTypeObjectNotFound("Transaction type does not exist")
 
             result = transactions_type_schema.dump(transaction_type_data)
-            logger.info("Response for get request for transaction type list {}".format(result))
+            logger.info("Response for get request for transaction type list %s", result)
             response = ResponseGenerator(data=result,
                                          message="Transaction type list return successfully",
                                          success=True,
@@ -446,7 +577,7 @@ class TransactionTypeResourceId(Resource):
 
             result = transaction_type_schema.dump(transaction_type_data)
 
-            logger.info("Response for get with id request for transaction type list {}".format(result))
+            logger.info("Response for get with id request for transaction type list %s", result)
             response = ResponseGenerator(data=result,
                                          message="Transaction type with this  id return successfully",
                                          success=True,
@@ -484,15 +615,7 @@ class TransactionTypeResourceId(Resource):
          """
         try:
             # retrieve body data from input JSON
-            data = request.get_json()
-            errors = transaction_type_schema.validate(data, partial=True)
-            if errors:
-                logger.error("Missing or sending incorrect data {}".format(errors))
-                response = ResponseGenerator(data={},
-                                             message=errors,
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.error_response()
+            data = load_request(transaction_type_schema)
 
             transaction_type_data = TransactionType.query.filter(TransactionType.id == transaction_type_id).first()
             if not transaction_type_data:
@@ -501,14 +624,21 @@ class TransactionTypeResourceId(Resource):
             transaction_type_data.transaction_type = data.get('transaction_type',
                                                               transaction_type_data.transaction_type)
             db.session.commit()
+            transaction_type_cache.invalidate()
             result = transaction_type_schema.dump(transaction_type_data)
 
-            logger.info("Response for put with id request for transaction type {}".format(result))
+            logger.info("Response for put with id request for transaction type %s", result)
             response = ResponseGenerator(data=result,
                                          message="Transaction type with this id updated successfully",
                                          success=True,
                                          status=HTTPStatus.OK)
             return response.success_response()
+        except RequestDataInvalid as err:
+            logger.error("Missing or sending incorrect data %s", err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
         except TransactionTypeObjectNotFound as err:
             logger.exception(err.message)
             response = ResponseGenerator(data={},
@@ -546,6 +676,7 @@ class TransactionTypeResourceId(Resource):
 
             db.session.delete(transaction_type_data)
             db.session.commit()
+            transaction_type_cache.invalidate()
 
             logger.info("Response for delete request for transaction type:"
                         "Transaction type with this id deleted successfully")
@@ -569,6 +700,7 @@ class TransactionTypeResourceId(Resource):
 
 class FundTransferResource(Resource):
     @jwt_required()
+    @idempotent
     def post(self):
         """
              This is POST API
@@ -584,98 +716,27 @@ class FundTransferResource(Resource):
                          FundTransferSchema
          """
         try:
-            data = request.get_json()
-            errors = fund_transfer_schema.validate(data, partial=True)
-            if errors:
-                logger.error("Missing or sending incorrect data {}".format(errors))
-                response = ResponseGenerator(data={},
-                                             message=errors,
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.error_response()
-
-            try:
-                # fund transfer type - funds transfer
-                fund_transfer_data = FundTransfer(
-                    from_account=data['from_account'],
-                    to_account=data['to_account'])
-            except KeyError as err:
-                response = ResponseGenerator(data={},
-                                             message="Column '{}' cannot be null".format(err.args[0]),
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.success_response()
-
-            db.session.add(fund_transfer_data)
-            db.session.commit()
-            result = fund_transfer_schema.dump(fund_transfer_data)
+            data = load_request(fund_transfer_schema, required=("from_account", "to_account", "transaction_amount"))
 
-            # add transaction 'from bank account' as transaction type 'debit'
-            from_bank_account = BankAccount.query.filter(BankAccount.account_number == data['from_account']).first()
-            if not from_bank_account:
-                raise BankAccountObjectNotFound("From bank account details does not exist")
-
-            transaction_type_debit = TransactionType.query.filter(TransactionType.transaction_type == "debit").first()
-            if not transaction_type_debit:
-                raise TransactionTypeObjectNotFound("Transaction type does not exist")
-
-            # add transaction 'to bank account' as transaction type 'credit'
-            to_bank_account = BankAccount.query.filter(BankAccount.account_number == data['to_account']).first()
-            if not to_bank_account:
-                raise BankAccountObjectNotFound("To bank account details does not exist")
-
-            transaction_type_credit = TransactionType.query.filter(TransactionType.transaction_type == "credit").first()
-            if not transaction_type_credit:
-                raise TransactionTypeObjectNotFound("Transaction type does not exist")
+            fund_transfer_data = transfer_funds(from_account=data['from_account'],
+                                                to_account=data['to_account'],
+                                                transaction_amount=data['transaction_amount'],
+                                                idempotency_key=g.get('idempotency_key'))
 
-            if from_bank_account.account_balance - 1000 - data['transaction_amount'] > 0:
-                from_bank_account.account_balance -= data['transaction_amount']
-                db.session.add(from_bank_account)
-                to_bank_account.account_balance += data['transaction_amount']
-                db.session.add(to_bank_account)
-                transaction_status = "success"
-            else:
-                transaction_status = "failed"
-
-            # create account transaction for from bank account
-            account_transaction_data = AccountTransactionDetails(
-                transaction_amount=data['transaction_amount'],
-                transaction_status=transaction_status,
-                bank_account_id=from_bank_account.id,
-                transaction_type_id=transaction_type_debit.id,
-                fund_transfer_id=result.get('id'),
-                fund_transfer_info="Funds Transfer"
-            )
-            db.session.add(account_transaction_data)
-            db.session.commit()
-            account_transaction_details_schema.dump(account_transaction_data)
-
-            # create account transaction for to bank account
-            account_transaction_data = AccountTransactionDetails(
-                transaction_amount=data['transaction_amount'],
-                transaction_status=transaction_status,
-                bank_account_id=to_bank_account.id,
-                transaction_type_id=transaction_type_credit.id,
-                fund_transfer_id=result.get('id'),
-                fund_transfer_info="Funds Received"
-            )
-            db.session.add(account_transaction_data)
-            db.session.commit()
-            account_transaction_details_schema.dump(account_transaction_data)
-
-            logger.info("Response for post request for fund transfer {}".format(result))
-            if transaction_status == 'success':
-                response = ResponseGenerator(data=result,
-                                             message="Fund transferred successfully",
-                                             success=True,
-                                             status=HTTPStatus.OK)
-            else:
-                response = ResponseGenerator(data=result,
-                                             message="Fund transfer declined, Please maintain minimum balance in account",
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
+            result = fund_transfer_schema.dump(fund_transfer_data)
+            logger.info("Response for post request for fund transfer %s", result)
+            response = ResponseGenerator(data=result,
+                                         message="Fund transferred successfully",
+                                         success=True,
+                                         status=HTTPStatus.OK)
             return response.success_response()
 
+        except RequestDataInvalid as err:
+            logger.error("Missing or sending incorrect data %s", err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
         except BankAccountObjectNotFound as err:
             logger.exception(err.message)
             response = ResponseGenerator(data={},
@@ -688,10 +749,16 @@ class FundTransferResource(Resource):
                                          message=err.message,
                                          success=False,
                                          status=HTTPStatus.NOT_FOUND)
+        except FundTransferDeclined as err:
+            logger.exception(err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
         except Exception as err:
             logger.exception(err)
             response = ResponseGenerator(data={},
-                                         message=err,
+                                         message=str(err),
                                          success=False,
                                          status=HTTPStatus.BAD_REQUEST)
 
@@ -702,6 +769,9 @@ class FundTransferResource(Resource):
         """
              This is GET API
              parameters:
+                 after: Integer
+                 limit: Integer
+                 format: String
                  source: String
                  destination: String
              responses:
@@ -713,18 +783,87 @@ class FundTransferResource(Resource):
                          FundTransferSchema
          """
         try:
-            fund_transfer_data = FundTransfer.query.all()
+            stream_format = requested_stream_format()
+            if stream_format:
+                logger.info("Streaming response for get request for fund transfer list")
+                rows = stream(FundTransfer.query, FundTransfer.id)
+                response = ResponseGenerator(data=rows,
+                                             message="Fund transfer list return successfully",
+                                             success=True,
+                                             status=HTTPStatus.OK)
+                return response.stream_response(fund_transfer_schema, stream_format)
+
+            fund_transfer_data, next_cursor = paginate(FundTransfer.query, FundTransfer.id)
             if not fund_transfer_data:
                 raise FundTransferObjectNotFound("Fund transfer does not exist")
 
             result = funds_transfer_schema.dump(fund_transfer_data)
-            logger.info("Response for get request for fund transfer list {}".format(result))
+            logger.info("Response for get request for fund transfer list %s", result)
             response = ResponseGenerator(data=result,
                                          message="Fund transfer list return successfully",
                                          success=True,
+                                         status=HTTPStatus.OK,
+                                         next_cursor=next_cursor)
+            return response.success_response()
+        except FundTransferObjectNotFound as err:
+            logger.exception(err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.NOT_FOUND)
+        except Exception as err:
+            logger.exception(err)
+            response = ResponseGenerator(data={},
+                                         message=err,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
+
+        return response.error_response()
+
+
+class FundTransferBatchResource(Resource):
+    @jwt_required()
+    def post(self):
+        """
+             This is POST API
+             Apply a list of fund transfers in order
+             parameters:
+                 transfers: List
+                     from_account: String
+                     to_account: String
+                     transaction_amount: Integer
+             responses:
+                 400:
+                     description: Fund transfer batch is not a list or is too large
+                 200:
+                     description: Fund transfer batch processed, one result per transfer
+         """
+        try:
+            data = request.get_json()
+            transfers = data.get('transfers') if isinstance(data, dict) else data
+            if not isinstance(transfers, list) or not transfers:
+                raise FundTransferObjectNotFound("Please provide a list of fund transfers")
+            if len(transfers) > app1.config['FUND_TRANSFER_BATCH_MAX']:
+                raise FundTransferObjectNotFound("At most {} fund transfers are allowed per batch".format(
+                    app1.config['FUND_TRANSFER_BATCH_MAX']))
+
+            result = transfer_funds_batch(transfers)
+            succeeded = sum(1 for item in result if item['success'])
+            logger.info("Response for post request for fund transfer batch: %s succeeded, %s failed",
+                        succeeded, len(result) - succeeded)
+            response = ResponseGenerator(data=result,
+                                         message="Fund transfer batch processed, {} succeeded, {} failed".format(
+                                             succeeded, len(result) - succeeded),
+                                         success=True,
                                          status=HTTPStatus.OK)
             return response.success_response()
         except FundTransferObjectNotFound as err:
+            logger.exception(err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
+        except TransactionTypeObjectNotFound as err:
             logger.exception(err.message)
             response = ResponseGenerator(data={},
                                          message=err.message,
@@ -764,7 +903,7 @@ class FundTransferResourceId(Resource):
 
             result = fund_transfer_schema.dump(fund_transfer_data)
 
-            logger.info("Response for get with id request for fund transfer list {}".format(result))
+            logger.info("Response for get with id request for fund transfer list %s", result)
             response = ResponseGenerator(data=result,
                                          message="Fund transfer with this  id return successfully",
                                          success=True,
@@ -803,15 +942,7 @@ class FundTransferResourceId(Resource):
          """
         try:
             # retrieve body data from input JSON
-            data = request.get_json()
-            errors = fund_transfer_schema.validate(data, partial=True)
-            if errors:
-                logger.error("Missing or sending incorrect data {}".format(errors))
-                response = ResponseGenerator(data={},
-                                             message=errors,
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.error_response()
+            data = load_request(fund_transfer_schema)
 
             fund_transfer_data = FundTransfer.query.filter(FundTransfer.id == fund_transfer_id).first()
             if not fund_transfer_data:
@@ -823,12 +954,18 @@ class FundTransferResourceId(Resource):
             db.session.commit()
             result = fund_transfer_schema.dump(fund_transfer_data)
 
-            logger.info("Response for put with id request for fund transfer {}".format(result))
+            logger.info("Response for put with id request for fund transfer %s", result)
             response = ResponseGenerator(data=result,
                                          message="Fund transfer with this id updated successfully",
                                          success=True,
                                          status=HTTPStatus.OK)
             return response.success_response()
+        except RequestDataInvalid as err:
+            logger.error("Missing or sending incorrect data %s", err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
         except FundTransferObjectNotFound as err:
             logger.exception(err.message)
             response = ResponseGenerator(data={},
@@ -849,16 +986,28 @@ class MiniStatementResources(Resource):
     @jwt_required()
     def get(self, bank_account_id):
         try:
-            bank_account_data = BankAccount.query.filter(BankAccount.id == bank_account_id).first()
-            if bank_account_data:
-                mini_statement_data = AccountTransactionDetails.query.filter(
-                    AccountTransactionDetails.bank_account_id == bank_account_id).order_by(
-                    desc(AccountTransactionDetails.id)).limit(10)
-                if not mini_statement_data:
-                    raise MiniStatementObjectNotFound("Account transaction details records does not exist")
-
-            result = accounts_transaction_details_schema.dump(mini_statement_data)
-            logger.info("Response for get request for account transaction details list of records {}".format(result))
+            result = mini_statement_store.get(bank_account_id)
+            if result is None:
+                # the statement is held for every client, so it is read from the primary
+                with using_primary():
+                    bank_account_data = BankAccount.query.filter(BankAccount.id == bank_account_id).first()
+                    if not bank_account_data:
+                        raise MiniStatementObjectNotFound("Bank account does not exist")
+
+                    mini_statement_data = AccountTransactionDetails.query.filter(
+                        AccountTransactionDetails.bank_account_id == bank_account_id).order_by(
+                        desc(AccountTransactionDetails.id)).limit(app1.config['MINI_STATEMENT_SIZE']).all()
+                    # fewer hot rows than a statement: the rest may be archived
+                    if len(mini_statement_data) < app1.config['MINI_STATEMENT_SIZE'] and \
+                            includes_archive([bank_account_id]):
+                        ledger = ledger_model(True)
+                        mini_statement_data = db.session.query(ledger).filter(
+                            ledger.bank_account_id == bank_account_id).order_by(
+                            desc(ledger.id)).limit(app1.config['MINI_STATEMENT_SIZE']).all()
+                    result = accounts_transaction_details_schema.dump(mini_statement_data)
+                    result = mini_statement_store.load(bank_account_id, result)
+
+            logger.info("Response for get request for account transaction details list of records %s", result)
             response = ResponseGenerator(data=result,
                                          message="Account transaction details list of records return successfully",
                                          success=True,
@@ -1,14 +1,21 @@
-from app import db
+from app import app1, db
 from app.common.log import logger
+from app.common.pagination import paginate, stream
+from app.common.reference_cache import user_type_cache
+from app.common.request_parser import load_request
+from app.common.user_bulk import create_users_bulk
 from app.models.user import User, UserType
 from flask import request
 from flask_restplus import Resource
-from app.schemas.user import user_schema, users_schema, user_type_schema, users_type_schema
-from app.common.response_genarator import ResponseGenerator
+from sqlalchemy.exc import IntegrityError
+from app.schemas.user import user_schema, users_schema, user_type_schema, users_type_schema, \
+    required_fields
+from app.common.response_genarator import ResponseGenerator, requested_stream_format
 from http import HTTPStatus
-from app.common.custom_exception import UserObjectNotFound, UserTypeObjectNotFound
+from app.common.custom_exception import UserObjectNotFound, UserTypeObjectNotFound, PasswordHashingBusy, \
+    RequestDataInvalid
+from app.common.password import password_hasher
 from flask_jwt_extended import jwt_required
-import bcrypt
 
 
 def is_email_id_exists(email_id):
@@ -45,15 +52,7 @@ class UserResources(Resource):
         """
         try:
             # retrieve body data from input JSON
-            data = request.get_json()
-            errors = user_schema.validate(data, partial=True)
-            if errors:
-                logger.error("Missing or sending incorrect data {}".format(errors))
-                response = ResponseGenerator(data={},
-                                             message=errors,
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.error_response()
+            data = load_request(user_schema, required=required_fields)
 
             if is_email_id_exists(data['email_id']):
                 logger.error("Missing or sending incorrect data to create an activity"
@@ -76,38 +75,37 @@ class UserResources(Resource):
                 return response.error_response()
 
             # get user type details
-            user_type = UserType.query.filter(UserType.id == data['user_type_id']).first()
+            user_type = user_type_cache.get(data['user_type_id'])
             if not user_type:
                 raise UserTypeObjectNotFound("Invalid user Type id")
 
-            try:
-                user_data = User(
-                    first_name=data['first_name'],
-                    last_name=data['last_name'],
-                    address=data['address'],
-                    mobile_number=data['mobile_number'],
-                    email_id=data['email_id'],
-                    password=bcrypt.hashpw(data['password'].encode('utf-8'), bcrypt.gensalt()),
-                    is_deleted=0,
-                    user_type_id=data['user_type_id'])
-            except KeyError as err:
-                response = ResponseGenerator(data={},
-                                             message="Column '{}' cannot be null".format(err.args[0]),
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.success_response()
+            user_data = User(
+                first_name=data['first_name'],
+                last_name=data['last_name'],
+                address=data['address'],
+                mobile_number=data['mobile_number'],
+                email_id=data['email_id'],
+                password=password_hasher.hash(data['password']),
+                is_deleted=0,
+                user_type_id=data['user_type_id'])
 
             db.session.add(user_data)
             db.session.commit()
             result = user_schema.dump(user_data)
 
-            logger.info("Response for post request for user {}".format(result))
+            logger.info("Response for post request for user %s", result)
             response = ResponseGenerator(data=result,
                                          message="Users record inserted successfully",
                                          success=True,
                                          status=HTTPStatus.OK)
             return response.success_response()
 
+        except RequestDataInvalid as err:
+            logger.error("Missing or sending incorrect data %s", err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
         except UserObjectNotFound:
             logger.exception("User does not exist")
             response = ResponseGenerator(data={},
@@ -120,6 +118,12 @@ class UserResources(Resource):
                                          message=err.message,
                                          success=False,
                                          status=HTTPStatus.NOT_FOUND)
+        except PasswordHashingBusy as err:
+            logger.warning(err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.SERVICE_UNAVAILABLE)
         except Exception as err:
             logger.exception(err)
             response = ResponseGenerator(data={},
@@ -134,6 +138,9 @@ class UserResources(Resource):
         """
              This is GET API
              parameters:
+                after: int
+                limit: int
+                format: string
                 id:int
                 first_name: string
                 last_name: string
@@ -152,17 +159,28 @@ class UserResources(Resource):
                         UserSchema
         """
         try:
-            users = User.query.filter(User.is_deleted == 0)
-            if users.count() == 0:
+            stream_format = requested_stream_format()
+            if stream_format:
+                logger.info("Streaming response for get request for user list")
+                rows = stream(User.query.filter(User.is_deleted == 0), User.id)
+                response = ResponseGenerator(data=rows,
+                                             message="Users list return successfully",
+                                             success=True,
+                                             status=HTTPStatus.OK)
+                return response.stream_response(user_schema, stream_format)
+
+            users, next_cursor = paginate(User.query.filter(User.is_deleted == 0), User.id)
+            if not users:
                 raise UserObjectNotFound("User does not exist")
 
             result = users_schema.dump(users)
 
-            logger.info("Response for get request for user list {}".format(result))
+            logger.info("Response for get request for user list %s", result)
             response = ResponseGenerator(data=result,
                                          message="Users list return successfully",
                                          success=True,
-                                         status=HTTPStatus.OK)
+                                         status=HTTPStatus.OK,
+                                         next_cursor=next_cursor)
             return response.success_response()
         except UserObjectNotFound as err:
             logger.exception(err.message)
@@ -180,6 +198,70 @@ class UserResources(Resource):
         return response.error_response()
 
 
+class UserBulkResource(Resource):
+    @jwt_required()
+    def post(self):
+        """
+            This is POST API
+            Create many users at once, e.g. to migrate the customers of another bank
+            parameters:
+                users: List
+                    first_name: string
+                    last_name: string
+                    address: string
+                    mobile_number: string
+                    email_id: string
+                    password: string
+                    user_type_id: integer
+            responses:
+                400:
+                    description: Users is not a list or is too large
+                409:
+                    description: Some of the users were created meanwhile by another request
+                200:
+                    description: Users processed, one result per user
+        """
+        try:
+            data = request.get_json(silent=True)
+            users = data.get('users') if isinstance(data, dict) else data
+            if not isinstance(users, list) or not users:
+                raise RequestDataInvalid("Please provide a list of users")
+            if len(users) > app1.config['USER_BULK_MAX']:
+                raise RequestDataInvalid("At most {} users are allowed per request".format(
+                    app1.config['USER_BULK_MAX']))
+
+            result = create_users_bulk(users)
+            succeeded = sum(1 for item in result if item['success'])
+            logger.info("Response for post request for user bulk: %s succeeded, %s failed",
+                        succeeded, len(result) - succeeded)
+            response = ResponseGenerator(data=result,
+                                         message="Users processed, {} succeeded, {} failed".format(
+                                             succeeded, len(result) - succeeded),
+                                         success=True,
+                                         status=HTTPStatus.OK)
+            return response.success_response()
+        except RequestDataInvalid as err:
+            logger.error(err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
+        except IntegrityError as err:
+            logger.exception(err)
+            response = ResponseGenerator(data={},
+                                         message="Some of the users were created meanwhile, please retry",
+                                         success=False,
+                                         status=HTTPStatus.CONFLICT)
+        except Exception as err:
+            logger.exception(err)
+            response = ResponseGenerator(data={},
+                                         message=err,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
+
+        return response.error_response()
+
+
 class UserResourcesId(Resource):
     @jwt_required()
     def get(self, user_id):
@@ -212,7 +294,7 @@ class UserResourcesId(Resource):
 
             result = user_schema.dump(user)
 
-            logger.info("Response for get with id request for user {}".format(result))
+            logger.info("Response for get with id request for user %s", result)
             response = ResponseGenerator(data=result,
                                          message="User with this id return successfully",
                                          success=True,
@@ -258,15 +340,7 @@ class UserResourcesId(Resource):
         """
         try:
             # retrieve body data from input JSON
-            data = request.get_json()
-            errors = user_schema.validate(data, partial=True)
-            if errors:
-                logger.error("Missing or sending incorrect data {}".format(errors))
-                response = ResponseGenerator(data={},
-                                             message=errors,
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.error_response()
+            data = load_request(user_schema)
 
             if data.get('email_id') and is_email_id_exists(data.get('email_id')):
                 logger.error("Missing or sending incorrect data to create an activity."
@@ -292,7 +366,8 @@ class UserResourcesId(Resource):
             if not user:
                 raise UserObjectNotFound("User with this id does not exist")
 
-            hashed = bcrypt.hashpw(data.get('password', user.password).encode('utf-8'), bcrypt.gensalt())
+            # only hash a new password, the stored one is already a hash
+            hashed = password_hasher.hash(data['password']) if data.get('password') else user.password
 
             user.first_name = data.get('first_name', user.first_name)
             user.last_name = data.get('last_name', user.last_name)
@@ -305,18 +380,30 @@ class UserResourcesId(Resource):
             db.session.commit()
             result = user_schema.dump(user)
 
-            logger.info("Response for put request for user {}".format(result))
+            logger.info("Response for put request for user %s", result)
             response = ResponseGenerator(data=result,
                                          message="User with this id updated successfully",
                                          success=True,
                                          status=HTTPStatus.OK)
             return response.success_response()
+        except RequestDataInvalid as err:
+            logger.error("Missing or sending incorrect data %s", err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
         except UserObjectNotFound as err:
             logger.exception(err.message)
             response = ResponseGenerator(data={},
                                          message=err.message,
                                          success=False,
                                          status=HTTPStatus.NOT_FOUND)
+        except PasswordHashingBusy as err:
+            logger.warning(err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.SERVICE_UNAVAILABLE)
         except Exception as err:
             logger.exception(err)
             response = ResponseGenerator(data={},
@@ -393,38 +480,31 @@ class UserTypeResource(Resource):
         """
         try:
             # retrieve body data from input JSON
-            data = request.get_json()
-            errors = user_type_schema.validate(data, partial=True)
-            if errors:
-                logger.error("Missing or sending incorrect data {}".format(errors))
-                response = ResponseGenerator(data={},
-                                             message=errors,
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.error_response()
-            try:
-                user_type_data = UserType(
-                    user_type=data['user_type'])
-            except KeyError as err:
-                response = ResponseGenerator(data={},
-                                             message="Column '{}' cannot be null".format(err.args[0]),
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.success_response()
+            data = load_request(user_type_schema, required=("user_type",))
+
+            user_type_data = UserType(
+                user_type=data['user_type'])
 
             if user_type_data.user_type.lower() not in ["customer", "admin", "other"]:
                 raise UserTypeObjectNotFound("Please insert correct user type")
 
             db.session.add(user_type_data)
             db.session.commit()
+            user_type_cache.invalidate()
             result = user_type_schema.dump(user_type_data)
 
-            logger.info("Response for post request for user type {}".format(result))
+            logger.info("Response for post request for user type %s", result)
             response = ResponseGenerator(data=result,
                                          message="User type record inserted successfully",
                                          success=True,
                                          status=HTTPStatus.OK)
             return response.success_response()
+        except RequestDataInvalid as err:
+            logger.error("Missing or sending incorrect data %s", err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
         except UserTypeObjectNotFound as err:
             logger.exception(err.message)
             response = ResponseGenerator(data={},
@@ -462,7 +542,7 @@ class UserTypeResource(Resource):
 
             result = users_type_schema.dump(users_type_data)
 
-            logger.info("Response for get request for user type list {}".format(result))
+            logger.info("Response for get request for user type list %s", result)
             response = ResponseGenerator(data=result,
                                          message="Users type list return successfully",
                                          success=True,
@@ -508,7 +588,7 @@ class UserTypeResourceId(Resource):
 
             result = user_type_schema.dump(user_type_data)
 
-            logger.info("Response for get with id request for user type {}".format(result))
+            logger.info("Response for get with id request for user type %s", result)
             response = ResponseGenerator(data=result,
                                          message="User type id return successfully",
                                          success=True,
@@ -547,15 +627,7 @@ class UserTypeResourceId(Resource):
         """
         try:
             # retrieve body data from input JSON
-            data = request.get_json()
-            errors = user_type_schema.validate(data, partial=True)
-            if errors:
-                logger.error("Missing or sending incorrect data {}".format(errors))
-                response = ResponseGenerator(data={},
-                                             message=errors,
-                                             success=False,
-                                             status=HTTPStatus.BAD_REQUEST)
-                return response.error_response()
+            data = load_request(user_type_schema)
 
             user_type_data = UserType.query.filter(UserType.id == user_type_id).first()
             if not user_type_data:
@@ -563,14 +635,21 @@ class UserTypeResourceId(Resource):
 
             user_type_data.user_type = data.get('user_type', user_type_data.user_type)
             db.session.commit()
+            user_type_cache.invalidate()
             result = user_type_schema.dump(user_type_data)
 
-            logger.info("Response for put with id request for user type {}".format(result))
+            logger.info("Response for put with id request for user type %s", result)
             response = ResponseGenerator(data=result,
                                          message="Users type record updated successfully",
                                          success=True,
                                          status=HTTPStatus.OK)
             return response.success_response()
+        except RequestDataInvalid as err:
+            logger.error("Missing or sending incorrect data %s", err.message)
+            response = ResponseGenerator(data={},
+                                         message=err.message,
+                                         success=False,
+                                         status=HTTPStatus.BAD_REQUEST)
         except UserTypeObjectNotFound as err:
             logger.exception(err.message)
             response = ResponseGenerator(data={},
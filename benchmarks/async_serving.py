@@ -0,0 +1,143 @@
+"""
+    Compare the threaded Flask server (run.py) with the asyncio server
+    (run_async.py) as the number of concurrent keep-alive connections grows.
+    Both run as one process on the same SQLite file; each connection loops
+    GET /bankaccount/<id> and GET /ministatement/<id>. Prints requests/sec,
+    p50/p99 latency and the threads each server needed for the connections.
+
+    $ python -m benchmarks.async_serving [duration] [concurrency ...]
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from flask_jwt_extended import create_access_token
+from benchmarks.common import setup_database, BENCHMARK_EMAIL_ID
+
+SYNC_SERVER = ("from app import app1\n"
+               "import app.routes\n"
+               "app1.run(host='127.0.0.1', port={port}, threaded=True, debug=False, use_reloader=False)")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(command, port, env):
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise SystemExit("server on port {} did not start".format(port))
+
+
+def thread_count(pid):
+    with open("/proc/{}/status".format(pid)) as status:
+        for line in status:
+            if line.startswith("Threads:"):
+                return int(line.split()[1])
+    return None
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed")
+    length, keep_alive = 0, status_line.startswith(b"HTTP/1.1")
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "connection":
+            keep_alive = value == "keep-alive" or (keep_alive and value != "close")
+    await reader.readexactly(length)
+    return int(status_line.split()[1]), keep_alive
+
+
+async def connection(port, paths, headers, deadline, latencies, errors):
+    reader = writer = None
+    index = 0
+    while time.perf_counter() < deadline:
+        if writer is None:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        path = paths[index % len(paths)]
+        index += 1
+        start = time.perf_counter()
+        writer.write("GET {} HTTP/1.1\r\nHost: 127.0.0.1\r\n{}\r\n".format(path, headers).encode())
+        try:
+            status, keep_alive = await read_response(reader)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            errors.append(path)
+            writer.close()
+            writer = None
+            continue
+        latencies.append(time.perf_counter() - start)
+        if status != 200:
+            errors.append(path)
+        if not keep_alive:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(port, concurrency, duration, paths, headers):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*[connection(port, paths[i::concurrency] or paths, headers, deadline, latencies, errors)
+                           for i in range(concurrency)])
+    return latencies, errors
+
+
+def main(duration=5, *concurrency_levels):
+    concurrency_levels = concurrency_levels or (1, 16, 64, 256)
+    path = os.path.join(tempfile.gettempdir(), "bank_system_async_benchmark.db")
+    if os.path.exists(path):
+        os.remove(path)
+    uri = "sqlite:///{}".format(path)
+    setup_database(accounts=1000, uri=uri)
+    headers = "Authorization: Bearer {}\r\n".format(create_access_token(identity={"email_id": BENCHMARK_EMAIL_ID}))
+    paths = ["/bankaccount/{}".format(i) for i in range(1, 1001)] + \
+            ["/ministatement/{}".format(i) for i in range(1, 1001)]
+
+    env = dict(os.environ, DATABASE_URL=uri, LOG_LEVEL="WARNING", PYTHONPATH=os.getcwd())
+    servers = {}
+    port = free_port()
+    servers["threaded flask"] = (start_server([sys.executable, "-c", SYNC_SERVER.format(port=port)], port, env), port)
+    port = free_port()
+    servers["asyncio"] = (start_server([sys.executable, "-m", "uvicorn", "app.asgi:application", "--port", str(port),
+                                        "--log-level", "warning"], port, env), port)
+    try:
+        print("{:<16} {:>11} {:>10} {:>9} {:>9} {:>8} {:>8}".format(
+            "server", "connections", "req/sec", "p50 ms", "p99 ms", "errors", "threads"))
+        for concurrency in concurrency_levels:
+            for name, (process, port) in servers.items():
+                latencies, errors = asyncio.run(run_load(port, concurrency, duration, paths, headers))
+                latencies.sort()
+                print("{:<16} {:>11} {:>10.0f} {:>9.1f} {:>9.1f} {:>8} {:>8}".format(
+                    name, concurrency, len(latencies) / duration,
+                    latencies[len(latencies) // 2] * 1000 if latencies else 0,
+                    latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0,
+                    len(errors), thread_count(process.pid)))
+    finally:
+        for process, _ in servers.values():
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
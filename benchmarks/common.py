@@ -0,0 +1,81 @@
+import os
+import tempfile
+import time
+import bcrypt
+from app import app1, db
+from app.models.account import BankAccount, AccountType, BranchDetails
+from app.models.idempotencykey import IdempotencyKey
+from app.models.tokenblocklist import TokenBlockList
+from app.models.transaction import TransactionType
+from app.models.user import User, UserType
+
+BENCHMARK_EMAIL_ID = "bench@mark.com"
+BENCHMARK_PASSWORD = "bench!1234"
+
+
+def setup_database(accounts=100, account_balance=10 ** 9, uri=None):
+    """
+        Point the app at a throwaway database and load the reference data
+        parameters:
+            accounts: Integer
+            account_balance: Integer
+            uri: String, defaults to a SQLite file in the temp directory
+        returns:
+            list of account numbers
+    """
+    if uri is None:
+        path = os.path.join(tempfile.gettempdir(), "bank_system_benchmark.db")
+        if os.path.exists(path):
+            os.remove(path)
+        uri = "sqlite:///{}".format(path)
+    app1.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app1.app_context().push()
+
+    db.drop_all()
+    db.create_all()
+    db.session.add_all([UserType(user_type="customer"), AccountType(account_type="Saving"),
+                        BranchDetails(branch_name="Benchmark", branch_address="Benchmark"),
+                        TransactionType(transaction_type="credit"), TransactionType(transaction_type="debit")])
+    db.session.flush()
+    db.session.add(User(first_name="Bench", last_name="Mark", address="Pune", mobile_number="9000000000",
+                        email_id=BENCHMARK_EMAIL_ID, is_deleted=0, user_type_id=1,
+                        password=bcrypt.hashpw(BENCHMARK_PASSWORD.encode('utf-8'), bcrypt.gensalt(4)).decode('utf-8')))
+    db.session.flush()
+
+    account_numbers = ["001{:05d}".format(number) for number in range(accounts)]
+    db.session.add_all([BankAccount(account_number=account_number, is_active=1, is_deleted=0,
+                                    account_balance=account_balance, user_id=1, branch_id=1, account_type_id=1)
+                        for account_number in account_numbers])
+    db.session.commit()
+    return account_numbers
+
+
+def measure(name, func, iterations):
+    """
+        Call func(i) for each iteration and print throughput
+        returns:
+            operations per second
+    """
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    elapsed = time.perf_counter() - start
+    rate = iterations / elapsed
+    print("{:<30} {:>8} ops in {:>7.3f}s  {:>10.1f} ops/sec".format(name, iterations, elapsed, rate))
+    return rate
+
+
+def api_client():
+    """
+        Flask test client with a valid access token and request logging turned down
+        returns:
+            (client, headers)
+    """
+    import logging
+    from flask_jwt_extended import create_access_token
+    from app.common.log import logger
+    import app.routes  # noqa: F401 register the resources
+
+    logger.setLevel(logging.WARNING)
+    headers = {"Authorization": "Bearer {}".format(create_access_token(identity={"email_id": BENCHMARK_EMAIL_ID}))}
+    return app1.test_client(), headers
@@ -0,0 +1,54 @@
+"""
+    Compare the single-commit transfer engine with the previous
+    FundTransferResource.post write path (three commits, four lookups).
+
+    $ python -m benchmarks.fund_transfer
+"""
+import sys
+from app import db
+from app.common.fund_transfer import transfer_funds
+from app.models.account import BankAccount
+from app.models.transaction import AccountTransactionDetails, TransactionType, FundTransfer
+from benchmarks.common import setup_database, measure
+
+
+def legacy_transfer(from_account, to_account, transaction_amount):
+    fund_transfer_data = FundTransfer(from_account=from_account, to_account=to_account)
+    db.session.add(fund_transfer_data)
+    db.session.commit()
+
+    from_bank_account = BankAccount.query.filter(BankAccount.account_number == from_account).first()
+    transaction_type_debit = TransactionType.query.filter(TransactionType.transaction_type == "debit").first()
+    to_bank_account = BankAccount.query.filter(BankAccount.account_number == to_account).first()
+    transaction_type_credit = TransactionType.query.filter(TransactionType.transaction_type == "credit").first()
+
+    from_bank_account.account_balance -= transaction_amount
+    to_bank_account.account_balance += transaction_amount
+
+    db.session.add(AccountTransactionDetails(transaction_amount=transaction_amount, transaction_status="success",
+                                             bank_account_id=from_bank_account.id,
+                                             transaction_type_id=transaction_type_debit.id,
+                                             fund_transfer_id=fund_transfer_data.id,
+                                             fund_transfer_info="Funds Transfer"))
+    db.session.commit()
+    db.session.add(AccountTransactionDetails(transaction_amount=transaction_amount, transaction_status="success",
+                                             bank_account_id=to_bank_account.id,
+                                             transaction_type_id=transaction_type_credit.id,
+                                             fund_transfer_id=fund_transfer_data.id,
+                                             fund_transfer_info="Funds Received"))
+    db.session.commit()
+
+
+def main(iterations=2000):
+    account_numbers = setup_database()
+
+    def pair(i):
+        return account_numbers[i % len(account_numbers)], account_numbers[(i + 1) % len(account_numbers)]
+
+    legacy = measure("legacy transfer", lambda i: legacy_transfer(*pair(i), 10), iterations)
+    engine = measure("single-commit transfer", lambda i: transfer_funds(*pair(i), 10), iterations)
+    print("speedup: {:.2f}x".format(engine / legacy))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,25 @@
+"""
+    Compare POST /fundtransfer/batch with looping over POST /fundtransfer.
+
+    $ python -m benchmarks.fund_transfer_batch
+"""
+import sys
+from benchmarks.common import setup_database, measure, api_client
+
+
+def main(transfers=2000):
+    account_numbers = setup_database(accounts=200)
+    client, headers = api_client()
+    items = [{"from_account": account_numbers[i % len(account_numbers)],
+              "to_account": account_numbers[(i + 1) % len(account_numbers)],
+              "transaction_amount": 10} for i in range(transfers)]
+
+    single = measure("POST /fundtransfer loop",
+                     lambda i: client.post('/fundtransfer', json=items[i], headers=headers), transfers)
+    batch = measure("POST /fundtransfer/batch",
+                    lambda i: client.post('/fundtransfer/batch', json={"transfers": items}, headers=headers), 1)
+    print("speedup: {:.1f}x".format(batch * transfers / single))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,43 @@
+"""
+    Cost of the Idempotency-Key header on POST /fundtransfer: first requests
+    without a key and with a fresh key each, then retries answered from the
+    in-memory map and from the IdempotencyKey table. Also checks that the
+    retries moved no money.
+
+    $ python -m benchmarks.idempotency [iterations]
+"""
+import sys
+from app.common.idempotency import idempotency_store
+from app.models.account import BankAccount
+from benchmarks.common import setup_database, measure, api_client
+
+
+def main(iterations=1000):
+    account_numbers = setup_database()
+    client, headers = api_client()
+
+    def body(i):
+        return {"from_account": account_numbers[i % len(account_numbers)],
+                "to_account": account_numbers[(i + 1) % len(account_numbers)],
+                "transaction_amount": 10}
+
+    def post(i, key=None):
+        response = client.post("/fundtransfer", json=body(i),
+                               headers=dict(headers, **{"Idempotency-Key": key}) if key else headers)
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    plain = measure("first request, no key", lambda i: post(i), iterations)
+    keyed = measure("first request, new key", lambda i: post(i, "key-{}".format(i)), iterations)
+    balances = [bank_account.account_balance for bank_account in BankAccount.query.order_by(BankAccount.id)]
+    cached = measure("retry, in-memory", lambda i: post(i, "key-{}".format(i)), iterations)
+    idempotency_store.responses.clear()
+    stored = measure("retry, from table", lambda i: post(i, "key-{}".format(i)), iterations)
+
+    print("first request overhead: {:.0f}us".format(10 ** 6 / keyed - 10 ** 6 / plain))
+    print("retry vs first request: {:.1f}x (in-memory), {:.1f}x (table)".format(cached / keyed, stored / keyed))
+    print("balances unchanged by retries: {}".format(
+        balances == [bank_account.account_balance for bank_account in BankAccount.query.order_by(BankAccount.id)]))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
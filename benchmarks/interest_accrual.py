@@ -0,0 +1,72 @@
+"""
+    Accrue 30 days of interest on many Saving accounts with the vectorized
+    accrue_interest (NumPy per chunk, bulk insert and executemany update) and
+    with a per account ORM loop that commits each account, and print
+    accounts/sec for both.
+
+    $ python -m benchmarks.interest_accrual [accounts] [orm_accounts]
+"""
+import logging
+import math
+import sys
+import time
+from datetime import date, timedelta
+from app import app1, db
+from app.common.interest import accrue_interest, DAYS_PER_YEAR, INTEREST_ACCOUNT
+from app.common.log import logger
+from app.common.reference_cache import transaction_type_cache
+from app.models.account import BankAccount
+from app.models.transaction import AccountTransactionDetails, FundTransfer
+from benchmarks.common import setup_database
+
+START = date(2021, 1, 1)
+AS_OF = START + timedelta(days=30)
+
+
+def accrue_per_account(limit):
+    """
+        The same accrual one account at a time through the ORM
+    """
+    credit = transaction_type_cache.get_by_name("credit")
+    rate = app1.config['SAVING_INTEREST_RATE'] / 100 / DAYS_PER_YEAR
+    accounts = BankAccount.query.filter(BankAccount.interest_accrued_on < AS_OF).order_by(
+        BankAccount.id).limit(limit).all()
+    for bank_account in accounts:
+        total = bank_account.accrued_interest + max(bank_account.account_balance, 0) * \
+            (AS_OF - bank_account.interest_accrued_on).days * rate
+        posted = math.floor(total)
+        if posted:
+            fund_transfer = FundTransfer(from_account=INTEREST_ACCOUNT, to_account=None)
+            db.session.add(fund_transfer)
+            db.session.flush()
+            db.session.add(AccountTransactionDetails(transaction_amount=posted, transaction_status="success",
+                                                     bank_account_id=bank_account.id,
+                                                     transaction_type_id=credit.id,
+                                                     fund_transfer_id=fund_transfer.id,
+                                                     fund_transfer_info="Interest Credit"))
+        bank_account.account_balance += posted
+        bank_account.accrued_interest = total - posted
+        bank_account.interest_accrued_on = AS_OF
+        db.session.commit()
+    return len(accounts)
+
+
+def run(name, func):
+    start = time.perf_counter()
+    accounts = func()
+    elapsed = time.perf_counter() - start
+    print("{:<30} {:>8} accounts in {:>7.2f}s  {:>10.0f} accounts/sec".format(
+        name, accounts, elapsed, accounts / elapsed))
+
+
+def main(accounts=200000, orm_accounts=2000):
+    setup_database(accounts=accounts, account_balance=100000)
+    logger.setLevel(logging.WARNING)
+    accrue_interest(START)
+
+    run("per account ORM", lambda: accrue_per_account(orm_accounts))
+    run("vectorized", lambda: accrue_interest(AS_OF)[0])
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,84 @@
+"""
+    Seed a ledger with years of history, then time the history reads and
+    fund transfers before and after archive_transactions moves the rows older
+    than ARCHIVE_AFTER_DAYS out of AccountTransactionDetails, and print how
+    fast the archival itself moves rows.
+
+    $ python -m benchmarks.ledger_archive [rows] [accounts]
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+from app import app1, db
+from app.common.balance_snapshot import take_balance_snapshots
+from app.common.ledger_archive import archive_transactions
+from app.common.mini_statement import mini_statement_store
+from app.models.transaction import AccountTransactionDetails, AccountTransactionDetailsArchive, FundTransfer
+from benchmarks.common import setup_database, measure, api_client
+
+INSERT_BATCH = 50000
+HISTORY_DAYS = 3 * 365
+
+
+def seed_ledger(rows, accounts):
+    db.session.add(FundTransfer(from_account="00100000", to_account=None))
+    db.session.flush()
+    start = datetime.now() - timedelta(days=HISTORY_DAYS)
+    step = timedelta(days=HISTORY_DAYS) / rows
+    for offset in range(0, rows, INSERT_BATCH):
+        db.session.bulk_insert_mappings(AccountTransactionDetails, [
+            {"transaction_amount": 10, "transaction_status": "success", "bank_account_id": 1 + i % accounts,
+             "transaction_type_id": 1 + i % 2, "fund_transfer_id": 1, "fund_transfer_info": "Funds Transfer",
+             "transaction_date": start + step * i}
+            for i in range(offset, min(offset + INSERT_BATCH, rows))])
+        db.session.commit()
+
+
+def run_reads(client, headers, accounts, account_numbers, iterations):
+    recent = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+    old = (datetime.now() - timedelta(days=2 * 365)).strftime("%Y-%m-%d")
+
+    def mini_statement(i):
+        mini_statement_store.invalidate(1 + i % accounts)
+        client.get("/ministatement/{}".format(1 + i % accounts), headers=headers)
+
+    def recent_history(i):
+        client.get("/accounttransactiondetailsbankid?bank_account_id={}&from_date={}".format(
+            1 + i % accounts, recent), headers=headers)
+
+    def old_history(i):
+        client.get("/accounttransactiondetailsbankid?bank_account_id={}&from_date={}&to_date={}".format(
+            1 + i % accounts, old, old), headers=headers)
+
+    def fund_transfer(i):
+        client.post("/fundtransfer", headers=headers, json={
+            "from_account": account_numbers[i % len(account_numbers)],
+            "to_account": account_numbers[(i + 1) % len(account_numbers)], "transaction_amount": 1})
+
+    measure("mini statement", mini_statement, iterations)
+    measure("history, last 30 days", recent_history, iterations)
+    measure("history, one day 2 years ago", old_history, iterations)
+    measure("fund transfer", fund_transfer, iterations)
+
+
+def main(rows=500000, accounts=100):
+    account_numbers = setup_database(accounts=accounts)
+    seed_ledger(rows, accounts)
+    take_balance_snapshots()
+    client, headers = api_client()
+
+    print("hot rows {}".format(AccountTransactionDetails.query.count()))
+    run_reads(client, headers, accounts, account_numbers, 500)
+
+    start = time.perf_counter()
+    moved = archive_transactions(datetime.now() - timedelta(days=app1.config['ARCHIVE_AFTER_DAYS']), pause=0)
+    elapsed = time.perf_counter() - start
+    print("archived {} rows in {:.2f}s  {:.0f} rows/sec".format(moved, elapsed, moved / elapsed))
+
+    print("hot rows {}, archived rows {}".format(AccountTransactionDetails.query.count(),
+                                                 AccountTransactionDetailsArchive.query.count()))
+    run_reads(client, headers, accounts, account_numbers, 500)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
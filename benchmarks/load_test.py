@@ -0,0 +1,240 @@
+"""
+    Load test built from bank_system.postman_collection.json
+
+    Every request of the collection becomes a weighted scenario. Workers log
+    in once, reuse the access token and log in again on 401. Latency
+    percentiles and throughput per route are written to a JSON report so
+    runs can be compared.
+
+    In-process against a seeded SQLite database (or DATABASE_URL):
+    $ python -m benchmarks.load_test --concurrency 8 --duration 30 --output run.json
+
+    Against a running server:
+    $ python -m benchmarks.load_test --url http://127.0.0.1:5000 --email-id user@bank.com --password secret!12
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+COLLECTION = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "bank_system.postman_collection.json")
+
+# weight per method unless --weights names the scenario; requests that
+# revoke the token or destroy data are left out by default
+DEFAULT_WEIGHTS = {"GET": 10, "POST": 1, "PUT": 0, "DELETE": 0}
+EXCLUDED_PATHS = ("/login", "/logout")
+
+
+def load_scenarios(collection_path, weights):
+    """
+        Flatten the collection into [{name, method, path, body, weight}]
+    """
+    with open(collection_path) as collection_file:
+        collection = json.load(collection_file)
+
+    scenarios = []
+
+    def walk(items, folder):
+        for item in items:
+            if 'item' in item:
+                walk(item['item'], folder + item['name'] + "/")
+                continue
+            request = item['request']
+            url = request['url']['raw'] if isinstance(request['url'], dict) else request['url']
+            path = "/" + url.split("://", 1)[-1].split("/", 1)[-1]
+            if path.split("?")[0].rstrip("/") in EXCLUDED_PATHS:
+                continue
+            raw_body = (request.get('body') or {}).get('raw', '').strip()
+            name = folder + item['name']
+            scenarios.append({"name": name,
+                              "method": request['method'],
+                              "path": path,
+                              "body": json.loads(raw_body) if raw_body else None,
+                              "weight": weights.get(name, DEFAULT_WEIGHTS.get(request['method'], 0))})
+
+    walk(collection['item'], "")
+    return [scenario for scenario in scenarios if scenario['weight'] > 0]
+
+
+def route_of(method, path):
+    return "{} {}".format(method, re.sub(r"/\d+", "/<id>", path.split("?")[0]))
+
+
+class InProcessTarget(object):
+    """Flask test client, one per worker thread"""
+    def __init__(self):
+        from app import app1
+        import app.routes  # noqa: F401 register the resources
+        self.app = app1
+        self.local = threading.local()
+
+    def request(self, method, path, body, headers):
+        if not hasattr(self.local, 'client'):
+            self.local.client = self.app.test_client()
+        response = self.local.client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpTarget(object):
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+
+    def request(self, method, path, body, headers):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        http_request = urllib.request.Request(self.url + path, data=data, method=method,
+                                              headers=dict(headers, **{"Content-Type": "application/json"}))
+        try:
+            with urllib.request.urlopen(http_request) as response:
+                status, payload = response.status, response.read()
+        except urllib.error.HTTPError as err:
+            status, payload = err.code, err.read()
+        try:
+            return status, json.loads(payload)
+        except ValueError:
+            return status, None
+
+
+class Worker(object):
+    def __init__(self, target, scenarios, credentials, account_numbers):
+        self.target = target
+        self.scenarios = scenarios
+        self.weights = [scenario['weight'] for scenario in scenarios]
+        self.credentials = credentials
+        self.account_numbers = account_numbers
+        self.token = None
+        self.samples = defaultdict(list)
+
+    def login(self):
+        status, payload = self.target.request("POST", "/login", self.credentials, {})
+        self.token = payload['data']['access_token'] if payload and status < 300 else None
+
+    def prepare_body(self, body):
+        # point transfers at seeded accounts so they exercise the write path
+        if body and self.account_numbers and 'from_account' in body:
+            body = dict(body, from_account=random.choice(self.account_numbers),
+                        to_account=random.choice(self.account_numbers))
+        return body
+
+    def run_one(self):
+        scenario = random.choices(self.scenarios, weights=self.weights)[0]
+        if self.token is None:
+            start = time.perf_counter()
+            try:
+                self.login()
+            except Exception:
+                # counted like a failed scenario request, the next round logs in again
+                self.samples[route_of("POST", "/login")].append((time.perf_counter() - start, 599))
+                return
+        body = self.prepare_body(scenario['body'])
+        start = time.perf_counter()
+        try:
+            status, _ = self.target.request(scenario['method'], scenario['path'], body,
+                                            {"Authorization": "Bearer {}".format(self.token)})
+        except Exception:
+            status = 599
+        elapsed = time.perf_counter() - start
+        if status == 401:
+            self.token = None
+        self.samples[route_of(scenario['method'], scenario['path'])].append((elapsed, status))
+
+    def run(self, deadline, requests):
+        done = 0
+        while time.monotonic() < deadline and (requests is None or done < requests):
+            self.run_one()
+            done += 1
+        return self.samples
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(latency for latency, _ in samples)
+    statuses = defaultdict(int)
+    for _, status in samples:
+        statuses[str(status)] += 1
+    return {"requests": len(samples),
+            "errors": sum(count for status, count in statuses.items() if int(status) >= 500),
+            "status_counts": dict(statuses),
+            "throughput_rps": round(len(samples) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", default=COLLECTION)
+    parser.add_argument("--url", help="base URL of a running server, in-process when omitted")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10, help="seconds")
+    parser.add_argument("--requests", type=int, help="requests per worker, overrides --duration")
+    parser.add_argument("--weights", help="JSON file of {scenario name: weight}")
+    parser.add_argument("--accounts", type=int, default=100, help="accounts seeded for in-process runs")
+    parser.add_argument("--email-id")
+    parser.add_argument("--password")
+    parser.add_argument("--output", default="load_test_report.json")
+    args = parser.parse_args()
+
+    weights = {}
+    if args.weights:
+        with open(args.weights) as weights_file:
+            weights = json.load(weights_file)
+    scenarios = load_scenarios(args.collection, weights)
+
+    if args.url:
+        target, account_numbers = HttpTarget(args.url), None
+        credentials = {"email_id": args.email_id, "password": args.password}
+    else:
+        import logging
+        from app.common.log import logger
+        from benchmarks.common import setup_database, BENCHMARK_EMAIL_ID, BENCHMARK_PASSWORD
+
+        logger.setLevel(logging.WARNING)
+        account_numbers = setup_database(accounts=args.accounts, uri=os.environ.get('DATABASE_URL'))
+        target = InProcessTarget()
+        credentials = {"email_id": args.email_id or BENCHMARK_EMAIL_ID, "password": args.password or BENCHMARK_PASSWORD}
+
+    workers = [Worker(target, scenarios, credentials, account_numbers) for _ in range(args.concurrency)]
+    deadline = time.monotonic() + (args.duration if args.requests is None else float("inf"))
+    started_at = datetime.utcnow().isoformat()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(lambda worker: worker.run(deadline, args.requests), workers))
+    elapsed = time.perf_counter() - start
+
+    by_route = defaultdict(list)
+    for samples in results:
+        for route, route_samples in samples.items():
+            by_route[route].extend(route_samples)
+
+    report = {"started_at": started_at,
+              "target": args.url or "in-process",
+              "concurrency": args.concurrency,
+              "elapsed_s": round(elapsed, 3),
+              "total": summarize([sample for samples in by_route.values() for sample in samples], elapsed),
+              "routes": {route: summarize(samples, elapsed) for route, samples in sorted(by_route.items())}}
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+
+    print("{:<40} {:>8} {:>10} {:>9} {:>9} {:>9}".format("route", "requests", "req/s", "p50 ms", "p95 ms", "p99 ms"))
+    for route, summary in sorted(report['routes'].items()) + [("total", report['total'])]:
+        print("{:<40} {:>8} {:>10} {:>9} {:>9} {:>9}".format(route, summary['requests'], summary['throughput_rps'],
+                                                             summary['p50_ms'], summary['p95_ms'], summary['p99_ms']))
+    print("report written to {}".format(args.output))
+
+
+if __name__ == '__main__':
+    main()
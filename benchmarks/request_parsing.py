@@ -0,0 +1,57 @@
+"""
+    Compare the per-request cost of the single-pass load_request() against
+    the previous validate(partial=True) followed by reading data[...] keys
+    for the POST bodies of users, bank accounts, ledger rows and fund transfers.
+    Also prints the one response an invalid body now gets.
+
+    $ python -m benchmarks.request_parsing [iterations]
+"""
+import sys
+from app import app1
+from app.common.custom_exception import RequestDataInvalid
+from app.common.request_parser import load_request
+from app.schemas.account import bank_account_schema
+from app.schemas.transaction import account_transaction_details_schema, fund_transfer_schema
+from app.schemas.user import user_schema
+from benchmarks.common import measure
+from flask import request
+
+BODIES = {
+    "user": (user_schema, {
+        "first_name": "Bench", "last_name": "Mark", "address": "Pune", "mobile_number": "9000000001",
+        "email_id": "bench1@mark.com", "password": "bench!1234", "user_type_id": 1}),
+    "bank account": (bank_account_schema, {
+        "account_balance": 5000, "user_id": 1, "account_type_id": 1, "branch_id": 1}),
+    "ledger": (account_transaction_details_schema, {
+        "transaction_amount": 100, "bank_account_id": 1, "transaction_type_id": 1,
+        "fund_transfer_info": "Funds added"}),
+    "fund transfer": (fund_transfer_schema, {
+        "from_account": "00100000", "to_account": "00100001", "transaction_amount": 100}),
+}
+
+
+def legacy_parse(schema, required):
+    data = request.get_json()
+    errors = schema.validate(data, partial=True)
+    if errors:
+        return errors
+    return {name: data[name] for name in required}
+
+
+def main(iterations=20000):
+    for name, (schema, body) in BODIES.items():
+        required = tuple(body)
+        with app1.test_request_context(method="POST", json=body):
+            legacy = measure("{} validate + keys".format(name), lambda i: legacy_parse(schema, required), iterations)
+            single = measure("{} load_request".format(name), lambda i: load_request(schema, required), iterations)
+        print("{:<30} per-request overhead: {:.1f}us -> {:.1f}us".format(name, 10 ** 6 / legacy, 10 ** 6 / single))
+
+    with app1.test_request_context(method="POST", json={"first_name": "x1", "user_type_id": "1"}):
+        try:
+            load_request(user_schema, tuple(BODIES["user"][1]))
+        except RequestDataInvalid as err:
+            print("invalid user body reports every field at once: {}".format(err.message))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,71 @@
+"""
+    Check that the generated dump functions give the same output as marshmallow
+    for the list schemas, then compare their rows/sec.
+
+    $ python -m benchmarks.serializers [rows]
+"""
+import sys
+from datetime import datetime
+from marshmallow import Schema
+from benchmarks.common import setup_database, measure
+from app import db
+from app.models.account import BankAccount
+from app.models.transaction import AccountTransactionDetails, FundTransfer
+from app.models.user import User
+from app.schemas.account import bank_accounts_schema
+from app.schemas.transaction import accounts_transaction_details_schema, funds_transfer_schema
+from app.schemas.user import users_schema
+
+
+def load_rows(rows):
+    db.session.bulk_insert_mappings(User, [
+        {"first_name": "Bench", "last_name": "Mark", "address": "Pune", "mobile_number": "8{:09d}".format(i),
+         "email_id": "user{}@bench.com".format(i), "password": "x", "is_deleted": 0, "user_type_id": 1,
+         "created_at": datetime(2021, 5, 1, 10, 30)} for i in range(rows)])
+    db.session.bulk_insert_mappings(FundTransfer, [
+        {"from_account": "00100000", "to_account": "00100001" if i % 2 else None} for i in range(rows)])
+    db.session.bulk_insert_mappings(AccountTransactionDetails, [
+        {"transaction_amount": i, "transaction_status": "success", "bank_account_id": 1, "transaction_type_id": 1,
+         "fund_transfer_id": i + 1, "fund_transfer_info": "Funds Received" if i % 3 else None} for i in range(rows)])
+    db.session.commit()
+
+
+def edge_cases():
+    # dict rows, missing keys and None values take different branches in marshmallow
+    return {
+        "users": [{"id": 1, "first_name": "Bench", "created_at": None}, {"email_id": None}],
+        "bank accounts": [{"id": "7", "account_number": 100001, "account_balance": 10.9}, {}],
+        "ledger": [{"id": 1, "transaction_amount": None, "fund_transfer_info": b"Fund added"}],
+        "fund transfers": [{"id": 1, "from_account": "00100000", "to_account": None, "transaction_amount": 5}],
+    }
+
+
+def main(rows=5000):
+    setup_database(accounts=rows)
+    load_rows(rows)
+    cases = {
+        "users": (users_schema, User.query.all()),
+        "bank accounts": (bank_accounts_schema, BankAccount.query.all()),
+        "ledger": (accounts_transaction_details_schema, AccountTransactionDetails.query.all()),
+        "fund transfers": (funds_transfer_schema, FundTransfer.query.all()),
+    }
+    extra = edge_cases()
+
+    for name, (schema, objects) in cases.items():
+        for sample in (objects, extra[name]):
+            expected = Schema.dump(schema, sample)
+            actual = schema.dump(sample)
+            if actual != expected:
+                raise SystemExit("{}: fast dump differs from marshmallow\n{!r}\n{!r}".format(
+                    name, actual[:3], expected[:3]))
+    print("fast dump output identical to marshmallow for all list schemas")
+
+    for name, (schema, objects) in cases.items():
+        slow = measure("{} marshmallow".format(name), lambda i: Schema.dump(schema, objects), 5)
+        fast = measure("{} fast".format(name), lambda i: schema.dump(objects), 5)
+        print("{:<30} {:>10.0f} vs {:>10.0f} rows/sec  speedup: {:.1f}x".format(
+            name, slow * len(objects), fast * len(objects), fast / slow))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,90 @@
+"""
+    Export one account with many ledger rows through GET
+    /accounttransactiondetails/export (CSV, server-side cursor) and through
+    the previous all rows as one JSON body, and print rows/sec and how much
+    the memory of the process grew at most during each.
+
+    $ python -m benchmarks.statement_export [rows]
+"""
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from app import db
+from app.models.transaction import AccountTransactionDetails, FundTransfer
+from app.schemas.transaction import accounts_transaction_details_schema
+from benchmarks.common import setup_database, api_client
+
+INSERT_BATCH = 50000
+
+
+def rss_mb():
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0
+
+
+class RssSampler(threading.Thread):
+    """
+        Highest resident memory seen every 20 ms while running
+    """
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = rss_mb()
+        self.done = threading.Event()
+
+    def run(self):
+        while not self.done.wait(0.02):
+            self.peak = max(self.peak, rss_mb())
+
+
+def seed_ledger(rows):
+    db.session.add(FundTransfer(from_account="00100000", to_account=None))
+    db.session.flush()
+    start = datetime(2021, 1, 1)
+    for offset in range(0, rows, INSERT_BATCH):
+        db.session.bulk_insert_mappings(AccountTransactionDetails, [
+            {"transaction_amount": 10, "transaction_status": "success", "bank_account_id": 1,
+             "transaction_type_id": 1 + i % 2, "fund_transfer_id": 1, "fund_transfer_info": "Funds Transfer",
+             "transaction_date": start + timedelta(minutes=i)}
+            for i in range(offset, min(offset + INSERT_BATCH, rows))])
+        db.session.commit()
+
+
+def run(name, func, rows):
+    before = rss_mb()
+    sampler = RssSampler()
+    sampler.start()
+    start = time.perf_counter()
+    exported = func()
+    elapsed = time.perf_counter() - start
+    sampler.done.set()
+    sampler.join()
+    db.session.remove()
+    print("{:<24} {:>9} rows in {:>7.2f}s  {:>10.0f} rows/sec  memory +{:.0f} MB".format(
+        name, exported, elapsed, rows / elapsed, sampler.peak - before))
+
+
+def main(rows=1000000):
+    setup_database(accounts=1)
+    seed_ledger(rows)
+    client, headers = api_client()
+
+    def csv_export():
+        response = client.get("/accounttransactiondetails/export?bank_account_id=1", headers=headers, buffered=False)
+        lines = sum(chunk.count(b"\n") for chunk in response.response)
+        response.close()
+        return lines - 1
+
+    def json_blob():
+        ledger = AccountTransactionDetails.query.filter(AccountTransactionDetails.bank_account_id == 1).all()
+        return len(accounts_transaction_details_schema.dump(ledger))
+
+    run("CSV export (streamed)", csv_export, rows)
+    run("all rows as one JSON", json_blob, rows)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
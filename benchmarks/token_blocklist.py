@@ -0,0 +1,34 @@
+"""
+    Compare the per-request revocation check against the previous
+    TokenBlockList query issued for every @jwt_required() call.
+
+    $ python -m benchmarks.token_blocklist
+"""
+import sys
+import uuid
+from datetime import datetime
+from app import db
+from app.common.token_blocklist import revocation_store
+from app.models.tokenblocklist import TokenBlockList
+from benchmarks.common import setup_database, measure
+
+
+def legacy_is_revoked(jti):
+    return db.session.query(TokenBlockList.id).filter_by(jti=jti).scalar() is not None
+
+
+def main(iterations=20000, revoked_tokens=10000):
+    setup_database(accounts=1)
+    now = datetime.utcnow()
+    jtis = [str(uuid.uuid4()) for _ in range(revoked_tokens)]
+    db.session.bulk_insert_mappings(TokenBlockList, [{"jti": jti, "created_at": now} for jti in jtis])
+    db.session.commit()
+    active = str(uuid.uuid4())
+
+    legacy = measure("legacy blocklist query", lambda i: legacy_is_revoked(active), iterations)
+    store = measure("in-memory revocation store", lambda i: revocation_store.is_revoked(active), iterations)
+    print("per-request overhead: {:.1f}us -> {:.1f}us".format(10 ** 6 / legacy, 10 ** 6 / store))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
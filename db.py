@@ -1,9 +1,29 @@
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
 from app.models.account import AccountType
 from app import db
 from app import app1
 from flask_script import Manager
 from app import manager
 from seed import seed
+from app.common.token_blocklist import purge_expired_tokens
+from app.common.idempotency import purge_expired_idempotency_keys
+from app.common.balance_snapshot import take_balance_snapshots
+from app.common.ledger_archive import archive_transactions as move_to_archive
+from app.common.interest import accrue_interest as accrue_saving_interest
+from app.common.sharded_balance import set_balance_shards, fold_all_shards
+from app.common.custom_exception import RequestDataInvalid, BankAccountObjectNotFound, \
+    TransactionTypeObjectNotFound
+from app.common.user_bulk import create_users_bulk
+from app.common.request_parser import parse_transaction_date
+from app.common.statement_export import parse_bank_account_ids, export_rows, csv_chunks
+from app.common import query_plan
+from flask_migrate import upgrade
 
 
 @manager.command
@@ -12,5 +32,127 @@ def seed():
     print("Seed Data Loaded.")
 
 
+@manager.command
+def purge_token_blocklist():
+    deleted = purge_expired_tokens()
+    print("{} expired token(s) purged.".format(deleted))
+
+
+@manager.command
+def purge_idempotency_keys():
+    deleted = purge_expired_idempotency_keys()
+    print("{} expired idempotency key(s) purged.".format(deleted))
+
+
+@manager.command
+def snapshot_balances():
+    written = take_balance_snapshots()
+    print("{} balance snapshot(s) taken.".format(written))
+
+
+@manager.option('--pause', dest='pause', type=float, help="seconds between batches, default ARCHIVE_BATCH_PAUSE")
+@manager.option('--batch-size', dest='batch_size', type=int, help="rows per batch, default ARCHIVE_BATCH_SIZE")
+@manager.option('--older-than-days', dest='older_than_days', type=int,
+                help="archive ledger rows older than this, default ARCHIVE_AFTER_DAYS")
+def archive_transactions(older_than_days, batch_size, pause):
+    """Move ledger rows older than N days, already counted by a balance snapshot, to the archive table"""
+    days = app1.config['ARCHIVE_AFTER_DAYS'] if older_than_days is None else older_than_days
+    moved = move_to_archive(datetime.now() - timedelta(days=days), batch_size, pause)
+    print("{} account transaction(s) archived.".format(moved))
+
+
+@manager.option('--chunk-size', dest='chunk_size', type=int, help="accounts per chunk, default INTEREST_CHUNK_SIZE")
+@manager.option('--as-of', dest='as_of', help="day (YYYY-MM-DD) to accrue up to, default today")
+def accrue_interest(as_of, chunk_size):
+    """Accrue daily interest on every Saving account and post the whole units as credits"""
+    start = time.perf_counter()
+    try:
+        as_of_date = parse_transaction_date(as_of, "as_of").date() if as_of else date.today()
+        accounts, credits, interest = accrue_saving_interest(as_of_date, chunk_size)
+    except (RequestDataInvalid, TransactionTypeObjectNotFound) as err:
+        raise SystemExit(err.message)
+    elapsed = time.perf_counter() - start
+    print("{} saving account(s) accrued up to {}, {} interest credit(s) of {} in total posted.".format(
+        accounts, as_of_date.isoformat(), credits, interest))
+    print("{:.2f}s, {:.0f} accounts/sec, {:.0f} credit rows/sec".format(
+        elapsed, accounts / elapsed if elapsed else 0, credits / elapsed if elapsed else 0))
+
+
+@manager.option('shards', type=int, help="number of balance shards, 0 turns sharding off")
+@manager.option('account_number', help="bank account to shard")
+def shard_balance(account_number, shards):
+    """Spread the credits of a hot account over balance shards"""
+    if set_balance_shards(account_number, shards) is None:
+        raise SystemExit("Bank account {} does not exist".format(account_number))
+    print("Bank account {} has {} balance shard(s).".format(account_number, shards))
+
+
+@manager.command
+def fold_balance_shards():
+    folded = fold_all_shards()
+    print("{} sharded account(s) folded.".format(folded))
+
+
+def read_users(path):
+    # a JSON list of user objects, or a CSV file with the same column names
+    with open(path, newline='') as users_file:
+        if not path.lower().endswith('.csv'):
+            return json.load(users_file)
+        users = list(csv.DictReader(users_file))
+    for user in users:
+        if user.get('user_type_id', '').isdigit():
+            user['user_type_id'] = int(user['user_type_id'])
+    return users
+
+
+@manager.option('--batch-size', dest='batch_size', type=int, default=1000, help="users per unit of work")
+@manager.option('path', help="JSON list or CSV file of users")
+def import_users(path, batch_size):
+    """Create the users of a JSON or CSV file in bulk, rejected rows are printed and skipped"""
+    users = read_users(path)
+    created = 0
+    for start in range(0, len(users), batch_size):
+        for result in create_users_bulk(users[start:start + batch_size]):
+            if result['success']:
+                created += 1
+            else:
+                print("row {}: {}".format(start + result['index'] + 1, result['message']))
+    print("{} of {} user(s) created.".format(created, len(users)))
+
+
+@manager.option('--to', dest='to_date', help="last day (YYYY-MM-DD) or date time to export, optional")
+@manager.option('--from', dest='from_date', help="first day (YYYY-MM-DD) or date time to export, optional")
+@manager.option('--bank-account-ids', dest='bank_account_ids', required=True, help="comma separated bank account ids")
+@manager.option('path', help="CSV file to write, - for stdout")
+def export_transactions(path, bank_account_ids, from_date, to_date):
+    """Stream the ledger rows of bank accounts over a date range to a CSV file"""
+    try:
+        rows = export_rows(parse_bank_account_ids(bank_account_ids),
+                           parse_transaction_date(from_date, "from"),
+                           parse_transaction_date(to_date, "to", end_of_day=True))
+    except (RequestDataInvalid, BankAccountObjectNotFound) as err:
+        raise SystemExit(err.message)
+    export_file = sys.stdout if path == '-' else open(path, 'w', newline='')
+    try:
+        for chunk in csv_chunks(rows):
+            export_file.write(chunk)
+    finally:
+        if export_file is not sys.stdout:
+            export_file.close()
+
+
+@manager.command
+def check_query_plans():
+    """Apply the migrations to a throwaway SQLite database and check that the hot queries use indexes"""
+    app1.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:///{}".format(os.path.join(tempfile.mkdtemp(), "query_plan.db"))
+    upgrade(directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations"))
+    plans, failures = query_plan.check_query_plans()
+    for name, plan in plans.items():
+        print("{}{}: {}".format("FULL SCAN " if name in failures else "", name, " | ".join(plan)))
+    if failures:
+        raise SystemExit("{} hot queries do not use an index".format(len(failures)))
+    print("All hot queries use an index.")
+
+
 if __name__ == "__main__":
     manager.run()
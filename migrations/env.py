@@ -2,6 +2,7 @@ from __future__ import with_statement
 from app.models import account
 from app.models import user
 from app.models import tokenblocklist
+from app.models import idempotencykey
 from app.models import transaction
 
 
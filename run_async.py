@@ -0,0 +1,8 @@
+from os import environ
+import uvicorn
+
+
+if __name__ == '__main__':
+    #  Start the asyncio server, ASYNC_WORKERS processes on one port
+    uvicorn.run("app.asgi:application", host='0.0.0.0', port=int(environ.get('PORT', 5000)),
+                workers=int(environ.get('ASYNC_WORKERS', 1)))